@@ -1,52 +1,58 @@
+import threading
 from datetime import datetime
 from decimal import Decimal
+from typing import Optional
 
 from flask import Flask, redirect, url_for, request, session
 from flask_admin import Admin
-from flask_admin.contrib.sqla import ModelView
 from flask_bcrypt import Bcrypt
 from flask_mail import Mail
 from flask_sqlalchemy import SQLAlchemy
 
+from app.config import config_for
+from app.services import metrics, profiler
+from app.services.cache import CatalogCache
+from app.services.fragment_cache import fragment_cache
+from app.services.sql_stats import SQLInstrumentation
+
 db = SQLAlchemy()
 bcrypt = Bcrypt()
 mail = Mail()
 admin = Admin(name="Admin Console", url="/admin/console")
+catalog_cache = CatalogCache()
+sql_stats = SQLInstrumentation()
 
 
-def create_app() -> Flask:
+def create_app(config_name: Optional[str] = None) -> Flask:
     """
     Application factory so routes, extensions, and models initialize in a
-    predictable order.
+    predictable order. ``config_name`` (or the APP_CONFIG environment
+    variable) picks a profile from ``app.config.CONFIGS``.
     """
     app = Flask(__name__, static_folder="static", template_folder="templates")
-    app.config.from_object("app.config.Config")
+    app.config.from_object(config_for(config_name))
 
     db.init_app(app)
+    from app.models.pragmas import install_pragmas
+
+    with app.app_context():
+        for engine in db.engines.values():
+            install_pragmas(engine, app.config.get("SQLITE_PRAGMAS"))
+    sql_stats.init_app(app)
+    metrics.init_app(app)
+    profiler.init_app(app)
     bcrypt.init_app(app)
     mail.init_app(app)
     admin.init_app(app)
+    catalog_cache.init_app(app)
+    fragment_cache.init_app(app)
 
-    from app.models import (
-        CartItem,
-        Category,
-        Order,
-        OrderItem,
-        Product,
-        Review,
-        User,
-    )
+    from app.admin_console import register_views
 
     admin._views = []
     admin._menu = []
     admin._menu_links = []
-    admin.add_view(ModelView(Product, db.session))
-    admin.add_view(ModelView(Category, db.session))
-    admin.add_view(ModelView(User, db.session))
-    admin.add_view(ModelView(Order, db.session))
-    admin.add_view(ModelView(OrderItem, db.session))
-    admin.add_view(ModelView(CartItem, db.session))
-    admin.add_view(ModelView(Review, db.session))
+    register_views(admin, db.session)
 
     def format_currency(value):
         if value is None:
@@ -67,8 +73,11 @@ def create_app() -> Flask:
             return value.strftime(fmt)
         return str(value)
 
+    from app.models import image_srcset
+
     app.jinja_env.filters["format_currency"] = format_currency
     app.jinja_env.filters["format_date"] = format_date
+    app.jinja_env.filters["image_srcset"] = image_srcset
 
     @app.context_processor
     def inject_globals():
@@ -88,6 +97,10 @@ def create_app() -> Flask:
     app.register_blueprint(account_bp, url_prefix="/account")
     app.register_blueprint(admin_bp, url_prefix="/admin")
 
+    from app.cli import register_commands
+
+    register_commands(app)
+
     @app.route("/")
     def index():
         return redirect(url_for("shop.index"))
@@ -98,6 +111,7 @@ def create_app() -> Flask:
             "auth.login",
             "auth.register",
             "static",
+            "metrics",
         }
         endpoint = request.endpoint or ""
         if endpoint.startswith("auth.") or endpoint in exempt:
@@ -110,6 +124,28 @@ def create_app() -> Flask:
     return app
 
 
-app = create_app()
+_app: Optional[Flask] = None
+_app_lock = threading.Lock()
+
+
+def get_app() -> Flask:
+    """
+    The process-wide application, built on first use. Importing ``app.models``
+    or a service no longer constructs the app; ``from app import app`` (and
+    ``flask --app app``) still works and goes through here.
+    """
+    global _app
+    if _app is None:
+        with _app_lock:
+            if _app is None:
+                _app = create_app()
+    return _app
+
+
+def __getattr__(name: str):
+    if name == "app":
+        return get_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
-__all__ = ["app", "create_app", "db", "admin", "bcrypt", "mail"]
+__all__ = ["app", "create_app", "get_app", "db", "admin", "bcrypt", "mail", "catalog_cache", "fragment_cache", "sql_stats"]
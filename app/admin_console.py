@@ -0,0 +1,67 @@
+"""
+Flask-Admin model views for the console at ``/admin/console``.
+
+A ``ModelView`` introspects its model when it is constructed: list, detail
+and export columns, the create/edit form classes, search and filters. Doing
+that for every model made each app start (and every CLI call) pay for a
+console that is rarely opened. Flask does not allow routes to be added once
+the app has served a request, so the views are still registered up front,
+but each one only scaffolds itself the first time one of its pages is hit.
+"""
+
+from __future__ import annotations
+
+import threading
+
+from flask_admin import Admin
+from flask_admin.contrib.sqla import ModelView
+
+
+class LazyModelView(ModelView):
+    """``ModelView`` that postpones model introspection until its first request."""
+
+    def __init__(self, *args, **kwargs):
+        self._scaffolded = False
+        self._scaffold_lock = threading.Lock()
+        super().__init__(*args, **kwargs)
+
+    def _refresh_cache(self) -> None:
+        # Called once from ModelView.__init__; the real work waits for _handle_view.
+        if self._scaffolded:
+            super()._refresh_cache()
+
+    def scaffold_auto_joins(self) -> list:
+        # Needs the list columns, so it is deferred along with them.
+        return super().scaffold_auto_joins() if self._scaffolded else []
+
+    def _scaffold(self) -> None:
+        with self._scaffold_lock:
+            if not self._scaffolded:
+                super()._refresh_cache()
+                if not self.column_select_related_list:
+                    self._auto_joins = super().scaffold_auto_joins()
+                self._scaffolded = True
+
+    def _handle_view(self, name, **kwargs):
+        if not self._scaffolded:
+            self._scaffold()
+        return super()._handle_view(name, **kwargs)
+
+
+def register_views(admin: Admin, session) -> None:
+    from app.models import (
+        CartItem,
+        Category,
+        EmailOutbox,
+        Order,
+        OrderItem,
+        Product,
+        Review,
+        User,
+    )
+
+    for model in (Product, Category, User, Order, OrderItem, CartItem, Review, EmailOutbox):
+        admin.add_view(LazyModelView(model, session))
+
+
+__all__ = ["LazyModelView", "register_views"]
@@ -1,7 +1,8 @@
 from flask import Blueprint, flash, redirect, render_template, request, session, url_for
 
 from app.blueprints.account.forms import ProfileForm
-from app.models import Order, User
+from app.models import Order
+from app.services.users import current_user, forget_user
 from app import db
 
 account_bp = Blueprint("account", __name__)
@@ -19,11 +20,7 @@ def dashboard():
     if maybe_redirect:
         return maybe_redirect
     username = session.get("username")
-    user = User.by_username(username) if username else None
-    if not user and username:
-        user = User(username=username, email=f"{username}@example.com", password_hash="guest")
-        db.session.add(user)
-        db.session.commit()
+    user = current_user(create=True)
     return render_template("dashboard.html", username=username, user=user)
 
 
@@ -45,16 +42,12 @@ def profile():
 
     form = ProfileForm.from_request(request)
     username = session.get("username")
-
-    user = User.by_username(username) if username else None
-    if not user and username:
-        user = User(username=username, email=f"{username}@example.com", password_hash="guest")
-        db.session.add(user)
-        db.session.commit()
+    user = current_user(create=True)
 
     if request.method == "POST":
         if form.is_valid():
             if user:
+                forget_user(user.username)
                 user.username = form.display_name or user.username
                 if form.email:
                     user.email = form.email
@@ -1,9 +1,22 @@
-from flask import Blueprint, flash, redirect, render_template, request, session, url_for
+from flask import (
+    Blueprint,
+    abort,
+    current_app,
+    flash,
+    redirect,
+    render_template,
+    request,
+    send_from_directory,
+    session,
+    url_for,
+)
+from PIL import UnidentifiedImageError
 
 from app import db
 from app.blueprints.admin.forms import AdminProductForm
 from app.blueprints.admin.utils import save_product_image
 from app.models import Order, Product
+from app.services.profiler import list_captures, profiles_dir
 
 admin_bp = Blueprint("admin_panel", __name__)
 
@@ -15,6 +28,14 @@ def _require_admin():
     return None
 
 
+def _queue_image(product_id: int, image) -> None:
+    try:
+        if save_product_image(product_id, image):
+            flash("Image uploaded; resized versions will appear shortly.", "info")
+    except UnidentifiedImageError:
+        flash("The uploaded file is not a readable image.", "danger")
+
+
 @admin_bp.route("/dashboard")
 def dashboard():
     maybe_redirect = _require_admin()
@@ -40,10 +61,6 @@ def products():
     products = Product.query.order_by(Product.created_at.desc()).all()
 
     if form.validate_on_submit():
-        image_url = ""
-        if form.image.data:
-            image_url = save_product_image(form.image.data)
-
         product = Product(
             name=form.name.data,
             price_cents=form.price_cents,
@@ -51,11 +68,11 @@ def products():
             sku=form.sku.data,
             quantity=form.quantity.data or 0,
             is_active=bool(form.is_active.data),
-            image_url=image_url,
         )
         db.session.add(product)
         db.session.commit()
         flash("Product created.", "success")
+        _queue_image(product.id, form.image.data)
         return redirect(url_for("admin_panel.products"))
     elif request.method == "POST":
         flash("Please fix the errors in the form.", "danger")
@@ -73,6 +90,26 @@ def orders():
     return render_template("admin/orders.html", orders=orders)
 
 
+@admin_bp.route("/profiles")
+def profiles():
+    maybe_redirect = _require_admin()
+    if maybe_redirect:
+        return maybe_redirect
+
+    return render_template("admin/profiles.html", captures=list_captures(current_app))
+
+
+@admin_bp.route("/profiles/<path:filename>")
+def download_profile(filename: str):
+    maybe_redirect = _require_admin()
+    if maybe_redirect:
+        return maybe_redirect
+    if not filename.endswith((".collapsed", ".pstats")):
+        abort(404)
+
+    return send_from_directory(profiles_dir(current_app), filename, as_attachment=True)
+
+
 @admin_bp.route("/products/<int:product_id>/edit", methods=["GET", "POST"])
 def edit_product(product_id: int):
     maybe_redirect = _require_admin()
@@ -90,11 +127,9 @@ def edit_product(product_id: int):
         product.quantity = form.quantity.data or 0
         product.is_active = bool(form.is_active.data)
 
-        if form.image.data:
-            product.image_url = save_product_image(form.image.data)
-
         db.session.commit()
         flash("Product updated.", "success")
+        _queue_image(product.id, form.image.data)
         return redirect(url_for("admin_panel.products"))
     elif request.method == "POST":
         flash("Please fix the errors in the form.", "danger")
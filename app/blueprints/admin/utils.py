@@ -1,25 +1,16 @@
-import os
-import uuid
+from concurrent.futures import Future
+from typing import Optional
 
-from PIL import Image
-from flask import current_app
 from werkzeug.datastructures import FileStorage
 
+from app.services.images import queue_product_image
 
-def save_product_image(image: FileStorage) -> str:
+
+def save_product_image(product_id: int, image: FileStorage) -> Optional[Future]:
     """
-    Save and resize an uploaded image to static/images and return its URL path.
+    Queue an uploaded image for resizing; the product's ``images`` and
+    ``image_url`` are filled in once the variants have been written.
     """
     if not image or image.filename == "":
-        return ""
-
-    filename = f"{uuid.uuid4().hex}.jpg"
-    images_path = os.path.join(current_app.root_path, "static", "images")
-    os.makedirs(images_path, exist_ok=True)
-
-    filepath = os.path.join(images_path, filename)
-    img = Image.open(image.stream).convert("RGB")
-    img.thumbnail((1200, 1200))
-    img.save(filepath, format="JPEG", quality=85)
-
-    return f"/static/images/{filename}"
+        return None
+    return queue_product_image(product_id, image)
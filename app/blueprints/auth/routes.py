@@ -1,8 +1,10 @@
 from flask import Blueprint, flash, redirect, render_template, request, session, url_for
+from sqlalchemy.exc import IntegrityError
 
 from app.blueprints.auth.constants import USERS
 from app.blueprints.auth.forms import LoginForm
 from app.services.cart import CartService
+from app.services.users import get_user
 from app.models import User
 from app import db
 
@@ -23,12 +25,17 @@ def login():
         elif form.username in USERS and USERS[form.username]["password"] == form.password:
             session["username"] = form.username
 
-            user = User.by_username(form.username)
+            user = get_user(form.username)
             meta = USERS[form.username]
             if not user:
                 user = User(username=form.username, email=meta.get("email", ""), role=meta.get("role", "customer"), password_hash="seeded")
                 db.session.add(user)
-                db.session.commit()
+                try:
+                    db.session.commit()
+                except IntegrityError:
+                    # A concurrent first login created the account; use that one.
+                    db.session.rollback()
+                    user = User.by_username(form.username)
             else:
                 updated = False
                 if meta.get("email") and user.email != meta["email"]:
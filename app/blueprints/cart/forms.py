@@ -2,13 +2,15 @@ from flask_wtf import FlaskForm
 from wtforms import HiddenField, IntegerField, SubmitField
 from wtforms.validators import DataRequired, NumberRange
 
+from app.services.cart import MAX_QUANTITY
+
 
 class CartAddForm(FlaskForm):
-    quantity = IntegerField("Quantity", validators=[DataRequired(), NumberRange(min=1)], default=1)
+    quantity = IntegerField("Quantity", validators=[DataRequired(), NumberRange(min=1, max=MAX_QUANTITY)], default=1)
     submit = SubmitField("Add to cart")
 
 
 class CartUpdateForm(FlaskForm):
-    quantity = IntegerField("Quantity", validators=[DataRequired(), NumberRange(min=0)], default=1)
+    quantity = IntegerField("Quantity", validators=[DataRequired(), NumberRange(min=0, max=MAX_QUANTITY)], default=1)
     submit = SubmitField("Update")
     next = HiddenField()
@@ -2,6 +2,7 @@ from decimal import Decimal
 
 from flask import (
     Blueprint,
+    current_app,
     flash,
     jsonify,
     redirect,
@@ -13,7 +14,7 @@ from flask import (
 
 from app.blueprints.cart.forms import CartAddForm, CartUpdateForm
 from app.models import Product
-from app.services.cart import CartService
+from app.services.cart import CartService, InvalidBatchError, cart_summary
 
 cart_bp = Blueprint("cart", __name__)
 
@@ -28,26 +29,25 @@ def _cart_service() -> CartService:
 
 @cart_bp.app_context_processor
 def inject_cart_count():
-    service = _cart_service()
-    return {"cart_count": service.get_cart_count()}
+    return {"cart_count": cart_summary(_current_username()).count}
+
+
+def _cart_totals(subtotal: Decimal) -> dict:
+    tax = subtotal * Decimal("0.10")
+    shipping = Decimal("5.00") if subtotal > 0 else Decimal("0.00")
+    return {"subtotal": subtotal, "tax": tax, "shipping": shipping, "total": subtotal + tax + shipping}
 
 
 @cart_bp.route("/")
 def view_cart():
     service = _cart_service()
     items = service.get_cart_items()
-    subtotal = service.get_cart_total()
-    tax = subtotal * Decimal("0.10")
-    shipping = Decimal("5.00") if subtotal > 0 else Decimal("0.00")
-    total = subtotal + tax + shipping
+    totals = _cart_totals(service.get_cart_total(items))
 
     return render_template(
         "cart/index.html",
         items=items,
-        subtotal=subtotal,
-        tax=tax,
-        shipping=shipping,
-        total=total,
+        **totals,
         add_to_cart_form=CartAddForm(),
         update_form=CartUpdateForm(),
     )
@@ -147,6 +147,49 @@ def remove_item(product_id: int):
     return redirect(request.referrer or url_for("cart.view_cart"))
 
 
+@cart_bp.post("/batch")
+def batch():
+    """
+    Apply ``{"operations": [{"op": "update", "product_id": 1, "quantity": 2}, ...]}``
+    in one transaction and return the recomputed cart so the page can update
+    in place. A malformed operation rejects the whole batch with a 400.
+    """
+    payload = request.get_json(silent=True)
+    operations = payload.get("operations") if isinstance(payload, dict) else None
+    if not isinstance(operations, list):
+        return jsonify({"success": False, "message": "Expected a list of operations."}), 400
+
+    service = _cart_service()
+    try:
+        results = service.apply_batch(operations)
+    except InvalidBatchError as exc:
+        return jsonify({"success": False, "message": str(exc)}), 400
+    items = service.get_cart_items()
+    totals = _cart_totals(service.get_cart_total(items))
+    format_currency = current_app.jinja_env.filters["format_currency"]
+
+    return jsonify(
+        {
+            "success": all(result["success"] for result in results),
+            "results": results,
+            "items": [
+                {
+                    "product_id": item["product"].id,
+                    "name": item["product"].name,
+                    "quantity": item["quantity"],
+                    "price_cents": item["price_cents"],
+                    "line_total_cents": item["line_total_cents"],
+                    "price": format_currency(item["product"].price),
+                    "line_total": format_currency(item["line_total"]),
+                }
+                for item in items
+            ],
+            **{name: format_currency(value) for name, value in totals.items()},
+            "cart_count": sum(item["quantity"] for item in items),
+        }
+    )
+
+
 @cart_bp.post("/clear")
 def clear_cart():
     service = _cart_service()
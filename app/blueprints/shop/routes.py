@@ -3,18 +3,28 @@ from flask import Blueprint, render_template, request, abort, redirect, url_for
 from app.blueprints.cart.forms import CartAddForm
 from app.blueprints.shop.forms import ProductSearchForm
 from app.models import Category, Product
+from app.services import catalog
+from app.services.pagination import keyset_paginate
 
 shop_bp = Blueprint("shop", __name__)
 
 PER_PAGE = 12
 
+# Keyset ordering per sort mode; Product.id breaks ties so cursors are unique.
+SORT_KEYS = {
+    "newest": ((Product.created_at, True), (Product.id, True)),
+    "price_asc": ((Product.price_cents, False), (Product.id, False)),
+    "price_desc": ((Product.price_cents, True), (Product.id, True)),
+    "name": ((Product.name, False), (Product.id, False)),
+}
+
 
 @shop_bp.route("/")
 def index():
     page = request.args.get("page", 1, type=int)
-    sort = request.args.get("sort", "newest")
-    category_slug = request.args.get("category")
     search_form = ProductSearchForm.from_request(request)
+    sort = request.args.get("sort", "relevance" if search_form.query else "newest")
+    category_slug = request.args.get("category")
 
     query = Product.active()
 
@@ -23,23 +33,28 @@ def index():
         if category:
             query = query.filter_by(category_id=category.id)
 
-    if sort == "price_asc":
-        query = query.order_by(Product.price_cents.asc())
-    elif sort == "price_desc":
-        query = query.order_by(Product.price_cents.desc())
-    elif sort == "name":
-        query = query.order_by(Product.name.asc())
-    else:
-        query = query.order_by(Product.created_at.desc())
-
     if search_form.query:
-        query = query.filter(
-            Product.name.ilike(f"%{search_form.query}%")
-            | Product.description.ilike(f"%{search_form.query}%")
-        )
+        query = Product.search(search_form.query, query=query, ranked=sort == "relevance")
 
-    pagination = query.paginate(page=page, per_page=PER_PAGE, error_out=False)
-    products = pagination.items
+    # Cards only: skip the full description, the images list and the ORM.
+    query = catalog.card_query(query)
+
+    if search_form.query and sort == "relevance":
+        # bm25 rank has no stable key to resume from, so relevance stays offset-based.
+        pagination = query.order_by(Product.created_at.desc()).paginate(
+            page=page, per_page=PER_PAGE, error_out=False
+        )
+    else:
+        sort = sort if sort in SORT_KEYS else "newest"
+        pagination = keyset_paginate(
+            query,
+            SORT_KEYS[sort],
+            per_page=PER_PAGE,
+            scope=f"{sort}|{category_slug or ''}|{search_form.query}",
+            after=request.args.get("after"),
+            before=request.args.get("before"),
+        )
+    products = catalog.product_cards(pagination.items)
 
     return render_template(
         "shop/index.html",
@@ -48,28 +63,18 @@ def index():
         search_form=search_form,
         sort=sort,
         selected_category=category_slug,
-        categories=Category.query.order_by(Category.name.asc()).all(),
+        categories=catalog.all_categories(),
         add_to_cart_form=CartAddForm(),
     )
 
 
 @shop_bp.route("/product/<path:slug_or_id>")
 def product(slug_or_id: str):
-    product = Product.query.filter_by(slug=slug_or_id).first()
-    if not product and slug_or_id.isdigit():
-        product = Product.query.get(int(slug_or_id))
+    product = catalog.get_product(slug_or_id)
     if not product:
         abort(404)
 
-    related = []
-    if product.category_id:
-        related = (
-            Product.active()
-            .filter(Product.category_id == product.category_id, Product.id != product.id)
-            .order_by(Product.created_at.desc())
-            .limit(4)
-            .all()
-        )
+    related = catalog.related_products(product)
 
     return render_template(
         "shop/product.html",
@@ -0,0 +1,91 @@
+"""``flask`` CLI commands registered by ``create_app``."""
+
+import click
+from flask import current_app
+from flask.cli import AppGroup, with_appcontext
+
+outbox_cli = AppGroup("outbox", help="Deliver queued emails.")
+
+
+@outbox_cli.command("send")
+@click.option("--batch-size", type=int, default=None, help="Messages to send (default OUTBOX_BATCH_SIZE).")
+def outbox_send(batch_size):
+    """Send one batch of due emails and exit."""
+    from app.services.outbox import deliver_pending
+
+    stats = deliver_pending(batch_size)
+    click.echo("sent={sent} retried={retried} failed={failed} released={released}".format(**stats))
+
+
+@outbox_cli.command("worker")
+@click.option("--interval", type=float, default=None, help="Seconds to sleep when the outbox is empty.")
+def outbox_worker(interval):
+    """Poll the outbox and send due emails until interrupted."""
+    from app.services.outbox import run_worker
+
+    if interval is None:
+        interval = current_app.config.get("OUTBOX_POLL_INTERVAL", 5)
+    click.echo(f"Outbox worker polling every {interval}s (Ctrl+C to stop).")
+    try:
+        run_worker(interval=interval, log=click.echo)
+    except KeyboardInterrupt:
+        pass
+
+
+@click.command("db-upgrade")
+@click.option("--list", "list_only", is_flag=True, help="Show migration status without applying anything.")
+@click.option("--to", "target", type=int, default=None, help="Stop after this migration version.")
+@with_appcontext
+def db_upgrade(list_only, target):
+    """
+    Create missing tables, apply pending schema migrations and empty the
+    catalog cache, whose entries may predate the new code or schema.
+    """
+    from app import catalog_cache, db
+    from app.models.migrations import MIGRATIONS, applied_versions, ensure_schema, upgrade
+
+    if list_only:
+        applied = applied_versions(db.engine)
+        for m in MIGRATIONS:
+            status = f"applied {applied[m.version]}" if m.version in applied else "pending"
+            click.echo(f"{m.version:>4}  {m.name:<45} {status}")
+        return
+
+    if target is None:
+        done = ensure_schema(db.engine)
+    else:
+        db.create_all()
+        done = upgrade(db.engine, target=target)
+    catalog_cache.clear()
+    for m in done:
+        click.echo(f"Applied {m.version}: {m.name}")
+    if not done:
+        click.echo("Database is up to date.")
+
+
+@click.command("seed")
+@click.option("--categories", type=int, default=30, show_default=True)
+@click.option("--products", type=int, default=2000, show_default=True)
+@click.option("--users", type=int, default=1000, show_default=True)
+@click.option("--carts", type=int, default=200, show_default=True, help="Users given a cart.")
+@click.option("--orders", type=int, default=10000, show_default=True)
+@click.option("--reviews", type=int, default=5000, show_default=True)
+@click.option("--seed", "seed_value", type=int, default=42, show_default=True, help="RNG seed; same seed, same rows.")
+@click.option("--batch-size", type=int, default=20000, show_default=True, help="Rows per executemany.")
+@with_appcontext
+def seed(categories, products, users, carts, orders, reviews, seed_value, batch_size):
+    """Bulk-insert a reproducible synthetic dataset (on top of existing rows)."""
+    from app import catalog_cache, db
+    from app.models.migrations import ensure_schema
+    from app.services.seed import SeedCounts, seed_database
+
+    ensure_schema(db.engine)
+    counts = SeedCounts(categories, products, users, carts, orders, reviews)
+    seed_database(db.engine, counts, seed=seed_value, batch_size=batch_size, log=click.echo)
+    catalog_cache.clear()  # the bulk inserts bypass the ORM events that invalidate it
+
+
+def register_commands(app) -> None:
+    app.cli.add_command(outbox_cli)
+    app.cli.add_command(db_upgrade)
+    app.cli.add_command(seed)
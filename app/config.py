@@ -1,6 +1,9 @@
+import os
+
+
 class Config:
     SECRET_KEY = "looking-dapper"
-    SQLALCHEMY_DATABASE_URI = "sqlite:///users.sqlite3"
+    SQLALCHEMY_DATABASE_URI = os.environ.get("DATABASE_URL", "sqlite:///users.sqlite3")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     MAIL_SERVER = "localhost"
     MAIL_PORT = 25
@@ -9,3 +12,102 @@ class Config:
     MAIL_PASSWORD = None
     MAIL_DEFAULT_SENDER = ("QA Potions", "no-reply@example.com")
     MAIL_SUPPRESS_SEND = True
+    CATALOG_CACHE_BACKEND = "memory"  # "memory", "sqlite" (shared by workers) or "null"
+    CATALOG_CACHE_TTL = 300
+    CATALOG_CACHE_MAX_ENTRIES = 1024
+    CATALOG_CACHE_PATH = os.environ.get("CATALOG_CACHE_PATH")  # defaults to one file per database in instance/
+    FRAGMENT_CACHE_MAX_ENTRIES = 4096  # rendered product cards per worker; 0 disables
+    OUTBOX_BATCH_SIZE = 50  # messages sent per SMTP connection
+    OUTBOX_MAX_ATTEMPTS = 5
+    OUTBOX_RETRY_BASE_SECONDS = 30  # doubled after every failed attempt
+    OUTBOX_RETRY_MAX_SECONDS = 3600
+    OUTBOX_LEASE_SECONDS = 300  # a claimed batch is retried if its worker dies
+    OUTBOX_POLL_INTERVAL = 5
+    IMAGE_WORKERS = 2  # processes resizing product uploads
+    PRODUCT_IMAGE_DIR = None  # defaults to app/static/images
+
+    # Applied to every new SQLite connection (see app.models.pragmas).
+    SQLITE_PRAGMAS = {
+        "busy_timeout": 5000,  # ms to wait for the writer lock instead of failing
+        "journal_mode": "WAL",  # readers no longer block on (or block) the writer
+        "synchronous": "NORMAL",  # fsync at checkpoints, not on every commit; safe with WAL
+        "cache_size": -16000,  # negative = KiB, so ~16 MB of page cache per connection
+        "mmap_size": 134217728,  # 128 MB memory-mapped reads
+        "temp_store": "MEMORY",
+    }
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        "pool_size": 5,
+        "max_overflow": 10,
+        "pool_timeout": 10,
+    }
+
+    # Per-request query counting (see app.services.sql_stats).
+    SQL_INSTRUMENTATION = True
+    SQL_SERVER_TIMING = True
+    SQL_STRICT = False  # raise QueryBudgetExceeded instead of only logging
+    SQL_QUERY_BUDGET = None
+    SQL_QUERY_BUDGETS = {}  # endpoint -> max queries
+    SQL_REPEAT_THRESHOLD = 5  # the same statement this often in one request is an N+1
+    # Prometheus text at /metrics; with several worker processes also set the
+    # PROMETHEUS_MULTIPROC_DIR environment variable (see app.services.metrics).
+    METRICS_ENABLED = True
+    # Admins profile one request with ?_profile=1 (or the X-Profile header);
+    # ?_profile=cprofile saves pstats instead of sampled stacks.
+    PROFILER_ENABLED = True
+    PROFILER_HEADER = "X-Profile"
+    PROFILER_QUERY_ARG = "_profile"
+    PROFILER_INTERVAL = 0.001  # seconds between stack samples
+    PROFILER_DIR = None  # defaults to <instance>/profiles
+    PROFILER_KEEP = 50  # older captures are deleted
+
+
+class DevelopmentConfig(Config):
+    pass
+
+
+class ProductionConfig(Config):
+    SQLITE_PRAGMAS = {
+        **Config.SQLITE_PRAGMAS,
+        "cache_size": -64000,
+        "mmap_size": 536870912,
+    }
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        "pool_size": 10,
+        "max_overflow": 20,
+        "pool_timeout": 10,
+    }
+    CATALOG_CACHE_BACKEND = "sqlite"
+
+
+class TestingConfig(Config):
+    TESTING = True
+    WTF_CSRF_ENABLED = False
+    # Test databases are throwaway files: skip fsyncs entirely.
+    SQLITE_PRAGMAS = {**Config.SQLITE_PRAGMAS, "synchronous": "OFF"}
+    # Fail tests that introduce an N+1 or a query-heavy page.
+    SQL_STRICT = True
+    SQL_QUERY_BUDGET = 15
+
+
+class LegacyConfig(Config):
+    """SQLite defaults (rollback journal, synchronous=FULL); kept for benchmarking."""
+
+    SQLITE_PRAGMAS = {}
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+
+
+CONFIGS = {
+    "development": DevelopmentConfig,
+    "production": ProductionConfig,
+    "testing": TestingConfig,
+    "legacy": LegacyConfig,
+}
+
+
+def config_for(name=None):
+    """Resolve a profile name (default: the APP_CONFIG environment variable)."""
+    name = (name or os.environ.get("APP_CONFIG") or "development").lower()
+    try:
+        return CONFIGS[name]
+    except KeyError:
+        raise ValueError(f"Unknown APP_CONFIG {name!r}; expected one of {', '.join(CONFIGS)}.") from None
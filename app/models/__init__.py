@@ -5,11 +5,41 @@ from decimal import Decimal
 from typing import List, Optional
 
 from slugify import slugify
-from sqlalchemy import CheckConstraint, event, or_
+from sqlalchemy import CheckConstraint, event, inspect, or_
+from sqlalchemy.orm import object_session
 
-from app import bcrypt, db
+from app import bcrypt, catalog_cache, db
+from app.models import search as product_search
+from app.services.cache import category_keys, product_keys
 
 ORDER_STATUSES = ("pending", "processing", "shipped", "completed", "cancelled")
+OUTBOX_STATUSES = ("pending", "sent", "failed")
+# Product cards show at most this much of the description.
+CARD_DESCRIPTION_CHARS = 160
+
+
+def format_gold(cents: int) -> str:
+    """``1999`` -> ``"19.99 GLD"``, as the ``format_currency`` filter renders it."""
+    whole, fraction = divmod(abs(cents), 100)
+    return f"{'-' if cents < 0 else ''}{whole}.{fraction:02d} GLD"
+
+
+def card_snippet(text: Optional[str]) -> Optional[str]:
+    """``text`` cut to ``CARD_DESCRIPTION_CHARS`` at a word boundary."""
+    if not text or len(text) <= CARD_DESCRIPTION_CHARS:
+        return text
+    cut = text[:CARD_DESCRIPTION_CHARS].rsplit(" ", 1)[0]
+    return cut.rstrip(" ,.;:") + "…"
+
+
+def image_srcset(image: Optional[dict], fmt: str = "jpeg") -> str:
+    """``srcset`` value listing each distinct variant width of ``image`` once."""
+    if not image:
+        return ""
+    by_width = {}
+    for variant in image["variants"].values():
+        by_width.setdefault(variant["width"], variant[fmt])
+    return ", ".join(f"{url} {width}w" for width, url in sorted(by_width.items()))
 
 
 class User(db.Model):
@@ -43,6 +73,7 @@ class User(db.Model):
 
     @classmethod
     def by_username(cls, username: str) -> Optional["User"]:
+        # Matches the ix_users_username_lower expression index exactly.
         return cls.query.filter(db.func.lower(cls.username) == username.lower()).first()
 
     @classmethod
@@ -53,6 +84,12 @@ class User(db.Model):
         return f"<User {self.username} ({self.role})>"
 
 
+# Case-insensitive lookups compare lower(column); SQLite only uses an index
+# for that when the index is on the same expression.
+db.Index("ix_users_username_lower", db.func.lower(User.__table__.c.username))
+db.Index("ix_users_email_lower", db.func.lower(User.__table__.c.email))
+
+
 class Category(db.Model):
     __tablename__ = "categories"
     __table_args__ = (
@@ -91,6 +128,11 @@ class Product(db.Model):
         db.Index("ix_products_slug", "slug"),
         db.Index("ix_products_sku", "sku"),
         db.Index("ix_products_created_at", "created_at"),
+        db.Index("ix_products_category_id", "category_id"),
+        # shop.index filters on is_active (and category) and sorts by one of these.
+        db.Index("ix_products_active_category_created", "is_active", "category_id", "created_at"),
+        db.Index("ix_products_active_created", "is_active", "created_at"),
+        db.Index("ix_products_active_price", "is_active", "price_cents"),
     )
 
     id = db.Column(db.Integer, primary_key=True)
@@ -153,6 +195,31 @@ class Product(db.Model):
     def display_price(self) -> str:
         return f"{self.price_decimal:.2f} GLD"
 
+    @property
+    def display_discount(self) -> Optional[str]:
+        return format_gold(self.discount_cents) if self.discount_cents else None
+
+    @property
+    def card_description(self) -> Optional[str]:
+        return card_snippet(self.description)
+
+    @property
+    def primary_image(self) -> Optional[dict]:
+        """Variant descriptor written by the image pipeline (see ``app.services.images``)."""
+        for image in self.images or []:
+            if isinstance(image, dict):
+                return image
+        return None
+
+    def image_src(self, size: str = "detail", fmt: str = "jpeg") -> Optional[str]:
+        image = self.primary_image
+        if image and size in image["variants"]:
+            return image["variants"][size][fmt]
+        return self.image_url
+
+    def image_srcset(self, fmt: str = "jpeg") -> str:
+        return image_srcset(self.primary_image, fmt)
+
     @classmethod
     def active(cls):
         return cls.query.filter_by(is_active=True)
@@ -166,9 +233,25 @@ class Product(db.Model):
         return cls.query.filter_by(slug=slug_value).first()
 
     @classmethod
-    def search(cls, term: str):
+    def search(cls, term: str, query=None, ranked: bool = True):
+        """
+        Filter ``query`` (default: all products) to those matching ``term``.
+        Uses the FTS5 index with prefix matching when available, ordered by
+        bm25 relevance if ``ranked``; otherwise falls back to ``ILIKE``.
+        """
+        query = cls.query if query is None else query
+        match_query = product_search.build_match_query(term)
+        if match_query and product_search.is_enabled(db.engine):
+            fts = product_search.products_fts
+            query = query.join(fts, fts.c.rowid == cls.id).filter(
+                product_search.match_clause(match_query)
+            )
+            if ranked:
+                query = query.order_by(product_search.rank_expression())
+            return query
+
         ilike_term = f"%{term}%"
-        return cls.query.filter(
+        return query.filter(
             or_(cls.name.ilike(ilike_term), cls.description.ilike(ilike_term))
         )
 
@@ -185,6 +268,7 @@ class Order(db.Model):
         ),
         db.Index("ix_orders_status", "status"),
         db.Index("ix_orders_created_at", "created_at"),
+        db.Index("ix_orders_user_created", "user_id", "created_at"),
     )
 
     id = db.Column(db.Integer, primary_key=True)
@@ -259,6 +343,10 @@ class Order(db.Model):
 
 class OrderItem(db.Model):
     __tablename__ = "order_items"
+    __table_args__ = (
+        db.Index("ix_order_items_order_id", "order_id"),
+        db.Index("ix_order_items_product_id", "product_id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     order_id = db.Column(db.Integer, db.ForeignKey("orders.id"), nullable=False)
@@ -284,7 +372,12 @@ class OrderItem(db.Model):
 
 class CartItem(db.Model):
     __tablename__ = "cart_items"
-    __table_args__ = (db.Index("ix_cart_items_created_at", "created_at"),)
+    __table_args__ = (
+        db.Index("ix_cart_items_created_at", "created_at"),
+        # Also serves lookups by user_id alone (leftmost column).
+        db.Index("uq_cart_items_user_product", "user_id", "product_id", unique=True),
+        db.Index("ix_cart_items_product_id", "product_id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
@@ -305,7 +398,10 @@ class CartItem(db.Model):
 
 class Review(db.Model):
     __tablename__ = "reviews"
-    __table_args__ = (db.Index("ix_reviews_created_at", "created_at"),)
+    __table_args__ = (
+        db.Index("ix_reviews_created_at", "created_at"),
+        db.Index("ix_reviews_product_created", "product_id", "created_at"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     product_id = db.Column(db.Integer, db.ForeignKey("products.id"), nullable=False)
@@ -326,6 +422,38 @@ class Review(db.Model):
         return f"<Review product={self.product_id} rating={self.rating}>"
 
 
+class EmailOutbox(db.Model):
+    """Email queued in the same transaction as the change that triggers it."""
+
+    __tablename__ = "email_outbox"
+    __table_args__ = (
+        CheckConstraint("status IN ('pending','sent','failed')", name="ck_email_outbox_status_valid"),
+        db.Index("ix_email_outbox_due", "status", "next_attempt_at"),
+        db.Index("ix_email_outbox_claim_token", "claim_token"),
+        db.Index("ix_email_outbox_order_id", "order_id"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    subject = db.Column(db.String(255), nullable=False)
+    recipients = db.Column(db.JSON, nullable=False, default=list)
+    body = db.Column(db.Text, nullable=False, default="")
+    status = db.Column(db.String(20), nullable=False, default="pending")
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+    claim_token = db.Column(db.String(32))
+    last_error = db.Column(db.Text)
+    order_id = db.Column(db.Integer, db.ForeignKey("orders.id"))
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+    sent_at = db.Column(db.DateTime)
+
+    @classmethod
+    def pending(cls):
+        return cls.query.filter_by(status="pending")
+
+    def __repr__(self) -> str:
+        return f"<EmailOutbox {self.id} {self.status} attempts={self.attempts}>"
+
+
 def _ensure_product_slug(mapper, connection, target: Product) -> None:
     if target.name:
         target.slug = target.slug or slugify(target.name)
@@ -344,12 +472,49 @@ def _sync_order_item_total(mapper, connection, target: OrderItem) -> None:
     target.total_cents = target.line_total_cents
 
 
+def _index_product(mapper, connection, target: Product) -> None:
+    state = inspect(target)
+    if state.attrs.name.history.has_changes() or state.attrs.description.history.has_changes():
+        product_search.index_product(connection, target.id, target.name, target.description)
+
+
+def _unindex_product(mapper, connection, target: Product) -> None:
+    product_search.unindex_product(connection, target.id)
+
+
+def _invalidate_product_cache(mapper, connection, target: Product) -> None:
+    catalog_cache.invalidate(product_keys(target), session=object_session(target))
+
+
+def _invalidate_category_cache(mapper, connection, target: Category) -> None:
+    catalog_cache.invalidate(category_keys(connection, target), session=object_session(target))
+
+
+def _create_product_search_index(table, connection, **kw) -> None:
+    product_search.create_index(connection)
+
+
+def _drop_product_search_index(table, connection, **kw) -> None:
+    product_search.drop_index(connection)
+
+
 event.listen(Product, "before_insert", _ensure_product_slug)
 event.listen(Product, "before_update", _ensure_product_slug)
 event.listen(Category, "before_insert", _ensure_category_slug)
 event.listen(Category, "before_update", _ensure_category_slug)
 event.listen(OrderItem, "before_insert", _sync_order_item_total)
 event.listen(OrderItem, "before_update", _sync_order_item_total)
+event.listen(Product, "after_insert", _index_product)
+event.listen(Product, "after_update", _index_product)
+event.listen(Product, "after_delete", _unindex_product)
+event.listen(Product, "after_insert", _invalidate_product_cache)
+event.listen(Product, "before_update", _invalidate_product_cache)
+event.listen(Product, "after_delete", _invalidate_product_cache)
+event.listen(Category, "after_insert", _invalidate_category_cache)
+event.listen(Category, "before_update", _invalidate_category_cache)
+event.listen(Category, "after_delete", _invalidate_category_cache)
+event.listen(Product.__table__, "after_create", _create_product_search_index)
+event.listen(Product.__table__, "after_drop", _drop_product_search_index)
 
 
 __all__ = [
@@ -360,5 +525,11 @@ __all__ = [
     "OrderItem",
     "CartItem",
     "Review",
+    "EmailOutbox",
     "ORDER_STATUSES",
+    "OUTBOX_STATUSES",
+    "CARD_DESCRIPTION_CHARS",
+    "card_snippet",
+    "format_gold",
+    "image_srcset",
 ]
@@ -0,0 +1,163 @@
+"""
+Versioned schema migrations for existing databases.
+
+``db.create_all()`` creates missing tables but never alters existing ones, so
+indexes added to the models later would only ever reach fresh databases.
+Each migration here runs once, in its own transaction, and is recorded in
+``schema_migrations``. They are limited to changes SQLite can make in place
+(indexes, virtual tables, data fixes), so an upgrade never rebuilds a table
+and can be applied to the live database file.
+
+Index definitions stay on the models; a migration names the indexes it
+needs and ``create_indexes`` builds them from the metadata if missing.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from sqlalchemy import Index, inspect
+from sqlalchemy.schema import CreateIndex
+from sqlalchemy.engine import Connection, Engine
+
+from app import db
+from app.models import search as product_search
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    apply: Callable[[Connection], None]
+
+
+MIGRATIONS: List[Migration] = []
+
+
+def migration(version: int, name: str):
+    def register(fn: Callable[[Connection], None]):
+        MIGRATIONS.append(Migration(version, name, fn))
+        MIGRATIONS.sort(key=lambda m: m.version)
+        return fn
+
+    return register
+
+
+def _model_indexes() -> Dict[str, Index]:
+    return {index.name: index for table in db.metadata.tables.values() for index in table.indexes}
+
+
+def create_indexes(connection: Connection, *names: str) -> None:
+    indexes = _model_indexes()
+    for name in names:
+        # IF NOT EXISTS rather than checkfirst: reflection skips expression indexes.
+        connection.execute(CreateIndex(indexes[name], if_not_exists=True))
+
+
+@migration(1, "products full-text index")
+def _products_fts(connection: Connection) -> None:
+    if product_search.create_index(connection):
+        product_search.rebuild_index(connection)
+
+
+@migration(2, "one cart line per user and product")
+def _unique_cart_lines(connection: Connection) -> None:
+    # Fold duplicate lines into the oldest one before the unique index exists.
+    connection.exec_driver_sql(
+        "UPDATE cart_items SET quantity = ("
+        "SELECT SUM(d.quantity) FROM cart_items d "
+        "WHERE d.user_id = cart_items.user_id AND d.product_id = cart_items.product_id) "
+        "WHERE id IN (SELECT MIN(id) FROM cart_items GROUP BY user_id, product_id HAVING COUNT(*) > 1)"
+    )
+    connection.exec_driver_sql(
+        "DELETE FROM cart_items WHERE id NOT IN "
+        "(SELECT MIN(id) FROM cart_items GROUP BY user_id, product_id)"
+    )
+    create_indexes(connection, "uq_cart_items_user_product")
+
+
+@migration(3, "foreign key and shop listing indexes")
+def _lookup_indexes(connection: Connection) -> None:
+    create_indexes(
+        connection,
+        "ix_orders_user_created",
+        "ix_order_items_order_id",
+        "ix_order_items_product_id",
+        "ix_cart_items_product_id",
+        "ix_reviews_product_created",
+        "ix_products_category_id",
+        "ix_products_active_category_created",
+        "ix_products_active_created",
+        "ix_products_active_price",
+        "ix_email_outbox_order_id",
+    )
+    # Give the planner row counts so it picks between the new indexes.
+    connection.exec_driver_sql("ANALYZE")
+
+
+@migration(4, "case-insensitive user lookup indexes")
+def _user_lookup_indexes(connection: Connection) -> None:
+    create_indexes(connection, "ix_users_username_lower", "ix_users_email_lower")
+    connection.exec_driver_sql("ANALYZE users")
+
+
+def _ensure_version_table(connection: Connection) -> None:
+    connection.exec_driver_sql(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        "version INTEGER PRIMARY KEY, name VARCHAR(200) NOT NULL, applied_at DATETIME NOT NULL)"
+    )
+
+
+def applied_versions(engine: Engine) -> Dict[int, datetime]:
+    with engine.begin() as connection:
+        _ensure_version_table(connection)
+        rows = connection.exec_driver_sql("SELECT version, applied_at FROM schema_migrations").all()
+    return {version: applied_at for version, applied_at in rows}
+
+
+def pending(engine: Engine) -> List[Migration]:
+    applied = applied_versions(engine)
+    return [m for m in MIGRATIONS if m.version not in applied]
+
+
+def upgrade(engine: Engine, target: Optional[int] = None) -> List[Migration]:
+    """
+    Apply pending migrations up to ``target`` (default: all) and return the
+    ones that ran. Safe to call on every start-up; it is a no-op once the
+    database is current.
+    """
+    done = []
+    for m in pending(engine):
+        if target is not None and m.version > target:
+            break
+        with engine.begin() as connection:
+            m.apply(connection)
+            connection.exec_driver_sql(
+                "INSERT INTO schema_migrations (version, name, applied_at) VALUES (?, ?, ?)",
+                (m.version, m.name, datetime.now().isoformat(sep=" ")),
+            )
+        done.append(m)
+    return done
+
+
+def ensure_schema(engine: Engine) -> List[Migration]:
+    """
+    Create missing tables, then ``upgrade``. On a current database this is
+    two cheap catalog reads, so it can run on every start.
+    """
+    existing = set(inspect(engine).get_table_names())
+    if not existing.issuperset(db.metadata.tables):
+        db.metadata.create_all(engine)
+    return upgrade(engine)
+
+
+__all__ = [
+    "MIGRATIONS",
+    "Migration",
+    "applied_versions",
+    "create_indexes",
+    "ensure_schema",
+    "migration",
+    "pending",
+    "upgrade",
+]
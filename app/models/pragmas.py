@@ -0,0 +1,53 @@
+"""
+Per-connection SQLite tuning.
+
+PRAGMAs such as ``synchronous`` and ``cache_size`` only last for one
+connection, so they are applied from the engine ``connect`` event to every
+connection the pool opens. ``journal_mode=WAL`` is stored in the database
+file, but setting it again on each connection is cheap and makes sure a
+fresh file is switched over before its first write.
+"""
+
+from __future__ import annotations
+
+from typing import Mapping, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Applied in this order: busy_timeout first so that switching the journal
+# mode waits for a concurrent writer instead of failing with "locked".
+PRAGMA_ORDER = ("busy_timeout", "journal_mode", "synchronous", "cache_size", "mmap_size", "temp_store")
+
+
+def _ordered(pragmas: Mapping[str, object]):
+    known = [name for name in PRAGMA_ORDER if name in pragmas]
+    extra = sorted(name for name in pragmas if name not in PRAGMA_ORDER)
+    return [(name, pragmas[name]) for name in known + extra]
+
+
+def apply_pragmas(dbapi_connection, pragmas: Mapping[str, object]) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in _ordered(pragmas):
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+def install_pragmas(engine: Engine, pragmas: Optional[Mapping[str, object]]) -> None:
+    """Apply ``pragmas`` to every new connection of a SQLite ``engine``."""
+    if not pragmas or engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        apply_pragmas(dbapi_connection, pragmas)
+
+
+def current_pragmas(connection) -> dict:
+    """Read back the tuned PRAGMAs from a SQLAlchemy connection (for diagnostics)."""
+    return {name: connection.exec_driver_sql(f"PRAGMA {name}").scalar() for name in PRAGMA_ORDER}
+
+
+__all__ = ["PRAGMA_ORDER", "apply_pragmas", "current_pragmas", "install_pragmas"]
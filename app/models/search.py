@@ -0,0 +1,139 @@
+"""
+SQLite FTS5 index over product names and descriptions.
+
+The index is a standalone FTS5 table whose ``rowid`` mirrors ``products.id``.
+It is kept in sync by the Product mapper events registered in ``app.models``.
+On SQLite builds without FTS5 (or on other backends) the helpers here report
+the index as disabled and ``Product.search`` falls back to ``ILIKE`` matching.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Optional, Union
+from weakref import WeakKeyDictionary
+
+from sqlalchemy import column, func, literal_column, table
+from sqlalchemy.engine import Connection, Engine
+
+FTS_TABLE = "products_fts"
+
+# bm25() column weights: a hit in the name outranks one in the description.
+NAME_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+
+products_fts = table(FTS_TABLE, column("rowid"), column(FTS_TABLE))
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_enabled: "WeakKeyDictionary[Engine, bool]" = WeakKeyDictionary()
+
+
+def fts5_supported(connection: Connection) -> bool:
+    if connection.dialect.name != "sqlite":
+        return False
+    return bool(
+        connection.exec_driver_sql("SELECT sqlite_compileoption_used('ENABLE_FTS5')").scalar()
+    )
+
+
+def _index_exists(connection: Connection) -> bool:
+    if connection.dialect.name != "sqlite":
+        return False
+    row = connection.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (FTS_TABLE,)
+    ).first()
+    return row is not None
+
+
+def is_enabled(bind: Union[Engine, Connection]) -> bool:
+    """Return True when the FTS table exists on this engine (cached per engine)."""
+    engine = bind.engine
+    if engine not in _enabled:
+        if isinstance(bind, Connection):
+            _enabled[engine] = _index_exists(bind)
+        else:
+            with engine.connect() as connection:
+                _enabled[engine] = _index_exists(connection)
+    return _enabled[engine]
+
+
+def create_index(connection: Connection) -> bool:
+    """Create the FTS table if this SQLite build supports it; return True if created."""
+    if not fts5_supported(connection) or _index_exists(connection):
+        _enabled[connection.engine] = _index_exists(connection)
+        return False
+    connection.exec_driver_sql(
+        f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+        "name, description, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+    )
+    _enabled[connection.engine] = True
+    return True
+
+
+def drop_index(connection: Connection) -> None:
+    if connection.dialect.name == "sqlite":
+        connection.exec_driver_sql(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+    _enabled[connection.engine] = False
+
+
+def rebuild_index(connection: Connection) -> None:
+    """Repopulate the index from the products table."""
+    if not is_enabled(connection):
+        return
+    connection.exec_driver_sql(f"DELETE FROM {FTS_TABLE}")
+    connection.exec_driver_sql(
+        f"INSERT INTO {FTS_TABLE} (rowid, name, description) "
+        "SELECT id, name, coalesce(description, '') FROM products"
+    )
+
+
+def index_product(connection: Connection, product_id: int, name: str, description: Optional[str]) -> None:
+    if not is_enabled(connection):
+        return
+    connection.exec_driver_sql(f"DELETE FROM {FTS_TABLE} WHERE rowid = ?", (product_id,))
+    connection.exec_driver_sql(
+        f"INSERT INTO {FTS_TABLE} (rowid, name, description) VALUES (?, ?, ?)",
+        (product_id, name or "", description or ""),
+    )
+
+
+def unindex_product(connection: Connection, product_id: int) -> None:
+    if not is_enabled(connection):
+        return
+    connection.exec_driver_sql(f"DELETE FROM {FTS_TABLE} WHERE rowid = ?", (product_id,))
+
+
+def build_match_query(term: str) -> Optional[str]:
+    """
+    Turn free text into an FTS5 query where every word is a quoted prefix
+    term, e.g. ``heal pot`` -> ``"heal"* "pot"*``. Returns None when the term
+    has no searchable words.
+    """
+    tokens = _TOKEN_RE.findall(term or "")
+    if not tokens:
+        return None
+    return " ".join('"{}"*'.format(token.replace('"', '""')) for token in tokens)
+
+
+def match_clause(match_query: str):
+    return products_fts.c[FTS_TABLE].match(match_query)
+
+
+def rank_expression():
+    return func.bm25(literal_column(FTS_TABLE), NAME_WEIGHT, DESCRIPTION_WEIGHT)
+
+
+__all__ = [
+    "FTS_TABLE",
+    "products_fts",
+    "build_match_query",
+    "create_index",
+    "drop_index",
+    "fts5_supported",
+    "index_product",
+    "is_enabled",
+    "match_clause",
+    "rank_expression",
+    "rebuild_index",
+    "unindex_product",
+]
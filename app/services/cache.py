@@ -0,0 +1,290 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Iterable, Optional, Set
+
+from flask import Flask, current_app, has_app_context
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.services.metrics import CACHE_REQUESTS
+
+MISSING = object()
+
+
+class LRUCache:
+    """
+    Thread-safe in-process LRU with per-entry TTL. Each worker process holds
+    its own copy, so use it when the app runs as a single process.
+    """
+
+    def __init__(self, max_entries: int = 1024, default_ttl: Optional[float] = 300):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return MISSING
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                return MISSING
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.default_ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete_many(self, keys: Iterable[str]) -> None:
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+class SQLiteCache:
+    """
+    Cache stored in a local SQLite file so several worker processes on one
+    host share entries and, more importantly, invalidations. Values are
+    pickled; expired rows are purged lazily.
+    """
+
+    PURGE_EVERY = 200
+
+    def __init__(self, path: str, max_entries: int = 10000, default_ttl: Optional[float] = 300):
+        self.path = path
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._local = threading.local()
+        self._writes = 0
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_entries ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Any:
+        row = self._connect().execute(
+            "SELECT value, expires_at FROM cache_entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return MISSING
+        value, expires_at = row
+        if expires_at is not None and expires_at <= time.time():
+            return MISSING
+        return pickle.loads(value)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.default_ttl if ttl is None else ttl
+        expires_at = time.time() + ttl if ttl else None
+        conn = self._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache_entries (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), expires_at),
+        )
+        self._writes += 1
+        if self._writes % self.PURGE_EVERY == 0:
+            self._purge(conn)
+
+    def _purge(self, conn: sqlite3.Connection) -> None:
+        conn.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (time.time(),))
+        conn.execute(
+            "DELETE FROM cache_entries WHERE rowid NOT IN "
+            "(SELECT rowid FROM cache_entries ORDER BY rowid DESC LIMIT ?)",
+            (self.max_entries,),
+        )
+
+    def delete_many(self, keys: Iterable[str]) -> None:
+        keys = list(keys)
+        if keys:
+            placeholders = ",".join("?" for _ in keys)
+            self._connect().execute(f"DELETE FROM cache_entries WHERE key IN ({placeholders})", keys)
+
+    def clear(self) -> None:
+        self._connect().execute("DELETE FROM cache_entries")
+
+
+def product_key(product_id: int) -> str:
+    return f"product:{product_id}"
+
+
+def product_slug_key(slug: str) -> str:
+    return f"product-slug:{slug}"
+
+
+def related_key(category_id: int) -> str:
+    return f"related:{category_id}"
+
+
+CATEGORIES_KEY = "categories"
+
+
+class CatalogCache:
+    """
+    Read-through cache for catalog lookups, configured from
+    ``CATALOG_CACHE_BACKEND`` (``memory``, ``sqlite`` or ``null``).
+
+    Invalidation is driven by the Product/Category mapper events: keys are
+    dropped as soon as the flush writes the row, and again after the commit
+    so a concurrent reader cannot re-populate an entry with pre-commit data.
+    """
+
+    def __init__(self, app: Optional[Flask] = None):
+        self.hits = 0
+        self.misses = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask) -> None:
+        backend_name = app.config.get("CATALOG_CACHE_BACKEND", "memory")
+        ttl = app.config.get("CATALOG_CACHE_TTL", 300)
+        max_entries = app.config.get("CATALOG_CACHE_MAX_ENTRIES", 1024)
+        if backend_name == "sqlite":
+            # The file outlives the process and is shared by every worker, so
+            # give every database its own. It is emptied by ``flask db-upgrade``
+            # (run once per deploy by the gunicorn master), not here: workers
+            # are recycled all the time and must not wipe each other's entries.
+            database = str(app.config.get("SQLALCHEMY_DATABASE_URI"))
+            digest = hashlib.sha1(database.encode()).hexdigest()[:12]
+            path = app.config.get("CATALOG_CACHE_PATH") or os.path.join(
+                app.instance_path, f"catalog_cache-{digest}.sqlite3"
+            )
+            backend = SQLiteCache(path, max_entries=max_entries, default_ttl=ttl)
+        elif backend_name == "memory":
+            backend = LRUCache(max_entries=max_entries, default_ttl=ttl)
+        else:
+            backend = None
+        app.extensions["catalog_cache"] = backend
+
+    @property
+    def backend(self):
+        if not has_app_context():
+            return None
+        return current_app.extensions.get("catalog_cache")
+
+    def get_or_set(self, key: str, factory: Callable[[], Any], ttl: Optional[float] = None) -> Any:
+        """Return the cached value for ``key``; on a miss store ``factory()`` unless it is None."""
+        backend = self.backend
+        if backend is None:
+            return factory()
+        value = backend.get(key)
+        if value is not MISSING:
+            self.hits += 1
+            CACHE_REQUESTS.labels("hit").inc()
+            return value
+        self.misses += 1
+        CACHE_REQUESTS.labels("miss").inc()
+        value = factory()
+        if value is not None:
+            backend.set(key, value, ttl)
+        return value
+
+    def invalidate(self, keys: Iterable[str], session: Optional[Session] = None) -> None:
+        keys = set(keys)
+        backend = self.backend
+        if backend is None or not keys:
+            return
+        backend.delete_many(keys)
+        if session is not None:
+            session.info.setdefault("catalog_cache_keys", set()).update(keys)
+
+    def clear(self) -> None:
+        backend = self.backend
+        if backend is not None:
+            backend.clear()
+
+
+def _attr_values(target, name: str) -> Set[Any]:
+    """Current and pre-flush values of an attribute, without triggering loads."""
+    state = inspect(target)
+    values = set(state.attrs[name].history.deleted)
+    if name in state.dict:
+        values.add(state.dict[name])
+    values.discard(None)
+    return values
+
+
+def product_keys(target) -> Set[str]:
+    keys = {product_key(target.id)}
+    keys.update(product_slug_key(slug) for slug in _attr_values(target, "slug"))
+    keys.update(related_key(category_id) for category_id in _attr_values(target, "category_id"))
+    return keys
+
+
+def category_keys(connection, target) -> Set[str]:
+    # Cached products carry their category (breadcrumb name/slug), so a
+    # category change has to drop every product entry that embeds it.
+    product_ids = connection.exec_driver_sql(
+        "SELECT id FROM products WHERE category_id = ?", (target.id,)
+    ).scalars()
+    keys = {CATEGORIES_KEY, related_key(target.id)}
+    keys.update(product_key(product_id) for product_id in product_ids)
+    return keys
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session) -> None:
+    keys = session.info.pop("catalog_cache_keys", None)
+    if keys and has_app_context():
+        backend = current_app.extensions.get("catalog_cache")
+        if backend is not None:
+            backend.delete_many(keys)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _invalidate_after_rollback(session: Session, previous_transaction) -> None:
+    # Between the flush and the rollback this session could have cached the
+    # rows it was about to discard, so drop the keys again. A savepoint
+    # rollback keeps them for the enclosing transaction's commit.
+    keys = session.info.get("catalog_cache_keys")
+    if not previous_transaction.nested:
+        session.info.pop("catalog_cache_keys", None)
+    if keys and has_app_context():
+        backend = current_app.extensions.get("catalog_cache")
+        if backend is not None:
+            backend.delete_many(keys)
+
+
+__all__ = [
+    "CATEGORIES_KEY",
+    "CatalogCache",
+    "LRUCache",
+    "MISSING",
+    "SQLiteCache",
+    "category_keys",
+    "product_key",
+    "product_keys",
+    "product_slug_key",
+    "related_key",
+]
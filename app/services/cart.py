@@ -1,21 +1,156 @@
 from __future__ import annotations
 
+from datetime import datetime
 from decimal import Decimal
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
 
-from flask import session
+from flask import g, has_app_context, session
+from sqlalchemy import inspect
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import contains_eager
+from sqlalchemy.orm.util import identity_key
 
 from app import db
 from app.models import CartItem, Product, User
+from app.services.users import get_user
 
+_SUMMARY_G_KEY = "cart_summaries"
 
-def _get_or_create_user(username: str) -> User:
-    user = User.by_username(username)
-    if not user:
-        user = User(username=username, email=f"{username}@example.com", password_hash="!")
-        db.session.add(user)
-        db.session.commit()
-    return user
+
+class InvalidBatchError(ValueError):
+    """Raised by ``CartService.apply_batch`` for a malformed operation; nothing is applied."""
+
+
+# Ids are SQLite INTEGERs (signed 64-bit); anything larger overflows the
+# driver. No cart line legitimately holds more than MAX_QUANTITY units.
+MAX_ID = 2**63 - 1
+MAX_QUANTITY = 10_000
+
+
+def _as_int(value, minimum: int, maximum: int) -> Optional[int]:
+    """
+    ``value`` as an int if it is a whole number (or a string of one) within
+    ``minimum``..``maximum``, else None.
+    """
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    elif isinstance(value, str) and value.strip().lstrip("-").isdigit():
+        value = int(value)
+    if not isinstance(value, int) or not minimum <= value <= maximum:
+        return None
+    return value
+
+
+class CartSummary(NamedTuple):
+    count: int
+    total_cents: int
+
+    @property
+    def total(self) -> Decimal:
+        return Decimal(self.total_cents) / Decimal(100)
+
+
+def _summarize_db_cart(*criteria) -> CartSummary:
+    count, total_cents = (
+        db.session.query(
+            db.func.coalesce(db.func.sum(CartItem.quantity), 0),
+            db.func.coalesce(db.func.sum(CartItem.quantity * Product.price_cents), 0),
+        )
+        .join(Product, Product.id == CartItem.product_id)
+        .filter(*criteria)
+        .one()
+    )
+    return CartSummary(int(count), int(total_cents))
+
+
+def _summarize_session_cart(cart) -> CartSummary:
+    count = total_cents = 0
+    for entry in cart if isinstance(cart, list) else []:
+        quantity = int(entry.get("quantity", 0))
+        count += quantity
+        total_cents += quantity * int(entry.get("price_cents") or 0)
+    return CartSummary(count, total_cents)
+
+
+def cart_summary(username: Optional[str]) -> CartSummary:
+    """
+    Item count and total for the navbar badge. Guests are answered from the
+    session cart; signed-in users with one aggregate query, run at most once
+    per request (a CartService mutation discards the result).
+    """
+    if not username:
+        return _summarize_session_cart(session.get(CartService.session_key, []))
+
+    cache = g.setdefault(_SUMMARY_G_KEY, {}) if has_app_context() else {}
+    key = username.lower()
+    if key not in cache:
+        cache[key] = _summarize_db_cart(CartItem.user_id == User.id, db.func.lower(User.username) == key)
+    return cache[key]
+
+
+def load_products(product_ids: Iterable) -> Dict[int, Product]:
+    """
+    Fetch products by id with a single ``IN`` query. Rows already in the
+    request's session identity map are reused instead of being re-selected,
+    unless a commit has expired them.
+    """
+    wanted = set()
+    for product_id in product_ids:
+        try:
+            wanted.add(int(product_id))
+        except (TypeError, ValueError):
+            continue
+
+    products: Dict[int, Product] = {}
+    for product_id in wanted:
+        product = db.session.identity_map.get(identity_key(Product, product_id))
+        if product is not None and not inspect(product).expired_attributes:
+            products[product_id] = product
+
+    missing = wanted - products.keys()
+    if missing:
+        for product in Product.query.filter(Product.id.in_(missing)):
+            products[product.id] = product
+    return products
+
+
+def _cart_upsert():
+    """
+    ``INSERT ... SELECT ... ON CONFLICT DO UPDATE`` adding ``:quantity`` of
+    ``:product_id`` to ``:user_id``'s cart. The SELECT yields no row unless the
+    product is active with at least ``:quantity`` in stock, and the stored
+    quantity is clamped to stock, so concurrent adds can neither duplicate
+    the line nor lose an increment.
+    """
+    cart_items = CartItem.__table__
+    products = Product.__table__
+    quantity = db.bindparam("quantity", type_=db.Integer)
+    source = db.select(
+        db.bindparam("user_id", type_=db.Integer),
+        products.c.id,
+        db.func.min(quantity, products.c.quantity),
+        db.literal(datetime.now(), db.DateTime),
+    ).where(
+        products.c.id == db.bindparam("product_id", type_=db.Integer),
+        products.c.is_active == db.true(),
+        products.c.quantity >= quantity,
+    )
+    stmt = sqlite_insert(cart_items).from_select(
+        ["user_id", "product_id", "quantity", "created_at"], source
+    )
+    # Keyed on the bound product id: a subquery on ``excluded.product_id`` is
+    # not correlated and would read the stock of an arbitrary product.
+    stock = (
+        db.select(products.c.quantity)
+        .where(products.c.id == db.bindparam("product_id", type_=db.Integer))
+        .scalar_subquery()
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[cart_items.c.user_id, cart_items.c.product_id],
+        set_={"quantity": db.func.min(cart_items.c.quantity + stmt.excluded.quantity, stock)},
+    )
 
 
 class CartService:
@@ -26,7 +161,10 @@ class CartService:
     session_key = "cart"
 
     def __init__(self, username: Optional[str] = None):
-        self.user: Optional[User] = _get_or_create_user(username) if username else None
+        self.user: Optional[User] = get_user(username, create=True)
+        # Kept separately so statements after a commit don't reload the expired user row.
+        self.user_id: Optional[int] = self.user.id if self.user else None
+        self._in_batch = False
 
     def _session_cart(self) -> List[Dict]:
         cart = session.get(self.session_key, [])
@@ -37,76 +175,122 @@ class CartService:
     def _save_session_cart(self, cart: List[Dict]) -> None:
         session[self.session_key] = cart
 
-    def add_item(self, product_id: int, quantity: int) -> Tuple[bool, str]:
-        product = Product.query.get(product_id)
+    def _invalidate_summary(self) -> None:
+        if has_app_context():
+            g.pop(_SUMMARY_G_KEY, None)
+
+    def _commit(self) -> None:
+        """Commit a DB cart change, deferred to the end of ``apply_batch`` when batching."""
+        if not self._in_batch:
+            db.session.commit()
+            self._invalidate_summary()
+
+    def _db_rejection(self, product_id: int, quantity: int) -> Tuple[bool, str]:
+        """Explain why a conditional cart statement matched no row."""
+        product = db.session.get(Product, product_id)
         if not product or not product.is_active:
             return False, "Product not found."
+        if quantity > product.quantity:
+            return False, "Not enough stock available."
+        return False, "Item not in cart."
+
+    def add_item(self, product_id: int, quantity: int) -> Tuple[bool, str]:
+        if _as_int(product_id, 1, MAX_ID) is None:
+            return False, "Product not found."
+        quantity = _as_int(quantity or 0, -MAX_QUANTITY, MAX_QUANTITY)
+        if quantity is None:
+            return False, "Invalid quantity."
+        quantity = max(quantity, 1)
 
-        quantity = max(int(quantity or 0), 1)
+        if self.user:
+            result = db.session.execute(
+                _cart_upsert(), {"user_id": self.user_id, "product_id": product_id, "quantity": quantity}
+            )
+            self._commit()
+            if not result.rowcount:
+                return self._db_rejection(product_id, quantity)
+            return True, "Added to cart."
+
+        product = db.session.get(Product, product_id)
+        if not product or not product.is_active:
+            return False, "Product not found."
         if product.quantity is not None and quantity > product.quantity:
             return False, "Not enough stock available."
 
-        if self.user:
-            item = CartItem.query.filter_by(user_id=self.user.id, product_id=product_id).first()
-            if not item:
-                item = CartItem(user_id=self.user.id, product_id=product_id, quantity=0)
-                db.session.add(item)
-            new_qty = item.quantity + quantity
+        cart = self._session_cart()
+        existing = next((c for c in cart if c.get("product_id") == product_id), None)
+        if existing:
+            new_qty = existing.get("quantity", 0) + quantity
             if product.quantity is not None:
                 new_qty = min(new_qty, product.quantity)
-            item.quantity = new_qty
-            db.session.commit()
+            existing["quantity"] = new_qty
+            existing["price_cents"] = product.price_cents
         else:
-            cart = self._session_cart()
-            existing = next((c for c in cart if c.get("product_id") == product_id), None)
-            if existing:
-                new_qty = existing.get("quantity", 0) + quantity
-                if product.quantity is not None:
-                    new_qty = min(new_qty, product.quantity)
-                existing["quantity"] = new_qty
-                existing["price_cents"] = product.price_cents
-            else:
-                cart.append({"product_id": product_id, "quantity": quantity, "price_cents": product.price_cents})
-            self._save_session_cart(cart)
+            cart.append({"product_id": product_id, "quantity": quantity, "price_cents": product.price_cents})
+        self._save_session_cart(cart)
         return True, "Added to cart."
 
     def update_quantity(self, product_id: int, quantity: int) -> Tuple[bool, str]:
-        product = Product.query.get(product_id)
-        if not product or not product.is_active:
+        if _as_int(product_id, 1, MAX_ID) is None:
             return False, "Product not found."
-
-        quantity = max(int(quantity or 0), 0)
+        quantity = _as_int(quantity or 0, -MAX_QUANTITY, MAX_QUANTITY)
+        if quantity is None:
+            return False, "Invalid quantity."
+        quantity = max(quantity, 0)
         if quantity == 0:
             return self.remove_item(product_id)
 
+        if self.user:
+            # Only rewrites an existing row, and only while the product is
+            # active with enough stock; never creates a cart line.
+            result = db.session.execute(
+                db.update(CartItem.__table__)
+                .where(
+                    CartItem.__table__.c.user_id == self.user_id,
+                    CartItem.__table__.c.product_id == product_id,
+                    db.exists().where(
+                        Product.__table__.c.id == product_id,
+                        Product.__table__.c.is_active == db.true(),
+                        Product.__table__.c.quantity >= quantity,
+                    ),
+                )
+                .values(quantity=quantity)
+            )
+            self._commit()
+            if not result.rowcount:
+                return self._db_rejection(product_id, quantity)
+            return True, "Cart updated."
+
+        product = db.session.get(Product, product_id)
+        if not product or not product.is_active:
+            return False, "Product not found."
         if product.quantity is not None and quantity > product.quantity:
             return False, "Not enough stock available."
 
-        if self.user:
-            item = CartItem.query.filter_by(user_id=self.user.id, product_id=product_id).first()
-            if not item:
-                return False, "Item not in cart."
-            item.quantity = quantity
-            db.session.commit()
+        cart = self._session_cart()
+        for c in cart:
+            if c.get("product_id") == product_id:
+                c["quantity"] = quantity
+                c["price_cents"] = product.price_cents
+                break
         else:
-            cart = self._session_cart()
-            for c in cart:
-                if c.get("product_id") == product_id:
-                    c["quantity"] = quantity
-                    c["price_cents"] = product.price_cents
-                    break
-            else:
-                return False, "Item not in cart."
-            self._save_session_cart(cart)
+            return False, "Item not in cart."
+        self._save_session_cart(cart)
         return True, "Cart updated."
 
     def remove_item(self, product_id: int) -> Tuple[bool, str]:
+        if _as_int(product_id, 1, MAX_ID) is None:
+            return False, "Item not in cart."
         if self.user:
-            item = CartItem.query.filter_by(user_id=self.user.id, product_id=product_id).first()
-            if not item:
+            result = db.session.execute(
+                db.delete(CartItem.__table__).where(
+                    CartItem.__table__.c.user_id == self.user_id,
+                    CartItem.__table__.c.product_id == product_id,
+                )
+            )
+            self._commit()
+            if not result.rowcount:
                 return False, "Item not in cart."
-            db.session.delete(item)
-            db.session.commit()
         else:
             cart = [c for c in self._session_cart() if c.get("product_id") != product_id]
             self._save_session_cart(cart)
@@ -114,59 +298,111 @@ class CartService:
 
     def clear_cart(self) -> None:
         if self.user:
-            CartItem.query.filter_by(user_id=self.user.id).delete()
-            db.session.commit()
+            CartItem.query.filter_by(user_id=self.user_id).delete()
+            self._commit()
         else:
             session.pop(self.session_key, None)
 
+    BATCH_OPERATIONS = ("add", "update", "remove")
+
+    @classmethod
+    def _parse_batch(cls, operations: List) -> List[Tuple[str, int, int]]:
+        """Validate every operation up front, so a malformed one applies nothing."""
+        parsed: List[Tuple[str, int, int]] = []
+        for position, operation in enumerate(operations, start=1):
+            op = operation.get("op") if isinstance(operation, dict) else None
+            if op not in cls.BATCH_OPERATIONS:
+                raise InvalidBatchError(f"Operation {position}: unknown operation.")
+            product_id = _as_int(operation.get("product_id"), 1, MAX_ID)
+            if product_id is None:
+                raise InvalidBatchError(f"Operation {position}: invalid product.")
+            minimum = 1 if op == "add" else 0
+            quantity = 0 if op == "remove" else _as_int(operation.get("quantity"), minimum, MAX_QUANTITY)
+            if quantity is None:
+                raise InvalidBatchError(f"Operation {position}: invalid quantity.")
+            parsed.append((op, product_id, quantity))
+        return parsed
+
+    def apply_batch(self, operations: List) -> List[Dict]:
+        """
+        Apply ``{"op", "product_id", "quantity"}`` operations in order with a
+        single commit. A malformed operation raises ``InvalidBatchError``
+        before anything is applied; otherwise each operation reports its own
+        outcome, like the single-item methods, and a rejected one (e.g. not
+        enough stock) does not undo the others.
+        """
+        parsed = self._parse_batch(operations)
+        results: List[Dict] = []
+        self._in_batch = True
+        try:
+            for op, product_id, quantity in parsed:
+                if op == "add":
+                    success, message = self.add_item(product_id, quantity)
+                elif op == "update":
+                    success, message = self.update_quantity(product_id, quantity)
+                else:
+                    success, message = self.remove_item(product_id)
+                results.append(
+                    {"op": op, "product_id": product_id, "success": success, "message": message}
+                )
+        except Exception:
+            db.session.rollback()
+            raise
+        finally:
+            self._in_batch = False
+        if self.user:
+            db.session.commit()
+        self._invalidate_summary()
+        return results
+
+    @staticmethod
+    def _line(product: Product, quantity: int) -> Dict:
+        line_total_cents = (product.price_cents or 0) * quantity
+        return {
+            "product": product,
+            "quantity": quantity,
+            "price_cents": product.price_cents,
+            "line_total_cents": line_total_cents,
+            "line_total": Decimal(line_total_cents) / Decimal(100),
+        }
+
     def get_cart_items(self) -> List[Dict]:
-        items: List[Dict] = []
         if self.user:
             cart_items = (
                 CartItem.query.join(Product, Product.id == CartItem.product_id)
-                .filter(CartItem.user_id == self.user.id)
+                .options(contains_eager(CartItem.product))
+                .filter(CartItem.user_id == self.user_id)
                 .all()
             )
-            for ci in cart_items:
-                product = ci.product
-                line_total_cents = (product.price_cents or 0) * ci.quantity
-                items.append(
-                    {
-                        "product": product,
-                        "quantity": ci.quantity,
-                        "price_cents": product.price_cents,
-                        "line_total_cents": line_total_cents,
-                        "line_total": Decimal(line_total_cents) / Decimal(100),
-                    }
-                )
-        else:
-            for entry in self._session_cart():
-                product = Product.query.get(entry.get("product_id"))
-                if not product:
-                    continue
-                quantity = int(entry.get("quantity", 0))
-                line_total_cents = (product.price_cents or 0) * quantity
-                items.append(
-                    {
-                        "product": product,
-                        "quantity": quantity,
-                        "price_cents": product.price_cents,
-                        "line_total_cents": line_total_cents,
-                        "line_total": Decimal(line_total_cents) / Decimal(100),
-                    }
-                )
+            return [self._line(ci.product, ci.quantity) for ci in cart_items]
+
+        cart = self._session_cart()
+        products = load_products(entry.get("product_id") for entry in cart)
+        items: List[Dict] = []
+        for entry in cart:
+            product = products.get(entry.get("product_id"))
+            if not product:
+                continue
+            items.append(self._line(product, int(entry.get("quantity", 0))))
         return items
 
-    def get_cart_total(self) -> Decimal:
-        return sum((item["line_total"] for item in self.get_cart_items()), Decimal("0"))
+    def get_cart_total(self, items: Optional[List[Dict]] = None) -> Decimal:
+        items = self.get_cart_items() if items is None else items
+        return sum((item["line_total"] for item in items), Decimal("0"))
 
     def get_cart_count(self) -> int:
-        return sum((item["quantity"] for item in self.get_cart_items()), 0)
+        return self.get_cart_summary().count
+
+    def get_cart_summary(self) -> CartSummary:
+        if self.user:
+            return _summarize_db_cart(CartItem.user_id == self.user_id)
+        return _summarize_session_cart(self._session_cart())
 
     def merge_session_cart(self, session_cart) -> None:
         """
         Merge a guest cart (stored in session) into the user's cart.
         """
+        self._invalidate_summary()
         if not self.user or not session_cart:
             return
 
@@ -179,12 +415,21 @@ class CartService:
         else:
             return
 
+        rows: List[Dict] = []
         for entry in normalized:
-            if not isinstance(entry, dict):
+            if not isinstance(entry, dict) or entry.get("product_id") is None:
                 continue
-            product_id = entry.get("product_id")
-            quantity = entry.get("quantity", 0)
-            if product_id is None:
-                continue
-            self.add_item(int(product_id), int(quantity))
+            rows.append(
+                {
+                    "user_id": self.user_id,
+                    "product_id": int(entry["product_id"]),
+                    "quantity": max(int(entry.get("quantity") or 0), 1),
+                }
+            )
+
+        # One executemany of the add_item upsert, committed as a single
+        # transaction; entries for missing or understocked products are skipped.
+        if rows:
+            db.session.execute(_cart_upsert(), rows)
+        db.session.commit()
         session.pop(self.session_key, None)
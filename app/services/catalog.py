@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import pickle
+from typing import List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload
+
+from app import catalog_cache, db
+from app.models import CARD_DESCRIPTION_CHARS, Category, Product, card_snippet, format_gold, image_srcset
+from app.services.cache import CATEGORIES_KEY, product_key, product_slug_key, related_key
+
+RELATED_LIMIT = 4
+
+# What a listing card needs; the sort keys are included so keyset cursors can
+# be built from the rows. Only the start of the description is read (one
+# character more than a card shows, so the snippet knows it was cut) and only
+# the first entry of ``images``, where the image pipeline keeps its descriptor.
+CARD_COLUMNS = (
+    Product.id,
+    Product.name,
+    Product.slug,
+    Product.price_cents,
+    Product.compare_price_cents,
+    Product.quantity,
+    Product.image_url,
+    Product.created_at,
+    Product.updated_at,
+    func.substr(Product.description, 1, CARD_DESCRIPTION_CHARS + 1).label("description"),
+    Product.images[0].label("primary_image"),
+)
+
+
+class ProductCard:
+    """
+    A listing row shaped like the ``Product`` attributes ``product_card``
+    reads, with prices formatted once up front.
+    """
+
+    __slots__ = (
+        "id", "name", "slug", "card_description", "display_price", "display_discount",
+        "in_stock", "image_url", "primary_image", "updated_at",
+    )
+
+    def __init__(self, row):
+        self.id = row.id
+        self.name = row.name
+        self.slug = row.slug
+        self.card_description = card_snippet(row.description)
+        self.display_price = format_gold(row.price_cents)
+        discount = (row.compare_price_cents or 0) - row.price_cents
+        self.display_discount = format_gold(discount) if discount > 0 else None
+        self.in_stock = row.quantity > 0
+        self.image_url = row.image_url
+        self.primary_image = row.primary_image if isinstance(row.primary_image, dict) else None
+        self.updated_at = row.updated_at
+
+    def image_srcset(self, fmt: str = "jpeg") -> str:
+        return image_srcset(self.primary_image, fmt)
+
+    def __repr__(self) -> str:
+        return f"<ProductCard {self.id} {self.name}>"
+
+
+def card_query(query):
+    """``query`` over ``Product`` narrowed to ``CARD_COLUMNS``; wrap the rows with ``product_cards``."""
+    return query.with_entities(*CARD_COLUMNS)
+
+
+def product_cards(rows) -> List[ProductCard]:
+    return [ProductCard(row) for row in rows]
+
+
+def _freeze(instances) -> Optional[bytes]:
+    """Pickle loaded ORM instances so every reader gets its own detached copy."""
+    if instances is None:
+        return None
+    return pickle.dumps(instances, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _thaw(payload: Optional[bytes]):
+    """Attach cached instances to the current session without re-querying them."""
+    if payload is None:
+        return None
+    instances = pickle.loads(payload)
+    if isinstance(instances, list):
+        return [db.session.merge(instance, load=False) for instance in instances]
+    return db.session.merge(instances, load=False)
+
+
+def get_product(slug_or_id: str) -> Optional[Product]:
+    """Look a product up by slug, falling back to a numeric id."""
+    # 0 records "no product has this slug" so numeric URLs skip the slug query.
+    product_id = catalog_cache.get_or_set(
+        product_slug_key(slug_or_id),
+        lambda: db.session.query(Product.id).filter_by(slug=slug_or_id).scalar() or 0,
+    )
+    if not product_id and slug_or_id.isdigit():
+        product_id = int(slug_or_id)
+    if not product_id:
+        return None
+    return get_product_by_id(product_id)
+
+
+def get_product_by_id(product_id: int) -> Optional[Product]:
+    return _thaw(
+        catalog_cache.get_or_set(
+            product_key(product_id),
+            lambda: _freeze(
+                Product.query.options(joinedload(Product.category)).filter_by(id=product_id).first()
+            ),
+        )
+    )
+
+
+def related_products(product: Product) -> List[Product]:
+    """Newest active products sharing ``product``'s category, excluding itself."""
+    if not product.category_id:
+        return []
+    category_id = product.category_id
+    candidates = _thaw(
+        catalog_cache.get_or_set(
+            related_key(category_id),
+            lambda: _freeze(
+                Product.active()
+                .filter(Product.category_id == category_id)
+                .order_by(Product.created_at.desc())
+                .limit(RELATED_LIMIT + 1)
+                .all()
+            ),
+        )
+    )
+    return [candidate for candidate in candidates if candidate.id != product.id][:RELATED_LIMIT]
+
+
+def all_categories() -> List[Category]:
+    return _thaw(
+        catalog_cache.get_or_set(
+            CATEGORIES_KEY,
+            lambda: _freeze(Category.query.order_by(Category.name.asc()).all()),
+        )
+    )
+
+
+__all__ = [
+    "CARD_COLUMNS",
+    "ProductCard",
+    "all_categories",
+    "card_query",
+    "get_product",
+    "get_product_by_id",
+    "product_cards",
+    "related_products",
+]
@@ -0,0 +1,104 @@
+"""
+Cache for rendered template fragments.
+
+Wrap a block of template in ``{% cache name, key... %}`` to store its HTML::
+
+    {% cache "product_card", product.id, product.updated_at %}
+      ...
+    {% endcache %}
+
+The keys must change whenever the output would: a product card is keyed by
+the row's ``updated_at``, which every ORM and Core update of the row bumps,
+so stale entries are never served and simply age out of the LRU.
+
+The one per-user value inside a card is the CSRF token from
+``form.hidden_tag()``. Before a fragment is stored, the current request's
+token is swapped for a placeholder, and on every use the placeholder is
+swapped back for the token of the request being served.
+"""
+
+from __future__ import annotations
+
+from typing import Optional
+
+from flask import Flask, current_app, has_request_context
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+
+from app.services.cache import MISSING, LRUCache
+from app.services.metrics import FRAGMENT_CACHE_REQUESTS
+
+TOKEN_PLACEHOLDER = "\x00csrf-token\x00"
+
+
+def _csrf_token() -> Optional[str]:
+    if not (has_request_context() and current_app.config.get("WTF_CSRF_ENABLED", True)):
+        return None
+    from flask_wtf.csrf import generate_csrf
+
+    return generate_csrf()
+
+
+class FragmentCache:
+    """LRU of rendered fragments, configured by ``FRAGMENT_CACHE_MAX_ENTRIES`` (0 disables it)."""
+
+    def __init__(self, app: Optional[Flask] = None):
+        self.hits = 0
+        self.misses = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask) -> None:
+        max_entries = app.config.get("FRAGMENT_CACHE_MAX_ENTRIES", 4096)
+        # Keys are versioned, so entries need no TTL.
+        app.extensions["fragment_cache"] = LRUCache(max_entries, default_ttl=None) if max_entries else None
+        app.jinja_env.add_extension(FragmentCacheExtension)
+
+    def render(self, name: str, key_parts, render) -> str:
+        """Return the fragment cached under ``name`` and ``key_parts``, calling ``render()`` on a miss."""
+        backend = current_app.extensions.get("fragment_cache")
+        if backend is None:
+            return render()
+        key = f"fragment:{name}:" + ":".join(str(part) for part in key_parts)
+        token = _csrf_token()
+        html = backend.get(key)
+        if html is MISSING:
+            self.misses += 1
+            FRAGMENT_CACHE_REQUESTS.labels(name, "miss").inc()
+            html = str(render())
+            backend.set(key, html.replace(token, TOKEN_PLACEHOLDER) if token else html)
+            return html
+        self.hits += 1
+        FRAGMENT_CACHE_REQUESTS.labels(name, "hit").inc()
+        return html.replace(TOKEN_PLACEHOLDER, token) if token else html
+
+    def clear(self) -> None:
+        backend = current_app.extensions.get("fragment_cache")
+        if backend is not None:
+            backend.clear()
+
+
+fragment_cache = FragmentCache()
+
+
+class FragmentCacheExtension(Extension):
+    """``{% cache name, key... %}...{% endcache %}``, backed by ``fragment_cache``."""
+
+    tags = {"cache"}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        name = parser.parse_expression()
+        key_parts = []
+        while parser.stream.skip_if("comma"):
+            key_parts.append(parser.parse_expression())
+        body = parser.parse_statements(("name:endcache",), drop_needle=True)
+        call = self.call_method("_render", [name, nodes.List(key_parts)])
+        return nodes.CallBlock(call, [], [], body).set_lineno(lineno)
+
+    def _render(self, name: str, key_parts, caller) -> Markup:
+        return Markup(fragment_cache.render(name, key_parts, caller))
+
+
+__all__ = ["FragmentCache", "FragmentCacheExtension", "TOKEN_PLACEHOLDER", "fragment_cache"]
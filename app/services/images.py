@@ -0,0 +1,205 @@
+"""
+Product image pipeline.
+
+Uploads are resized into a few responsive sizes, each written as JPEG and
+WebP, by a process pool so the admin request only reads the upload and
+hashes it. Files are named after the SHA-256 of the uploaded bytes, so
+re-uploading the same picture reuses the files already on disk.
+
+The finished descriptor is stored as the first entry of ``Product.images``,
+replacing the previous upload and leaving the rest of the gallery alone::
+
+    {"hash": "3f2a...", "width": 1600, "height": 1200,
+     "variants": {"card": {"width": 480, "height": 360,
+                           "jpeg": "/static/images/3f2a...-card.jpg",
+                           "webp": "/static/images/3f2a...-card.webp"}, ...}}
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, Optional, Tuple
+
+from flask import Flask, current_app
+from PIL import Image, ImageOps
+from werkzeug.datastructures import FileStorage
+
+# name -> longest edge in pixels, smallest first.
+SIZES: Dict[str, int] = {"thumb": 160, "card": 480, "detail": 1200}
+FORMATS: Dict[str, Tuple[str, str, dict]] = {
+    # key -> (PIL format, file extension, save options)
+    "jpeg": ("JPEG", "jpg", {"quality": 85, "optimize": True, "progressive": True}),
+    "webp": ("WEBP", "webp", {"quality": 80, "method": 4}),
+}
+URL_PREFIX = "/static/images"
+ORIENTATION_TAG = 0x0112
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def images_dir(app: Flask) -> str:
+    return app.config.get("PRODUCT_IMAGE_DIR") or os.path.join(app.root_path, "static", "images")
+
+
+def variant_name(digest: str, size: str, fmt: str) -> str:
+    return f"{digest[:32]}-{size}.{FORMATS[fmt][1]}"
+
+
+def _descriptor(digest: str, width: int, height: int) -> dict:
+    """Describe every variant of a ``width`` x ``height`` original (no upscaling)."""
+    variants = {}
+    for size, edge in SIZES.items():
+        scale = min(1.0, edge / max(width, height))
+        variants[size] = {
+            "width": max(1, round(width * scale)),
+            "height": max(1, round(height * scale)),
+        }
+        for fmt in FORMATS:
+            variants[size][fmt] = f"{URL_PREFIX}/{variant_name(digest, size, fmt)}"
+    return {"hash": digest, "width": width, "height": height, "variants": variants}
+
+
+def render_variants(data: bytes, directory: str, digest: str) -> dict:
+    """
+    Decode ``data`` once and write every size/format pair into ``directory``.
+    Runs in a pool worker, so it only touches PIL and the filesystem.
+    """
+    os.makedirs(directory, exist_ok=True)
+    with Image.open(io.BytesIO(data)) as original:
+        image = ImageOps.exif_transpose(original).convert("RGB")
+    width, height = image.size
+    descriptor = _descriptor(digest, width, height)
+
+    # Resize largest first and derive each smaller size from the previous one.
+    current = image
+    for size in reversed(list(SIZES)):
+        spec = descriptor["variants"][size]
+        if current.size != (spec["width"], spec["height"]):
+            current = current.resize((spec["width"], spec["height"]), Image.LANCZOS)
+        for fmt, (pil_format, _, options) in FORMATS.items():
+            path = os.path.join(directory, variant_name(digest, size, fmt))
+            if os.path.exists(path):
+                continue
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            current.save(tmp_path, format=pil_format, **options)
+            os.replace(tmp_path, path)
+    return descriptor
+
+
+def _oriented_size(data: bytes) -> Tuple[int, int]:
+    """
+    Width and height after EXIF rotation, read from the header only. Raises
+    ``PIL.UnidentifiedImageError`` for uploads that are not images.
+    """
+    with Image.open(io.BytesIO(data)) as original:
+        width, height = original.size
+        if original.getexif().get(ORIENTATION_TAG) in (5, 6, 7, 8):  # rotated by 90 degrees
+            width, height = height, width
+    return width, height
+
+
+def _all_variants_exist(directory: str, digest: str) -> bool:
+    return all(
+        os.path.exists(os.path.join(directory, variant_name(digest, size, fmt)))
+        for size in SIZES
+        for fmt in FORMATS
+    )
+
+
+def _get_executor(app: Flask) -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=app.config.get("IMAGE_WORKERS", 2))
+        return _executor
+
+
+def _is_descriptor(image) -> bool:
+    return isinstance(image, dict) and "variants" in image
+
+
+def _record(app: Flask, product_id: int, descriptor: dict) -> None:
+    from app import db
+    from app.models import Product
+
+    with app.app_context():
+        try:
+            product = db.session.get(Product, product_id)
+            if product is None:
+                return
+            gallery = [
+                image
+                for image in product.images or []
+                if not (_is_descriptor(image) and image.get("hash") == descriptor["hash"])
+            ]
+            if gallery and _is_descriptor(gallery[0]):
+                gallery[0] = descriptor
+            else:
+                gallery.insert(0, descriptor)
+            product.images = gallery
+            product.image_url = descriptor["variants"]["detail"]["jpeg"]
+            db.session.commit()
+        finally:
+            db.session.remove()
+
+
+def queue_product_image(product_id: int, upload: FileStorage) -> Future:
+    """
+    Hand ``upload`` to the image pool and attach the result to the product
+    when it is ready. Returns a future that resolves to the descriptor once
+    the product row has been updated. Only the header is parsed here, so a
+    file that is not an image is still rejected inside the request.
+    """
+    app = current_app._get_current_object()
+    data = upload.read()
+    width, height = _oriented_size(data)
+    digest = hashlib.sha256(data).hexdigest()
+    directory = images_dir(app)
+    done: Future = Future()
+
+    def finish(descriptor: dict) -> None:
+        try:
+            _record(app, product_id, descriptor)
+        except Exception as exc:
+            done.set_exception(exc)
+        else:
+            done.set_result(descriptor)
+
+    if _all_variants_exist(directory, digest):
+        finish(_descriptor(digest, width, height))
+        return done
+
+    def on_rendered(future: Future) -> None:
+        exc = future.exception()
+        if exc is not None:
+            app.logger.error("Image processing failed for product %s: %r", product_id, exc)
+            done.set_exception(exc)
+        else:
+            finish(future.result())
+
+    _get_executor(app).submit(render_variants, data, directory, digest).add_done_callback(on_rendered)
+    return done
+
+
+def shutdown(wait: bool = True) -> None:
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=wait)
+            _executor = None
+
+
+__all__ = [
+    "FORMATS",
+    "SIZES",
+    "images_dir",
+    "queue_product_image",
+    "render_variants",
+    "shutdown",
+    "variant_name",
+]
@@ -0,0 +1,178 @@
+"""
+Prometheus metrics served at ``/metrics``.
+
+Metrics live at module level, the usual ``prometheus_client`` style, so
+services can bump them without reaching for the app. When the app runs as
+several worker processes, set ``PROMETHEUS_MULTIPROC_DIR`` to an empty,
+writable directory before the workers start. Each process then writes its
+samples there, and ``/metrics`` adds them up across every worker, whichever
+worker answers the scrape.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from typing import Optional
+
+from flask import Flask, Response, g, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+MULTIPROC_ENV = "PROMETHEUS_MULTIPROC_DIR"
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Time spent handling a request, by Flask endpoint.",
+    ["endpoint", "method"],
+)
+REQUESTS = Counter(
+    "http_requests_total",
+    "Requests handled, by Flask endpoint and status code.",
+    ["endpoint", "method", "status"],
+)
+IN_FLIGHT = Gauge(
+    "http_requests_in_progress",
+    "Requests currently being handled, by Flask endpoint.",
+    ["endpoint"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled database connection.",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10),
+)
+DB_POOL_IN_USE = Gauge(
+    "db_pool_connections_in_use",
+    "Database connections currently checked out of the pool.",
+    multiprocess_mode="livesum",
+)
+CACHE_REQUESTS = Counter(
+    "catalog_cache_requests_total",
+    "Catalog cache lookups by result.",
+    ["result"],
+)
+FRAGMENT_CACHE_REQUESTS = Counter(
+    "fragment_cache_requests_total",
+    "Rendered template fragment lookups by fragment and result.",
+    ["fragment", "result"],
+)
+ORDERS_CREATED = Counter("orders_created_total", "Orders placed successfully.")
+ORDER_REVENUE_CENTS = Counter("order_revenue_cents_total", "Sum of order totals, in cents.")
+CHECKOUT_FAILURES = Counter(
+    "checkout_failures_total",
+    "Checkouts that did not produce an order, by reason.",
+    ["reason"],
+)
+
+
+def _endpoint_label() -> str:
+    # Unmatched URLs share one label so scanners cannot blow up cardinality.
+    return request.endpoint or "unmatched"
+
+
+def _start_request() -> None:
+    g.metrics_started = time.perf_counter()
+    g.metrics_endpoint = _endpoint_label()
+    IN_FLIGHT.labels(g.metrics_endpoint).inc()
+
+
+def _record_status(response):
+    g.metrics_status = response.status_code
+    return response
+
+
+def _finish_request(exc: Optional[BaseException]) -> None:
+    started = g.pop("metrics_started", None)
+    if started is None:
+        return
+    endpoint = g.pop("metrics_endpoint")
+    status = g.pop("metrics_status", 500 if exc is not None else 200)
+    IN_FLIGHT.labels(endpoint).dec()
+    REQUEST_LATENCY.labels(endpoint, request.method).observe(time.perf_counter() - started)
+    REQUESTS.labels(endpoint, request.method, str(status)).inc()
+
+
+def instrument_pool(engine: Engine) -> None:
+    """Time pool checkouts and track connections in use for ``engine``."""
+    if getattr(engine, "_metrics_instrumented", False):
+        return
+    raw_connection = engine.raw_connection
+
+    # The pool has no "before checkout" event, so time the call every
+    # Connection makes to get its DBAPI connection (this includes opening a
+    # new one when the pool grows). Wrapping the engine rather than the pool
+    # survives engine.dispose() recreating the pool.
+    def timed_raw_connection():
+        started = time.perf_counter()
+        try:
+            return raw_connection()
+        finally:
+            DB_POOL_WAIT.observe(time.perf_counter() - started)
+
+    engine.raw_connection = timed_raw_connection
+    engine._metrics_instrumented = True
+    event.listen(engine, "checkout", lambda *args: DB_POOL_IN_USE.inc())
+    event.listen(engine, "checkin", lambda *args: DB_POOL_IN_USE.dec())
+
+
+def generate(multiproc_dir: Optional[str] = None) -> bytes:
+    """Render every metric in the Prometheus text format."""
+    multiproc_dir = multiproc_dir or os.environ.get(MULTIPROC_ENV)
+    if not multiproc_dir:
+        return generate_latest(REGISTRY)
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry, path=multiproc_dir)
+    return generate_latest(registry)
+
+
+def metrics_view():
+    return Response(generate(), mimetype=CONTENT_TYPE_LATEST)
+
+
+def mark_process_dead(pid: int) -> None:
+    """Drop a finished worker's live gauges; call from the process manager."""
+    if os.environ.get(MULTIPROC_ENV):
+        multiprocess.mark_process_dead(pid)
+
+
+def init_app(app: Flask) -> None:
+    if not app.config.get("METRICS_ENABLED", True):
+        return
+    from app import db
+
+    with app.app_context():
+        for engine in db.engines.values():
+            instrument_pool(engine)
+    app.before_request(_start_request)
+    app.after_request(_record_status)
+    app.teardown_request(_finish_request)
+    app.add_url_rule("/metrics", "metrics", metrics_view)
+
+
+__all__ = [
+    "CACHE_REQUESTS",
+    "CHECKOUT_FAILURES",
+    "DB_POOL_IN_USE",
+    "DB_POOL_WAIT",
+    "FRAGMENT_CACHE_REQUESTS",
+    "IN_FLIGHT",
+    "ORDERS_CREATED",
+    "ORDER_REVENUE_CENTS",
+    "REQUESTS",
+    "REQUEST_LATENCY",
+    "generate",
+    "init_app",
+    "instrument_pool",
+    "mark_process_dead",
+]
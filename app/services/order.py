@@ -5,10 +5,22 @@ from datetime import datetime, timedelta
 from decimal import Decimal
 from typing import Dict, List, Optional
 
-from app import db, mail
+from app import catalog_cache, db
 from app.models import Order, OrderItem, Product, User
+from app.services import outbox
+from app.services.metrics import CHECKOUT_FAILURES, ORDER_REVENUE_CENTS, ORDERS_CREATED
+from app.services.cache import product_keys
 from app.services.cart import CartService
-from flask_mail import Message
+from app.services.users import get_user
+
+
+class InsufficientStockError(ValueError):
+    """Raised by ``create_order`` with the cart lines whose stock could not be reserved."""
+
+    def __init__(self, lines: List[Dict]):
+        self.lines = lines
+        names = ", ".join(line["name"] for line in lines)
+        super().__init__(f"Insufficient stock for {names}.")
 
 
 def _get_or_create_user(email: str, username: Optional[str] = None) -> User:
@@ -16,7 +28,7 @@ def _get_or_create_user(email: str, username: Optional[str] = None) -> User:
     if user:
         return user
     if username:
-        user = User.by_username(username)
+        user = get_user(username)
         if user:
             return user
 
@@ -60,20 +72,53 @@ class OrderService:
     def _shipping_amount(self, method: str) -> Decimal:
         return self.SHIPPING_RATES.get(method or "standard", Decimal("5.00"))
 
+    @staticmethod
+    def reserve_stock(items: List[Dict]) -> List[Dict]:
+        """
+        Decrement stock for every cart line inside the current transaction
+        with ``UPDATE products SET quantity = quantity - :q WHERE id = :id AND
+        quantity >= :q``, so concurrent checkouts cannot oversell. Returns the
+        lines that could not be reserved; the caller must roll back if any.
+        """
+        products = Product.__table__
+        failed: List[Dict] = []
+        for item in sorted(items, key=lambda line: line["product"].id):
+            product: Product = item["product"]
+            qty = int(item["quantity"])
+            result = db.session.execute(
+                db.update(products)
+                .where(products.c.id == product.id, products.c.quantity >= qty)
+                .values(quantity=products.c.quantity - qty)
+            )
+            if not result.rowcount:
+                failed.append({"product_id": product.id, "name": product.name, "requested": qty})
+        return failed
+
     def create_order(self, form) -> Order:
         items = self.cart_service.get_cart_items()
         if not items:
+            CHECKOUT_FAILURES.labels("empty_cart").inc()
             raise ValueError("Cart is empty.")
 
         user = self._ensure_user()
 
+        failed = self.reserve_stock(items)
+        if failed:
+            db.session.rollback()
+            available = dict(
+                db.session.query(Product.id, Product.quantity).filter(
+                    Product.id.in_([line["product_id"] for line in failed])
+                )
+            )
+            for line in failed:
+                line["available"] = available.get(line["product_id"], 0)
+            CHECKOUT_FAILURES.labels("insufficient_stock").inc()
+            raise InsufficientStockError(failed)
+
         subtotal_cents = 0
         for item in items:
             product: Product = item["product"]
-            qty = int(item["quantity"])
-            if product.quantity is not None and qty > product.quantity:
-                raise ValueError(f"Insufficient stock for {product.name}.")
-            subtotal_cents += (product.price_cents or 0) * qty
+            subtotal_cents += (product.price_cents or 0) * int(item["quantity"])
 
         shipping_dec = self._shipping_amount(form.shipping_method.data)
         shipping_cents = int(shipping_dec * Decimal(100))
@@ -130,23 +175,28 @@ class OrderService:
                 total_cents=unit_price_cents * qty,
             )
             db.session.add(order_item)
-            if product.quantity is not None:
-                product.quantity = max(product.quantity - qty, 0)
 
+        # The reservation UPDATEs bypass the ORM, so neither the loaded rows
+        # nor the catalog cache know about the new stock levels yet.
+        keys = set()
+        for item in items:
+            keys.update(product_keys(item["product"]))
+            db.session.expire(item["product"], ["quantity"])
+        catalog_cache.invalidate(keys, session=db.session())
+        self._queue_confirmation_email(order)
         db.session.commit()
+        ORDERS_CREATED.inc()
+        ORDER_REVENUE_CENTS.inc(total_cents)
         self.cart_service.clear_cart()
         return order
 
-    def send_confirmation_email(self, order: Order) -> None:
-        try:
-            msg = Message(
-                subject=f"Order Confirmation {order.order_number}",
-                recipients=[self.user_email],
-                body=f"Thanks for your order {order.order_number}! Total: {Decimal(order.total_cents) / Decimal(100):.2f} GLD",
-            )
-            mail.send(msg)
-        except Exception:
-            pass
+    def _queue_confirmation_email(self, order: Order) -> None:
+        outbox.enqueue(
+            subject=f"Order Confirmation {order.order_number}",
+            recipients=[self.user_email],
+            body=f"Thanks for your order {order.order_number}! Total: {Decimal(order.total_cents) / Decimal(100):.2f} GLD",
+            order_id=order.id,
+        )
 
     @staticmethod
     def estimated_delivery(shipping_method: str) -> datetime:
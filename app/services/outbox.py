@@ -0,0 +1,155 @@
+"""
+Durable outbox for transactional email.
+
+Emails are written to the ``email_outbox`` table inside the same transaction
+as the change that triggers them (e.g. placing an order) and sent later by
+``flask outbox worker``, so a slow or unreachable SMTP server never holds up
+a request and a crash between commit and send cannot lose a message.
+"""
+
+from __future__ import annotations
+
+import smtplib
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from flask import current_app
+from flask_mail import Message
+
+from app import db, mail
+from app.models import EmailOutbox
+
+# The server turned down one message (a 4xx/5xx reply to MAIL, RCPT or DATA)
+# but the session is still usable, so the batch carries on.
+REFUSALS = (smtplib.SMTPRecipientsRefused, smtplib.SMTPResponseException)
+
+# Transport-level failures. A message whose send was under way is charged an
+# attempt (it may be what upset the server); the rest of the batch, or all of
+# it if the connection never opened, is put back untouched.
+# Every SMTPException is an OSError, so refusals must be caught before these.
+CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, OSError)
+
+
+def enqueue(subject: str, recipients: List[str], body: str, order_id: Optional[int] = None) -> EmailOutbox:
+    """
+    Add an email to the outbox in the current session. It is only persisted,
+    and therefore only ever sent, if the caller's transaction commits.
+    """
+    message = EmailOutbox(subject=subject, recipients=list(recipients), body=body, order_id=order_id)
+    db.session.add(message)
+    return message
+
+
+def _backoff(attempts: int) -> timedelta:
+    base = current_app.config.get("OUTBOX_RETRY_BASE_SECONDS", 30)
+    ceiling = current_app.config.get("OUTBOX_RETRY_MAX_SECONDS", 3600)
+    return timedelta(seconds=min(base * 2 ** max(attempts - 1, 0), ceiling))
+
+
+def claim_batch(limit: int) -> List[EmailOutbox]:
+    """
+    Lease up to ``limit`` due messages to this worker with one UPDATE, so
+    several workers can poll the same table without double-sending. If the
+    worker dies the lease simply runs out and the messages become due again.
+    """
+    now = datetime.now()
+    token = uuid.uuid4().hex
+    lease = now + timedelta(seconds=current_app.config.get("OUTBOX_LEASE_SECONDS", 300))
+    outbox = EmailOutbox.__table__
+    due = (
+        db.select(outbox.c.id)
+        .where(outbox.c.status == "pending", outbox.c.next_attempt_at <= now)
+        .order_by(outbox.c.next_attempt_at, outbox.c.id)
+        .limit(limit)
+    )
+    db.session.execute(
+        db.update(outbox)
+        .where(outbox.c.id.in_(due.scalar_subquery()))
+        .values(claim_token=token, next_attempt_at=lease)
+    )
+    db.session.commit()
+    return EmailOutbox.query.filter_by(claim_token=token).order_by(EmailOutbox.id).all()
+
+
+def _message(entry: EmailOutbox) -> Message:
+    return Message(subject=entry.subject, recipients=entry.recipients, body=entry.body)
+
+
+def _record_failure(entry: EmailOutbox, exc: Exception, max_attempts: int, stats: Dict[str, int]) -> None:
+    entry.attempts += 1
+    entry.last_error = repr(exc)[:1000]
+    entry.claim_token = None
+    if entry.attempts >= max_attempts:
+        entry.status = "failed"
+        stats["failed"] += 1
+    else:
+        entry.next_attempt_at = datetime.now() + _backoff(entry.attempts)
+        stats["retried"] += 1
+
+
+def deliver_pending(batch_size: Optional[int] = None) -> Dict[str, int]:
+    """
+    Send one claimed batch over a single SMTP connection. Failed messages are
+    retried with exponential backoff until ``OUTBOX_MAX_ATTEMPTS``, then
+    marked ``failed`` with the last error kept for inspection.
+    """
+    batch_size = batch_size or current_app.config.get("OUTBOX_BATCH_SIZE", 50)
+    max_attempts = current_app.config.get("OUTBOX_MAX_ATTEMPTS", 5)
+    stats = {"sent": 0, "retried": 0, "failed": 0, "released": 0}
+
+    remaining = claim_batch(batch_size)
+    if not remaining:
+        return stats
+
+    sending = None
+    try:
+        with mail.connect() as connection:
+            while remaining:
+                entry = sending = remaining[0]
+                try:
+                    connection.send(_message(entry))
+                except REFUSALS as exc:
+                    if getattr(exc, "smtp_code", None) == 421:  # server is closing the session
+                        raise
+                    _record_failure(entry, exc, max_attempts, stats)
+                except CONNECTION_ERRORS:
+                    raise
+                except Exception as exc:  # malformed address, unencodable message, ...
+                    _record_failure(entry, exc, max_attempts, stats)
+                else:
+                    entry.status = "sent"
+                    entry.sent_at = datetime.now()
+                    entry.attempts += 1
+                    entry.last_error = None
+                    entry.claim_token = None
+                    stats["sent"] += 1
+                remaining.pop(0)
+                sending = None
+    except CONNECTION_ERRORS as exc:
+        if sending is not None:
+            _record_failure(sending, exc, max_attempts, stats)
+            remaining.remove(sending)
+        retry_at = datetime.now() + _backoff(1)
+        for entry in remaining:
+            entry.claim_token = None
+            entry.next_attempt_at = retry_at
+            stats["released"] += 1
+    db.session.commit()
+    return stats
+
+
+def run_worker(interval: float = 5.0, once: bool = False, log=print) -> None:
+    """Poll the outbox until interrupted, draining full batches back to back."""
+    while True:
+        stats = deliver_pending()
+        if any(stats.values()):
+            log("outbox: sent={sent} retried={retried} failed={failed} released={released}".format(**stats))
+        if once:
+            return
+        if not any(stats.values()):
+            time.sleep(interval)
+
+
+__all__ = ["claim_batch", "deliver_pending", "enqueue", "run_worker"]
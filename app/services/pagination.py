@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from flask import current_app
+from itsdangerous import BadSignature, URLSafeSerializer
+from sqlalchemy import tuple_
+
+# (column, descending) pairs; the last entry must be a unique tie-breaker.
+OrderSpec = Sequence[Tuple[Any, bool]]
+
+
+class KeysetPagination:
+    """
+    Page of results addressed by opaque cursors instead of page numbers.
+    Mirrors the parts of Flask-SQLAlchemy's ``Pagination`` the templates use.
+    """
+
+    cursor_based = True
+
+    def __init__(
+        self,
+        items: List[Any],
+        per_page: int,
+        total: Optional[int],
+        next_cursor: Optional[str],
+        prev_cursor: Optional[str],
+    ):
+        self.items = items
+        self.per_page = per_page
+        self.total = total
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self) -> bool:
+        return self.prev_cursor is not None
+
+    @property
+    def pages(self) -> Optional[int]:
+        if self.total is None:
+            return None
+        return max((self.total + self.per_page - 1) // self.per_page, 1)
+
+
+def _serializer(scope: str) -> URLSafeSerializer:
+    return URLSafeSerializer(current_app.secret_key, salt=f"keyset:{scope}")
+
+
+def _dump_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _load_value(column, value: Any) -> Any:
+    if value is not None and column.type.python_type is datetime:
+        return datetime.fromisoformat(value)
+    return value
+
+
+def encode_cursor(scope: str, order_by: OrderSpec, row: Any, total: Optional[int]) -> str:
+    key = [_dump_value(getattr(row, column.key)) for column, _ in order_by]
+    return _serializer(scope).dumps({"k": key, "t": total})
+
+
+def decode_cursor(scope: str, order_by: OrderSpec, token: Optional[str]) -> Optional[dict]:
+    """Return the decoded cursor, or None when it is missing, tampered or stale."""
+    if not token:
+        return None
+    try:
+        data = _serializer(scope).loads(token)
+        key = data["k"]
+        if len(key) != len(order_by):
+            return None
+        data["k"] = [_load_value(column, value) for (column, _), value in zip(order_by, key)]
+    except (BadSignature, KeyError, TypeError, ValueError):
+        return None
+    return data
+
+
+def keyset_paginate(
+    query,
+    order_by: OrderSpec,
+    per_page: int,
+    scope: str,
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    with_total: bool = True,
+) -> KeysetPagination:
+    """
+    Fetch one page of ``query`` ordered by ``order_by`` starting after (or
+    ending before) a cursor. Every column in ``order_by`` must share one
+    direction so the position can be compared as a single row value.
+
+    The total is counted once on the first page and then carried inside the
+    cursors, so following pages run no ``COUNT(*)``. ``scope`` names the
+    listing (sort mode plus filters); cursors from another scope are ignored.
+    """
+    descending = order_by[0][1]
+    if any(desc != descending for _, desc in order_by):
+        raise ValueError("Keyset pagination needs a single sort direction.")
+
+    columns = [column for column, _ in order_by]
+    cursor = decode_cursor(scope, order_by, after)
+    backwards = False
+    if cursor is None:
+        cursor = decode_cursor(scope, order_by, before)
+        backwards = cursor is not None
+
+    if cursor is not None:
+        total = cursor.get("t")
+    else:
+        total = query.order_by(None).count() if with_total else None
+
+    if cursor is not None:
+        position = tuple_(*columns)
+        key = tuple_(*cursor["k"])
+        forward_is_less = descending != backwards
+        query = query.filter(position < key if forward_is_less else position > key)
+
+    reverse = descending != backwards
+    query = query.order_by(*[(c.desc() if reverse else c.asc()) for c in columns])
+    rows = query.limit(per_page + 1).all()
+    more = len(rows) > per_page
+    rows = rows[:per_page]
+    if backwards:
+        rows.reverse()
+
+    has_next = more if not backwards else True
+    has_prev = cursor is not None if not backwards else more
+
+    next_cursor = encode_cursor(scope, order_by, rows[-1], total) if rows and has_next else None
+    prev_cursor = encode_cursor(scope, order_by, rows[0], total) if rows and has_prev else None
+    return KeysetPagination(rows, per_page, total, next_cursor, prev_cursor)
+
+
+__all__ = ["KeysetPagination", "decode_cursor", "encode_cursor", "keyset_paginate"]
@@ -0,0 +1,209 @@
+"""
+On-demand profiling of single requests.
+
+An admin adds ``?_profile=1`` to a URL (or sends ``X-Profile: 1``) and that
+one request is profiled. Other values (``0``, empty, unknown modes) are
+ignored:
+
+``sample`` (default)
+    A background thread samples the request thread's Python stack every
+    ``PROFILER_INTERVAL`` seconds and writes the result as collapsed stacks
+    (``frame;frame;frame count``). Feed the file to ``flamegraph.pl`` or
+    open it in speedscope.
+``cprofile`` (``?_profile=cprofile``)
+    Deterministic ``cProfile`` run saved as ``.pstats`` (exact call counts,
+    higher overhead). Open it with ``python -m pstats`` or snakeviz.
+
+Each capture also gets a small JSON sidecar with its metadata, which the
+admin "Profiles" page lists. For every other request the hook only checks
+whether the flag is present.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from types import CodeType
+from typing import Dict, List, Optional
+
+from flask import Flask, current_app, g, request, session
+
+PROFILE_MODES = ("sample", "cprofile")
+# Flag values that ask for the default mode.
+_ENABLED = ("1", "true", "yes", "on")
+
+# code object -> "name (file:line)"; sys.path is only scanned once per function.
+_labels: Dict[CodeType, str] = {}
+
+
+class StackSampler:
+    """Wall-clock sampler for one thread, driven by a daemon thread."""
+
+    def __init__(self, thread_id: int, interval: float = 0.001):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            stack.reverse()
+            self.stacks[";".join(stack)] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    label = _labels.get(code)
+    if label is None:
+        filename = code.co_filename
+        for prefix in sys.path:
+            if prefix and filename.startswith(prefix):
+                filename = os.path.relpath(filename, prefix)
+                break
+        label = _labels[code] = f"{code.co_name} ({filename}:{code.co_firstlineno})"
+    return label
+
+
+def profiles_dir(app: Flask) -> str:
+    return app.config.get("PROFILER_DIR") or os.path.join(app.instance_path, "profiles")
+
+
+def _requested_mode() -> Optional[str]:
+    value = request.args.get(current_app.config.get("PROFILER_QUERY_ARG", "_profile"))
+    if value is None:
+        value = request.headers.get(current_app.config.get("PROFILER_HEADER", "X-Profile"))
+    value = (value or "").strip().lower()
+    if value in PROFILE_MODES:
+        return value
+    return "sample" if value in _ENABLED else None
+
+
+def _is_admin() -> bool:
+    # Same rule as the admin blueprint's _require_admin.
+    return session.get("username") == "admin"
+
+
+def _start_profile() -> None:
+    mode = _requested_mode()
+    if mode is None or not _is_admin():
+        return
+    endpoint = (request.endpoint or "unmatched").replace(".", "-")
+    capture_id = f"{datetime.now():%Y%m%d-%H%M%S-%f}-{endpoint}"
+    if mode == "cprofile":
+        profiler = cProfile.Profile()
+        profiler.enable()
+    else:
+        profiler = StackSampler(threading.get_ident(), current_app.config.get("PROFILER_INTERVAL", 0.001))
+        profiler.start()
+    g.profile = {"id": capture_id, "mode": mode, "profiler": profiler, "started": time.perf_counter()}
+
+
+def _attach_profile_id(response):
+    capture = g.get("profile")
+    if capture is not None:
+        capture["status"] = response.status_code
+        response.headers["X-Profile-Id"] = capture["id"]
+    return response
+
+
+def _finish_profile(exc: Optional[BaseException] = None) -> None:
+    # A teardown hook: unlike after_request it also runs when the view raises
+    # and the error propagates (debug, testing), so the profiler always stops.
+    capture = g.pop("profile", None)
+    if capture is None:
+        return
+    profiler = capture["profiler"]
+    duration = time.perf_counter() - capture["started"]
+    if capture["mode"] == "cprofile":
+        profiler.disable()
+    else:
+        profiler.stop()
+
+    directory = profiles_dir(current_app)
+    os.makedirs(directory, exist_ok=True)
+    capture_id = capture["id"]
+    if capture["mode"] == "cprofile":
+        filename = f"{capture_id}.pstats"
+        profiler.dump_stats(os.path.join(directory, filename))
+        samples = None
+    else:
+        filename = f"{capture_id}.collapsed"
+        with open(os.path.join(directory, filename), "w", encoding="utf-8") as fh:
+            fh.write(profiler.collapsed())
+        samples = profiler.samples
+    meta = {
+        "id": capture_id,
+        "file": filename,
+        "mode": capture["mode"],
+        "method": request.method,
+        "path": request.full_path.rstrip("?"),
+        "endpoint": request.endpoint,
+        "status": capture.get("status", 500),
+        "duration_ms": round(duration * 1000, 2),
+        "samples": samples,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+    }
+    with open(os.path.join(directory, f"{capture_id}.json"), "w", encoding="utf-8") as fh:
+        json.dump(meta, fh)
+    _prune(directory, current_app.config.get("PROFILER_KEEP", 50))
+
+
+def list_captures(app: Flask) -> List[Dict]:
+    """Capture metadata, newest first."""
+    directory = profiles_dir(app)
+    if not os.path.isdir(directory):
+        return []
+    captures = []
+    for name in sorted(os.listdir(directory), reverse=True):
+        if name.endswith(".json"):
+            with open(os.path.join(directory, name), encoding="utf-8") as fh:
+                captures.append(json.load(fh))
+    return captures
+
+
+def _prune(directory: str, keep: int) -> None:
+    sidecars = sorted(name for name in os.listdir(directory) if name.endswith(".json"))
+    for name in sidecars[: max(len(sidecars) - keep, 0)]:
+        capture_id = name[: -len(".json")]
+        for suffix in (".json", ".collapsed", ".pstats"):
+            try:
+                os.remove(os.path.join(directory, capture_id + suffix))
+            except FileNotFoundError:
+                pass
+
+
+def init_app(app: Flask) -> None:
+    if not app.config.get("PROFILER_ENABLED", True):
+        return
+    app.before_request(_start_profile)
+    app.after_request(_attach_profile_id)
+    app.teardown_request(_finish_profile)
+
+
+__all__ = ["PROFILE_MODES", "StackSampler", "init_app", "list_captures", "profiles_dir"]
@@ -0,0 +1,300 @@
+"""
+Synthetic catalog, customer and order data for benchmarks and load tests.
+
+Rows are generated in batches and written with Core ``executemany`` inserts,
+a few large transactions in all, with primary keys assigned here so child rows can
+reference their parents without reading anything back. Core inserts skip the
+ORM mapper events, so the work those listeners do per row is done here in
+bulk instead:
+
+* slugs come from ``slugify(name)``, exactly as ``_ensure_product_slug`` and
+  ``_ensure_category_slug`` would make them; names embed the row id, so the
+  slugs are unique without a lookup;
+* ``OrderItem.total_cents`` is ``quantity * unit_price_cents``, as
+  ``_sync_order_item_total`` would set it, and order subtotal, tax, shipping
+  and total follow ``OrderService``;
+* the product search index is rebuilt once and the catalog cache cleared
+  once at the end.
+
+The same ``seed`` always produces the same rows (dates are spread back from a
+fixed day, not from today), so benchmark databases are reproducible.
+"""
+
+from __future__ import annotations
+
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Callable, Dict, Iterator, List, Optional
+
+from slugify import slugify
+from sqlalchemy import Table, func, select
+from sqlalchemy.engine import Connection, Engine
+
+SEED_EPOCH = datetime(2025, 1, 1)
+HISTORY_DAYS = 730
+
+_ADJECTIVES = (
+    "Ancient", "Bubbling", "Celestial", "Dragon", "Elder", "Fizzing", "Gilded", "Hollow",
+    "Iron", "Jade", "Lunar", "Misty", "Nightshade", "Obsidian", "Phoenix", "Runic",
+    "Silver", "Thorned", "Umbral", "Verdant", "Whispering", "Zephyr",
+)
+_NOUNS = (
+    "Elixir", "Tonic", "Philter", "Draught", "Salve", "Tincture", "Amulet", "Talisman",
+    "Wand", "Grimoire", "Cauldron", "Crystal", "Scroll", "Charm", "Rune", "Totem",
+)
+_CATEGORY_WORDS = (
+    "Potions", "Herbs", "Artifacts", "Tomes", "Wands", "Crystals", "Charms", "Cauldrons",
+    "Scrolls", "Relics", "Oils", "Powders", "Candles", "Mirrors", "Familiars",
+)
+_COUNTRIES = (("US", "CA"), ("US", "NY"), ("US", "TX"), ("ES", "MD"), ("GB", ""), ("DE", ""))
+_STATUS_WEIGHTS = {"completed": 55, "shipped": 20, "processing": 10, "pending": 10, "cancelled": 5}
+_REVIEW_RATINGS = (1, 2, 3, 4, 5)
+_REVIEW_WEIGHTS = (4, 6, 15, 35, 40)
+
+
+@dataclass
+class SeedCounts:
+    categories: int = 30
+    products: int = 2000
+    users: int = 1000
+    carts: int = 200
+    orders: int = 10000
+    reviews: int = 5000
+
+
+class Seeder:
+    def __init__(
+        self,
+        engine: Engine,
+        seed: int = 42,
+        batch_size: int = 20000,
+        log: Callable[[str], None] = print,
+    ):
+        from app import db
+
+        self.engine = engine
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.log = log
+        self.tables: Dict[str, Table] = db.metadata.tables
+
+    # -- helpers -----------------------------------------------------------
+
+    def _next_id(self, connection: Connection, table: str) -> int:
+        return (connection.execute(select(func.max(self.tables[table].c.id))).scalar() or 0) + 1
+
+    def _when(self) -> datetime:
+        return SEED_EPOCH - timedelta(seconds=self.rng.randrange(HISTORY_DAYS * 86400))
+
+    def _insert(self, connection: Connection, table: str, rows: Iterator[dict]) -> int:
+        started = time.perf_counter()
+        total = 0
+        batch: List[dict] = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                connection.execute(self.tables[table].insert(), batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            connection.execute(self.tables[table].insert(), batch)
+            total += len(batch)
+        elapsed = time.perf_counter() - started
+        self.log(f"{table:<12} {total:>10,} rows in {elapsed:6.1f}s")
+        return total
+
+    # -- tables ------------------------------------------------------------
+
+    def categories(self, connection: Connection, count: int) -> List[int]:
+        first = self._next_id(connection, "categories")
+        ids = list(range(first, first + count))
+        roots = max(1, count // 5)
+
+        def rows():
+            for n, category_id in enumerate(ids):
+                name = f"{_CATEGORY_WORDS[n % len(_CATEGORY_WORDS)]} {category_id}"
+                yield {
+                    "id": category_id,
+                    "name": name,
+                    "slug": slugify(name),
+                    "parent_id": None if n < roots else self.rng.choice(ids[:n]),
+                    "description": f"Everything in {name}.",
+                    "created_at": self._when(),
+                }
+
+        self._insert(connection, "categories", rows())
+        return ids
+
+    def products(self, connection: Connection, count: int, category_ids: List[int]) -> Dict[int, int]:
+        """Insert products; return {product_id: price_cents} for order lines."""
+        first = self._next_id(connection, "products")
+        prices: Dict[int, int] = {}
+
+        def rows():
+            for product_id in range(first, first + count):
+                name = f"{self.rng.choice(_ADJECTIVES)} {self.rng.choice(_NOUNS)} {product_id}"
+                price = self.rng.randrange(199, 25000)
+                prices[product_id] = price
+                created = self._when()
+                yield {
+                    "id": product_id,
+                    "name": name,
+                    "slug": slugify(name),
+                    "description": f"A {name.lower()} from the synthetic catalog.",
+                    "price_cents": price,
+                    "compare_price_cents": price + self.rng.randrange(100, 5000) if self.rng.random() < 0.2 else None,
+                    "sku": f"SEED-{product_id:08d}",
+                    "quantity": self.rng.randrange(0, 500),
+                    "category_id": self.rng.choice(category_ids) if category_ids else None,
+                    "images": [],
+                    "is_active": self.rng.random() < 0.95,
+                    "is_featured": self.rng.random() < 0.03,
+                    "created_at": created,
+                    "updated_at": created,
+                }
+
+        self._insert(connection, "products", rows())
+        return prices
+
+    def users(self, connection: Connection, count: int) -> List[int]:
+        first = self._next_id(connection, "users")
+        ids = list(range(first, first + count))
+
+        def rows():
+            for user_id in ids:
+                yield {
+                    "id": user_id,
+                    "username": f"user{user_id}",
+                    "email": f"user{user_id}@example.com",
+                    "password_hash": "seeded",  # same marker as accounts created at login
+                    "role": "customer",
+                    "created_at": self._when(),
+                }
+
+        self._insert(connection, "users", rows())
+        return ids
+
+    def carts(self, connection: Connection, count: int, user_ids: List[int], product_ids: List[int]) -> None:
+        owners = self.rng.sample(user_ids, min(count, len(user_ids)))
+
+        def rows():
+            for user_id in owners:
+                # One line per (user, product), as uq_cart_items_user_product requires.
+                for product_id in self.rng.sample(product_ids, min(self.rng.randint(1, 4), len(product_ids))):
+                    yield {
+                        "user_id": user_id,
+                        "product_id": product_id,
+                        "quantity": self.rng.randint(1, 3),
+                        "created_at": self._when(),
+                    }
+
+        self._insert(connection, "cart_items", rows())
+
+    def orders(self, connection: Connection, count: int, user_ids: List[int], prices: Dict[int, int]) -> None:
+        from app.services.order import OrderService
+
+        first = self._next_id(connection, "orders")
+        product_ids = list(prices)
+        statuses = list(_STATUS_WEIGHTS)
+        weights = list(_STATUS_WEIGHTS.values())
+        shipping = {method: int(rate * 100) for method, rate in OrderService.SHIPPING_RATES.items()}
+        tax_rates = {place: OrderService.tax_rate(*place) for place in _COUNTRIES}
+        orders_table, items_table = self.tables["orders"], self.tables["order_items"]
+        started = time.perf_counter()
+        item_count = 0
+        # Built a batch at a time, orders before their lines, so memory stays flat.
+        for batch_start in range(first, first + count, self.batch_size):
+            orders: List[dict] = []
+            items: List[dict] = []
+            for order_id in range(batch_start, min(batch_start + self.batch_size, first + count)):
+                subtotal = 0
+                for product_id in self.rng.sample(product_ids, min(self.rng.randint(1, 4), len(product_ids))):
+                    quantity = self.rng.randint(1, 3)
+                    unit_price = prices[product_id]
+                    subtotal += quantity * unit_price
+                    items.append(
+                        {
+                            "order_id": order_id,
+                            "product_id": product_id,
+                            "quantity": quantity,
+                            "unit_price_cents": unit_price,
+                            "total_cents": quantity * unit_price,
+                        }
+                    )
+                place = self.rng.choice(_COUNTRIES)
+                method = "express" if self.rng.random() < 0.2 else "standard"
+                tax = int((Decimal(subtotal) * tax_rates[place]).quantize(Decimal("1")))
+                status = self.rng.choices(statuses, weights)[0]
+                created = self._when()
+                address = {"country": place[0], "state": place[1], "shipping_method": method}
+                orders.append(
+                    {
+                        "id": order_id,
+                        "order_number": f"ORD-{created:%Y%m%d}-S{order_id}",
+                        "user_id": self.rng.choice(user_ids),
+                        "status": status,
+                        "subtotal_cents": subtotal,
+                        "tax_cents": tax,
+                        "shipping_cents": shipping[method],
+                        "total_cents": subtotal + tax + shipping[method],
+                        "shipping_address": address,
+                        "billing_address": address,
+                        "payment_method": "card",
+                        "payment_status": "pending" if status in ("pending", "cancelled") else "paid",
+                        "created_at": created,
+                    }
+                )
+            connection.execute(orders_table.insert(), orders)
+            connection.execute(items_table.insert(), items)
+            item_count += len(items)
+        elapsed = time.perf_counter() - started
+        self.log(f"{'orders':<12} {count:>10,} rows, {item_count:,} order_items in {elapsed:6.1f}s")
+
+    def reviews(self, connection: Connection, count: int, user_ids: List[int], product_ids: List[int]) -> None:
+        def rows():
+            for _ in range(count):
+                rating = self.rng.choices(_REVIEW_RATINGS, _REVIEW_WEIGHTS)[0]
+                yield {
+                    "product_id": self.rng.choice(product_ids),
+                    "user_id": self.rng.choice(user_ids),
+                    "rating": rating,
+                    "title": f"{rating} stars",
+                    "body": "Synthetic review.",
+                    "created_at": self._when(),
+                }
+
+        self._insert(connection, "reviews", rows())
+
+    # -- entry point -------------------------------------------------------
+
+    def run(self, counts: SeedCounts) -> None:
+        from app import catalog_cache
+        from app.models import search as product_search
+
+        with self.engine.begin() as connection:
+            category_ids = self.categories(connection, counts.categories)
+            prices = self.products(connection, counts.products, category_ids)
+            user_ids = self.users(connection, counts.users)
+        product_ids = list(prices)
+        if not (product_ids and user_ids):
+            return
+        with self.engine.begin() as connection:
+            self.carts(connection, counts.carts, user_ids, product_ids)
+        with self.engine.begin() as connection:
+            self.orders(connection, counts.orders, user_ids, prices)
+        with self.engine.begin() as connection:
+            self.reviews(connection, counts.reviews, user_ids, product_ids)
+        with self.engine.begin() as connection:
+            product_search.rebuild_index(connection)
+            connection.exec_driver_sql("ANALYZE")
+        catalog_cache.clear()
+
+
+def seed_database(engine: Engine, counts: Optional[SeedCounts] = None, seed: int = 42, **kwargs) -> None:
+    Seeder(engine, seed=seed, **kwargs).run(counts or SeedCounts())
+
+
+__all__ = ["SEED_EPOCH", "SeedCounts", "Seeder", "seed_database"]
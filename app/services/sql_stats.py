@@ -0,0 +1,184 @@
+"""
+Per-request SQL instrumentation.
+
+Every statement executed while a request is being handled is counted, timed
+and fingerprinted (literals and ``IN`` lists collapsed), so lazy loads that
+run once per row show up as one fingerprint repeated many times. The totals
+are reported in a ``Server-Timing`` header and a debug log line. In strict
+mode (``SQL_STRICT``) a request that goes over its query budget or repeats a
+statement too often raises ``QueryBudgetExceeded``. Tests run with
+``TESTING`` set, so the error propagates to the test client.
+"""
+
+from __future__ import annotations
+
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+from flask import Flask, current_app, g, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_G_KEY = "sql_stats"
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_IN_LIST_RE = re.compile(r"\bIN\s*\((?:\s*\?\s*,)*\s*\?\s*\)", re.IGNORECASE)
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+
+
+def fingerprint(statement: str) -> str:
+    """Normalize a statement so executions that differ only in values compare equal."""
+    normalized = _WHITESPACE_RE.sub(" ", statement).strip()
+    normalized = _STRING_RE.sub("?", normalized)
+    normalized = _NUMBER_RE.sub("?", normalized)
+    return _IN_LIST_RE.sub("IN (...)", normalized)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised in strict mode when a request runs too many (or too repetitive) queries."""
+
+
+class QueryStats:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints: Counter = Counter()
+
+    def record(self, statement: str, duration: float) -> None:
+        self.count += 1
+        self.duration += duration
+        self.fingerprints[fingerprint(statement)] += 1
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """Fingerprints executed at least ``threshold`` times, most frequent first."""
+        return [(sql, n) for sql, n in self.fingerprints.most_common() if n >= threshold]
+
+    @property
+    def duration_ms(self) -> float:
+        return self.duration * 1000
+
+
+def current_stats() -> Optional[QueryStats]:
+    if not has_app_context():
+        return None
+    return g.get(_G_KEY)
+
+
+@contextmanager
+def collect_queries():
+    """Collect statistics for the block (e.g. a service call in a test) instead of a request."""
+    previous = g.get(_G_KEY)
+    stats = QueryStats()
+    setattr(g, _G_KEY, stats)
+    try:
+        yield stats
+    finally:
+        setattr(g, _G_KEY, previous)
+
+
+# The start time lives on the statement's execution context rather than on the
+# pooled connection, so a statement that raises leaves nothing behind. (Default
+# generators can run without a context; those go untimed.)
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._sql_stats_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_sql_stats_started", None)
+    stats = current_stats()
+    if stats is not None and started is not None:
+        stats.record(statement, time.perf_counter() - started)
+
+
+def instrument_engine(engine: Engine) -> None:
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class SQLInstrumentation:
+    """
+    Flask extension wiring ``QueryStats`` into the request cycle. Settings:
+
+    ``SQL_INSTRUMENTATION``  turn the whole thing on/off
+    ``SQL_SERVER_TIMING``    add the ``Server-Timing`` header
+    ``SQL_STRICT``           raise ``QueryBudgetExceeded`` on violations
+    ``SQL_QUERY_BUDGET``     default max queries per request (None = unlimited)
+    ``SQL_QUERY_BUDGETS``    per-endpoint overrides, e.g. ``{"shop.index": 6}``
+    ``SQL_REPEAT_THRESHOLD`` same fingerprint this many times counts as N+1
+    """
+
+    def __init__(self, app: Optional[Flask] = None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask) -> None:
+        if not app.config.get("SQL_INSTRUMENTATION", True):
+            return
+        from app import db
+
+        with app.app_context():
+            for engine in db.engines.values():
+                instrument_engine(engine)
+        app.before_request(self._start)
+        app.after_request(self._finish)
+
+    @staticmethod
+    def _start() -> None:
+        setattr(g, _G_KEY, QueryStats())
+        g.sql_stats_request_started = time.perf_counter()
+
+    @staticmethod
+    def budget_for(endpoint: Optional[str]) -> Optional[int]:
+        budgets: Dict[str, int] = current_app.config.get("SQL_QUERY_BUDGETS") or {}
+        return budgets.get(endpoint or "", current_app.config.get("SQL_QUERY_BUDGET"))
+
+    def _finish(self, response):
+        stats = current_stats()
+        if stats is None:
+            return response
+        config = current_app.config
+        threshold = config.get("SQL_REPEAT_THRESHOLD", 5)
+        repeated = stats.repeated(threshold)
+
+        if config.get("SQL_SERVER_TIMING", True):
+            total_ms = (time.perf_counter() - g.sql_stats_request_started) * 1000
+            response.headers.add(
+                "Server-Timing", f'db;dur={stats.duration_ms:.1f};desc="{stats.count} queries"'
+            )
+            response.headers.add("Server-Timing", f"app;dur={total_ms:.1f}")
+
+        current_app.logger.debug(
+            "%s %s: %d queries in %.1f ms%s",
+            request.method,
+            request.path,
+            stats.count,
+            stats.duration_ms,
+            "".join(f"\n  x{n} {sql}" for sql, n in repeated),
+        )
+
+        if config.get("SQL_STRICT"):
+            problems = []
+            budget = self.budget_for(request.endpoint)
+            if budget is not None and stats.count > budget:
+                problems.append(f"{stats.count} queries (budget {budget})")
+            problems.extend(f"statement repeated {n}x: {sql}" for sql, n in repeated)
+            if problems:
+                raise QueryBudgetExceeded(f"{request.method} {request.path}: " + "; ".join(problems))
+        return response
+
+
+__all__ = [
+    "QueryBudgetExceeded",
+    "QueryStats",
+    "SQLInstrumentation",
+    "collect_queries",
+    "current_stats",
+    "fingerprint",
+    "instrument_engine",
+]
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from typing import Optional
+
+from flask import g, has_app_context, session
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models import User
+
+_G_KEY = "users_by_name"
+
+
+def _request_cache() -> Optional[dict]:
+    if not has_app_context():
+        return None
+    if _G_KEY not in g:
+        setattr(g, _G_KEY, {})
+    return getattr(g, _G_KEY)
+
+
+def get_user(username: Optional[str], create: bool = False) -> Optional[User]:
+    """
+    Look ``username`` up case-insensitively, at most once per request: hits
+    are kept on ``flask.g`` for the rest of the request (misses are not, so a
+    user created later in the request is still found). With ``create`` a
+    password-less account is added for names that have none yet.
+    """
+    if not username:
+        return None
+    cache = _request_cache()
+    key = username.lower()
+    if cache is not None and key in cache:
+        return cache[key]
+
+    user = User.by_username(username)
+    if user is None and create:
+        user = User(username=username, email=f"{username}@example.com", password_hash="guest")
+        db.session.add(user)
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Another request created it between the lookup and the insert.
+            db.session.rollback()
+            user = User.by_username(username)
+    if user is not None and cache is not None:
+        cache[key] = user
+    return user
+
+
+def current_user(create: bool = False) -> Optional[User]:
+    """The ``User`` for the signed-in session username, if any."""
+    return get_user(session.get("username"), create=create)
+
+
+def forget_user(username: Optional[str]) -> None:
+    """Drop a cached lookup, e.g. after the user has been renamed."""
+    cache = _request_cache()
+    if cache is not None and username:
+        cache.pop(username.lower(), None)
+
+
+__all__ = ["current_user", "forget_user", "get_user"]
@@ -1,44 +1,119 @@
 document.addEventListener("DOMContentLoaded", () => {
-  const updateForms = document.querySelectorAll(".cart-update-form");
-  const removeForms = document.querySelectorAll(".cart-remove-form");
-
-  async function handleSubmit(event, url) {
-    event.preventDefault();
-    const form = event.target;
-    const quantityInput = form.querySelector(".cart-qty-input");
-    const quantity = quantityInput ? Number(quantityInput.value) : 0;
-
-    try {
-      const resp = await fetch(url, {
-        method: "POST",
-        headers: {
-          "Content-Type": "application/json",
-          "X-Requested-With": "XMLHttpRequest",
-        },
-        body: JSON.stringify({ quantity }),
-      });
-      const data = await resp.json();
-      if (!data.success) {
-        alert(data.message || "Unable to update cart.");
+  const contents = document.getElementById("cart-contents");
+  if (!contents) {
+    return;
+  }
+
+  const BATCH_URL = contents.dataset.batchUrl;
+  const FLUSH_DELAY_MS = 400;
+  const pending = new Map();
+  let flushTimer = null;
+  let inFlight = Promise.resolve();
+
+  function queue(productId, op, quantity) {
+    pending.set(productId, { op, product_id: Number(productId), quantity });
+  }
+
+  function scheduleFlush(delay) {
+    clearTimeout(flushTimer);
+    flushTimer = setTimeout(flush, delay);
+  }
+
+  function setText(id, value) {
+    const el = document.getElementById(id);
+    if (el && value !== undefined) {
+      el.textContent = value;
+    }
+  }
+
+  function render(data) {
+    const lines = new Map(data.items.map((item) => [String(item.product_id), item]));
+
+    contents.querySelectorAll("tr.cart-line").forEach((row) => {
+      const item = lines.get(row.dataset.productId);
+      if (!item) {
+        row.remove();
+        return;
+      }
+      const input = row.querySelector(".cart-qty-input");
+      if (input && document.activeElement !== input) {
+        input.value = item.quantity;
+      }
+      const lineTotal = row.querySelector(".cart-line-total");
+      if (lineTotal) {
+        lineTotal.textContent = item.line_total;
       }
-      window.location.reload();
-    } catch (err) {
-      console.error(err);
-      window.location.reload();
+    });
+
+    setText("cart-subtotal", data.subtotal);
+    setText("cart-tax", data.tax);
+    setText("cart-shipping", data.shipping);
+    setText("cart-total", data.total);
+    setText("cart-count-badge", data.cart_count);
+
+    if (!data.items.length) {
+      contents.classList.add("d-none");
+      document.getElementById("cart-empty")?.classList.remove("d-none");
+    }
+  }
+
+  function flush() {
+    clearTimeout(flushTimer);
+    if (!pending.size) {
+      return inFlight;
     }
+    const operations = Array.from(pending.values());
+    pending.clear();
+
+    // Chain requests so batches reach the server in the order they were made.
+    inFlight = inFlight.then(async () => {
+      try {
+        const resp = await fetch(BATCH_URL, {
+          method: "POST",
+          headers: {
+            "Content-Type": "application/json",
+            "X-Requested-With": "XMLHttpRequest",
+          },
+          body: JSON.stringify({ operations }),
+        });
+        const data = await resp.json();
+        if (!resp.ok || !Array.isArray(data.items)) {
+          throw new Error(data.message || "Unable to update cart.");
+        }
+        render(data);
+        const failures = (data.results || []).filter((result) => !result.success);
+        if (failures.length) {
+          alert(failures.map((result) => result.message).join("\n"));
+        }
+      } catch (err) {
+        console.error(err);
+        window.location.reload();
+      }
+    });
+    return inFlight;
   }
 
-  updateForms.forEach((form) => {
+  contents.querySelectorAll(".cart-update-form").forEach((form) => {
+    const input = form.querySelector(".cart-qty-input");
+    const productId = form.dataset.productId;
+
+    input?.addEventListener("change", () => {
+      queue(productId, "update", Number(input.value));
+      scheduleFlush(FLUSH_DELAY_MS);
+    });
+
     form.addEventListener("submit", (e) => {
-      const productId = form.dataset.productId;
-      handleSubmit(e, `/cart/update/${productId}`);
+      e.preventDefault();
+      queue(productId, "update", input ? Number(input.value) : 0);
+      flush();
     });
   });
 
-  removeForms.forEach((form) => {
+  contents.querySelectorAll(".cart-remove-form").forEach((form) => {
     form.addEventListener("submit", (e) => {
-      const productId = form.dataset.productId;
-      handleSubmit(e, `/cart/remove/${productId}`);
+      e.preventDefault();
+      queue(form.dataset.productId, "remove", 0);
+      flush();
     });
   });
 });
@@ -0,0 +1,360 @@
+"""
+Latency and query counts for the hot endpoints and services, with a baseline.
+
+For each dataset size the suite builds (once, then reuses) a database with
+``app.services.seed``. Each run works on a fresh copy of it, and the hot paths
+are driven through the Flask test client and the service layer:
+
+    shop.index            GET /shop/ with a random sort and category
+    shop.product          GET /shop/product/<slug> of a random product
+    cart.view_cart        GET /cart/ with a few lines in the cart
+    auth.login            POST /auth/login from a new client
+    cart.add_item         CartService.add_item for a random product
+    cart.get_cart_items   CartService.get_cart_items on a 5-line cart
+    order.create_order    OrderService.create_order for a 2-line cart
+
+The suite records the latency distribution and the statements executed per
+call for every path. Each size runs in its own process, because the app binds
+to one database per process. The results are compared with
+``benchmarks/baseline.json``, and the suite exits non-zero when:
+
+- a path now runs more queries than the baseline, or
+- its p50 or p95 latency grew by more than ``--tolerance`` (default 30%), plus
+  half a millisecond of slack for timer noise.
+
+    python benchmarks/hot_paths.py                      # small and medium
+    python benchmarks/hot_paths.py --sizes large --iterations 500
+    python benchmarks/hot_paths.py --update-baseline    # accept the current numbers
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import re
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+DEFAULT_BASELINE = os.path.join(ROOT, "benchmarks", "baseline.json")
+DEFAULT_DATA_DIR = os.path.join(ROOT, "benchmarks", ".data")
+
+# categories, products, users, carts, orders, reviews
+SIZES = {
+    "tiny": (10, 60, 50, 10, 300, 100),  # smoke test
+    "small": (20, 500, 500, 100, 5_000, 2_000),
+    "medium": (60, 5_000, 5_000, 1_000, 100_000, 20_000),
+    "large": (150, 20_000, 50_000, 5_000, 1_000_000, 100_000),
+}
+
+_SERVER_TIMING_QUERIES_RE = re.compile(r'desc="(\d+) queries"')
+
+
+# -- worker: one size, one process -------------------------------------------
+
+
+def seeded_template(size: str, seed: int, data_dir: str) -> str:
+    """Path of the seeded database for ``size``, building it on first use."""
+    path = os.path.join(data_dir, f"{size}-seed{seed}.sqlite3")
+    if os.path.exists(path):
+        return path
+    from sqlalchemy import create_engine
+
+    from app.models.migrations import ensure_schema
+    from app.services.seed import SeedCounts, seed_database
+
+    os.makedirs(data_dir, exist_ok=True)
+    building = path + ".building"
+    if os.path.exists(building):
+        os.remove(building)
+    engine = create_engine(f"sqlite:///{building}")
+    ensure_schema(engine)
+    print(f"[{size}] seeding {building}", file=sys.stderr)
+    seed_database(engine, SeedCounts(*SIZES[size]), seed=seed, log=lambda line: print(f"  {line}", file=sys.stderr))
+    engine.dispose()
+    os.replace(building, path)
+    return path
+
+
+def clone(source: str, target: str) -> None:
+    # The backup API copies a consistent snapshot, WAL contents included.
+    src, dst = sqlite3.connect(source), sqlite3.connect(target)
+    try:
+        src.backup(dst)
+    finally:
+        src.close()
+        dst.close()
+
+
+def summarize(latencies: List[float], queries: List[int]) -> Dict:
+    samples = sorted(latencies)
+
+    def pct(p: float) -> float:
+        return round(1000 * samples[min(len(samples) - 1, int(len(samples) * p))], 3)
+
+    return {
+        "iterations": len(samples),
+        "p50_ms": pct(0.50),
+        "p90_ms": pct(0.90),
+        "p95_ms": pct(0.95),
+        "p99_ms": pct(0.99),
+        "mean_ms": round(1000 * statistics.fmean(samples), 3),
+        "max_ms": round(1000 * samples[-1], 3),
+        "queries": int(statistics.median(queries)),
+        "queries_max": max(queries),
+    }
+
+
+def measure(call: Callable[[], int], iterations: int, warmup: int, setup: Optional[Callable] = None) -> Dict:
+    """Time ``call`` (which returns its query count); ``setup`` runs untimed before each call."""
+    latencies, queries = [], []
+    for n in range(warmup + iterations):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        count = call()
+        elapsed = time.perf_counter() - started
+        if n >= warmup:
+            latencies.append(elapsed)
+            queries.append(count)
+    return summarize(latencies, queries)
+
+
+def run_size(size: str, iterations: int, warmup: int, seed: int, data_dir: str) -> Dict:
+    workdir = tempfile.mkdtemp(prefix=f"hot-paths-{size}-")
+    database = os.path.join(workdir, "bench.sqlite3")
+    # app.config reads these on import, which seeding already does.
+    os.environ["DATABASE_URL"] = f"sqlite:///{database}"
+    os.environ.setdefault("APP_CONFIG", "development")
+    clone(seeded_template(size, seed, data_dir), database)
+    try:
+        return _run_scenarios(random.Random(seed), iterations, warmup)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def _run_scenarios(rng: random.Random, iterations: int, warmup: int) -> Dict:
+    from sqlalchemy.exc import IntegrityError
+
+    from app import db, get_app
+    from app.blueprints.shop.routes import SORT_KEYS
+    from app.models import Category, Product
+    from app.services.cart import CartService
+    from app.services.order import OrderService
+    from app.services.sql_stats import collect_queries
+
+    app = get_app()
+    app.config["WTF_CSRF_ENABLED"] = False
+    with app.app_context():
+        products = [
+            (row.id, row.slug)
+            for row in db.session.query(Product.id, Product.slug).filter(Product.is_active, Product.quantity >= 50)
+        ]
+        category_slugs = [slug for (slug,) in db.session.query(Category.slug)]
+    product_ids = [product_id for product_id, _ in products]
+
+    def queries_from(response, status: int = 200) -> int:
+        assert response.status_code == status, f"{response.request.path}: {response.status_code}"
+        for value in response.headers.getlist("Server-Timing"):
+            match = _SERVER_TIMING_QUERIES_RE.search(value)
+            if match:
+                return int(match.group(1))
+        raise RuntimeError("no Server-Timing header; is SQL_SERVER_TIMING on?")
+
+    shopper = app.test_client()
+    shopper.post("/auth/login", data={"username": "test_user", "password": "secret123"})
+    with app.test_request_context():
+        cart = CartService(username="test_user")
+        cart.clear_cart()
+        for product_id in rng.sample(product_ids, 3):
+            cart.add_item(product_id, 1)
+
+    results = {}
+
+    def shop_index() -> int:
+        params = {"sort": rng.choice(list(SORT_KEYS))}
+        if rng.random() < 0.5:
+            params["category"] = rng.choice(category_slugs)
+        return queries_from(shopper.get("/shop/", query_string=params))
+
+    def shop_product() -> int:
+        return queries_from(shopper.get(f"/shop/product/{rng.choice(products)[1]}"))
+
+    def view_cart() -> int:
+        return queries_from(shopper.get("/cart/"))
+
+    def login() -> int:
+        response = app.test_client().post("/auth/login", data={"username": "test_user", "password": "secret123"})
+        return queries_from(response, status=302)
+
+    results["shop.index"] = measure(shop_index, iterations, warmup)
+    results["shop.product"] = measure(shop_product, iterations, warmup)
+    results["cart.view_cart"] = measure(view_cart, iterations, warmup)
+    results["auth.login"] = measure(login, iterations, warmup)
+
+    with app.test_request_context():
+        service = CartService(username="bench_cart")
+
+        def add_item() -> int:
+            with collect_queries() as stats:
+                service.add_item(rng.choice(product_ids), 1)
+            return stats.count
+
+        results["cart.add_item"] = measure(add_item, iterations, warmup, setup=service.clear_cart)
+
+        service.clear_cart()
+        for product_id in rng.sample(product_ids, 5):
+            service.add_item(product_id, 1)
+
+        def get_cart_items() -> int:
+            with collect_queries() as stats:
+                service.get_cart_items()
+            return stats.count
+
+        results["cart.get_cart_items"] = measure(get_cart_items, iterations, warmup)
+
+    form = SimpleNamespace(
+        **{
+            name: SimpleNamespace(data=value)
+            for name, value in {
+                "email": "bench_buyer@example.com",
+                "full_name": "Bench Buyer",
+                "address": "1 Cauldron Row",
+                "city": "Testville",
+                "state": "CA",
+                "zip_code": "94016",
+                "country": "US",
+                "phone": "+15550000000",
+                "shipping_method": "standard",
+            }.items()
+        }
+    )
+    with app.test_request_context():
+        buyer_cart = CartService(username="bench_buyer")
+        orders = OrderService(buyer_cart, "bench_buyer@example.com", username="bench_buyer")
+
+        def fill_cart() -> None:
+            for product_id in rng.sample(product_ids, 2):
+                buyer_cart.add_item(product_id, 1)
+
+        def create_order() -> int:
+            while True:
+                with collect_queries() as stats:
+                    try:
+                        orders.create_order(form)
+                    except IntegrityError:
+                        # ORD-<date>-<5 random digits> can collide; retry like a customer would.
+                        db.session.rollback()
+                        continue
+                return stats.count
+
+        results["order.create_order"] = measure(create_order, iterations, warmup, setup=fill_cart)
+    return results
+
+
+# -- driver -------------------------------------------------------------------
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float, slack_ms: float = 0.5) -> List[str]:
+    """Regressions of ``results`` against ``baseline`` (both {size: {path: stats}})."""
+    problems = []
+    for size, paths in results.items():
+        for path, stats in paths.items():
+            base = baseline.get(size, {}).get(path)
+            if base is None:
+                continue
+            if stats["queries"] > base["queries"]:
+                problems.append(f"{size} {path}: {stats['queries']} queries (baseline {base['queries']})")
+            for key in ("p50_ms", "p95_ms"):
+                limit = base[key] * (1 + tolerance) + slack_ms
+                if stats[key] > limit:
+                    problems.append(f"{size} {path}: {key} {stats[key]:.2f} (baseline {base[key]:.2f}, limit {limit:.2f})")
+    return problems
+
+
+def print_report(results: Dict, baseline: Dict) -> None:
+    header = f"{'size':<7} {'path':<20} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} {'queries':>7} {'vs p50':>8}"
+    print(header)
+    print("-" * len(header))
+    for size, paths in results.items():
+        for path, stats in paths.items():
+            base = baseline.get(size, {}).get(path)
+            delta = f"{(stats['p50_ms'] / base['p50_ms'] - 1) * 100:+7.0f}%" if base and base["p50_ms"] else "     new"
+            print(
+                f"{size:<7} {path:<20} {stats['p50_ms']:8.2f} {stats['p95_ms']:8.2f} {stats['p99_ms']:8.2f} "
+                f"{stats['max_ms']:8.2f} {stats['queries']:7d} {delta}"
+            )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=["small", "medium"])
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--tolerance", type=float, default=0.30, help="allowed latency growth (0.30 = 30%%)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true", help="write these results as the new baseline")
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR, help="where seeded databases are kept")
+    parser.add_argument("--json", help="also write the results to this file")
+    parser.add_argument("--worker", choices=list(SIZES), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        results = run_size(args.worker, args.iterations, args.warmup, args.seed, args.data_dir)
+        json.dump(results, sys.stdout)
+        return 0
+
+    results = {}
+    for size in args.sizes:
+        worker = subprocess.run(
+            [
+                sys.executable, __file__, "--worker", size,
+                "--iterations", str(args.iterations), "--warmup", str(args.warmup),
+                "--seed", str(args.seed), "--data-dir", args.data_dir,
+            ],
+            stdout=subprocess.PIPE,
+            check=True,
+            text=True,
+        )
+        results[size] = json.loads(worker.stdout)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as fh:
+            baseline = json.load(fh)
+    print_report(results, baseline)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+
+    if args.update_baseline:
+        baseline.update(results)
+        with open(args.baseline, "w", encoding="utf-8") as fh:
+            json.dump(baseline, fh, indent=2, sort_keys=True)
+            fh.write("\n")
+        print(f"\nbaseline updated: {args.baseline}")
+        return 0
+
+    problems = compare(results, baseline, args.tolerance)
+    if problems:
+        print("\nREGRESSIONS:")
+        for problem in problems:
+            print(f"  {problem}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
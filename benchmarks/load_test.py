@@ -0,0 +1,359 @@
+"""
+Load test: how many concurrent shoppers one node can take.
+
+Virtual users replay persona scenarios against a running server. Each one
+runs on its own thread with its own cookie session, like a browser:
+
+``browser``  log in, list the shop with a random sort/category, open products
+``buyer``    log in, open a product, add it to the cart (form post with its
+             CSRF token), view the cart, change the quantity
+``admin``    log in as an admin, open the dashboard, products, orders and
+             the model console
+
+Logins use the ``USERS`` credentials from ``app/blueprints/auth/constants.py``.
+Concurrency ramps up step by step (``--steps``). Each step reports throughput,
+latency percentiles and the error rate per endpoint, and the closing summary
+marks the knee: the first step where adding users stopped adding throughput.
+
+Without ``--url`` the script starts ``gunicorn`` (see ``gunicorn.conf.py``) on
+a copy of a seeded database from ``benchmarks/hot_paths.py``:
+
+    python benchmarks/load_test.py --steps 1 2 4 8 16 32 --step-seconds 20
+    python benchmarks/load_test.py --url http://staging:8000 --mix browser=80,buyer=20
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import re
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional, Tuple
+
+import requests
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from app.blueprints.auth.constants import USERS  # noqa: E402
+
+CUSTOMERS = sorted(name for name, meta in USERS.items() if meta.get("role") != "admin")
+ADMINS = sorted(name for name, meta in USERS.items() if meta.get("role") == "admin")
+DEFAULT_MIX = {"browser": 60, "buyer": 30, "admin": 10}
+
+_PRODUCT_LINK_RE = re.compile(r'href="(/shop/product/[^"]+)"')
+_CATEGORY_SELECT_RE = re.compile(r'name="category">(.*?)</select>', re.S)
+_OPTION_RE = re.compile(r'<option value="([\w-]+)"')
+_CSRF_RE = re.compile(r'name="csrf_token" type="hidden" value="([^"]+)"')
+_ADD_FORM_RE = re.compile(r'action="/cart/add/(\d+)"')
+_UPDATE_FORM_RE = re.compile(r'action="/cart/update/(\d+)"')
+SORTS = ("newest", "price_asc", "price_desc", "name")
+
+
+def _csrf_field(page: str) -> Dict[str, str]:
+    # Profiles with WTF_CSRF_ENABLED off render no token, and need none.
+    token = _CSRF_RE.search(page)
+    return {"csrf_token": token.group(1)} if token else {}
+
+
+class RequestFailed(Exception):
+    pass
+
+
+class Recorder:
+    """Thread-safe (endpoint -> latencies, errors) for one step."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.abandoned: Dict[str, int] = defaultdict(int)
+
+    def record(self, endpoint: str, elapsed: float, ok: bool) -> None:
+        with self.lock:
+            self.latencies[endpoint].append(elapsed)
+            if not ok:
+                self.errors[endpoint] += 1
+
+    def abandon(self, persona: str) -> None:
+        with self.lock:
+            self.abandoned[persona] += 1
+
+
+class VirtualUser:
+    def __init__(self, base_url: str, recorder: Recorder, rng: random.Random, think: float):
+        self.base_url = base_url.rstrip("/")
+        self.recorder = recorder
+        self.rng = rng
+        self.think = think
+        self.http = requests.Session()
+
+    def call(self, endpoint: str, method: str, path: str, expect=(200,), **kwargs) -> requests.Response:
+        started = time.perf_counter()
+        try:
+            response = self.http.request(method, self.base_url + path, allow_redirects=False, timeout=30, **kwargs)
+        except requests.RequestException as exc:
+            self.recorder.record(endpoint, time.perf_counter() - started, ok=False)
+            raise RequestFailed(f"{endpoint}: {exc}") from exc
+        ok = response.status_code in expect
+        self.recorder.record(endpoint, time.perf_counter() - started, ok=ok)
+        if not ok:
+            raise RequestFailed(f"{endpoint}: HTTP {response.status_code}")
+        if self.think:
+            time.sleep(self.rng.expovariate(1 / self.think))
+        return response
+
+    def login(self, username: str) -> None:
+        response = self.call(
+            "auth.login", "POST", "/auth/login",
+            data={"username": username, "password": USERS[username]["password"]}, expect=(302,),
+        )
+        if "/auth/login" in response.headers.get("Location", ""):
+            raise RequestFailed("auth.login: rejected")
+
+    def shop_page(self) -> str:
+        params = {"sort": self.rng.choice(SORTS)}
+        return self.call("shop.index", "GET", "/shop/", params=params).text
+
+    def product_page(self, listing: str) -> Optional[str]:
+        links = _PRODUCT_LINK_RE.findall(listing)
+        if not links:
+            return None
+        return self.call("shop.product", "GET", self.rng.choice(links)).text
+
+    # -- personas --------------------------------------------------------------
+
+    def browser(self) -> None:
+        self.login(self.rng.choice(CUSTOMERS))
+        listing = self.shop_page()
+        select = _CATEGORY_SELECT_RE.search(listing)
+        categories = _OPTION_RE.findall(select.group(1)) if select else []
+        if categories:
+            listing = self.call("shop.index", "GET", "/shop/", params={"category": self.rng.choice(categories)}).text
+        for _ in range(self.rng.randint(1, 4)):
+            self.product_page(listing)
+
+    def buyer(self) -> None:
+        self.login(self.rng.choice(CUSTOMERS))
+        page = self.product_page(self.shop_page())
+        added = _ADD_FORM_RE.search(page or "")
+        if not added:
+            return
+        self.call(
+            "cart.add_item", "POST", f"/cart/add/{added.group(1)}",
+            data={**_csrf_field(page), "quantity": 1}, expect=(302,),
+        )
+        cart = self.call("cart.view_cart", "GET", "/cart/").text
+        lines = _UPDATE_FORM_RE.findall(cart)
+        if lines:
+            self.call(
+                "cart.update_item", "POST", f"/cart/update/{self.rng.choice(lines)}",
+                data={**_csrf_field(cart), "quantity": self.rng.randint(1, 3)}, expect=(302,),
+            )
+
+    def admin(self) -> None:
+        self.login(self.rng.choice(ADMINS))
+        self.call("admin_panel.dashboard", "GET", "/admin/dashboard")
+        self.call("admin_panel.products", "GET", "/admin/products")
+        self.call("admin_panel.orders", "GET", "/admin/orders")
+        self.call("admin.console", "GET", "/admin/console/product/")
+
+
+def run_step(base_url: str, users: int, seconds: float, mix: Dict[str, int], think: float, seed: int) -> Dict:
+    recorder = Recorder()
+    stop = threading.Event()
+    personas, weights = list(mix), list(mix.values())
+
+    def user_loop(n: int) -> None:
+        rng = random.Random(seed * 1000 + n)
+        while not stop.is_set():
+            persona = rng.choices(personas, weights)[0]
+            user = VirtualUser(base_url, recorder, rng, think)
+            try:
+                getattr(user, persona)()
+            except RequestFailed:
+                recorder.abandon(persona)  # a real shopper gives up on an error page too
+            finally:
+                user.http.close()
+
+    threads = [threading.Thread(target=user_loop, args=(n,), daemon=True) for n in range(users)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    endpoints = {}
+    for endpoint, samples in sorted(recorder.latencies.items()):
+        endpoints[endpoint] = summarize(samples, recorder.errors[endpoint], elapsed)
+    everything = [sample for samples in recorder.latencies.values() for sample in samples]
+    return {
+        "users": users,
+        "seconds": round(elapsed, 2),
+        "total": summarize(everything, sum(recorder.errors.values()), elapsed),
+        "endpoints": endpoints,
+        "abandoned_sessions": dict(recorder.abandoned),
+    }
+
+
+def summarize(samples: List[float], errors: int, elapsed: float) -> Dict:
+    ordered = sorted(samples)
+
+    def pct(p: float) -> Optional[float]:
+        return round(1000 * ordered[min(len(ordered) - 1, int(len(ordered) * p))], 2) if ordered else None
+
+    return {
+        "requests": len(ordered),
+        "rps": round(len(ordered) / elapsed, 1),
+        "error_rate": round(errors / len(ordered), 4) if ordered else 0.0,
+        "p50_ms": pct(0.50),
+        "p95_ms": pct(0.95),
+        "p99_ms": pct(0.99),
+    }
+
+
+def find_knee(steps: List[Dict], min_gain: float = 0.10) -> Optional[int]:
+    """Users at the first step whose throughput gained less than ``min_gain`` over the previous one."""
+    for previous, step in zip(steps, steps[1:]):
+        if step["total"]["rps"] < previous["total"]["rps"] * (1 + min_gain):
+            return step["users"]
+    return None
+
+
+def print_step(step: Dict) -> None:
+    total = step["total"]
+    print(
+        f"\n== {step['users']} users: {total['rps']} req/s, p50 {total['p50_ms']} ms, "
+        f"p95 {total['p95_ms']} ms, p99 {total['p99_ms']} ms, errors {total['error_rate']:.2%}"
+    )
+    print(f"   {'endpoint':<24} {'reqs':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for endpoint, stats in step["endpoints"].items():
+        print(
+            f"   {endpoint:<24} {stats['requests']:7d} {stats['rps']:8.1f} {stats['p50_ms']:8.2f} "
+            f"{stats['p95_ms']:8.2f} {stats['p99_ms']:8.2f} {stats['error_rate']:7.2%}"
+        )
+
+
+def print_summary(steps: List[Dict]) -> None:
+    knee = find_knee(steps)
+    print(f"\n{'users':>6} {'req/s':>8} {'p95 ms':>8} {'errors':>7}")
+    for step in steps:
+        total = step["total"]
+        marker = "  <- knee: throughput flattened" if step["users"] == knee else ""
+        print(f"{step['users']:6d} {total['rps']:8.1f} {total['p95_ms'] or 0:8.2f} {total['error_rate']:7.2%}{marker}")
+    if knee is None:
+        print("No knee within these steps; try more users.")
+
+
+def parse_mix(value: str) -> Dict[str, int]:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in DEFAULT_MIX or not weight.isdigit():
+            raise argparse.ArgumentTypeError(f"expected e.g. browser=60,buyer=30,admin=10, got {value!r}")
+        mix[name] = int(weight)
+    return mix
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(size: str, workers: int, threads: int, workdir: str) -> Tuple[str, Callable[[], None]]:
+    """Start gunicorn on a copy of the seeded ``size`` database; return its URL and a stop function."""
+    from hot_paths import DEFAULT_DATA_DIR, clone, seeded_template
+
+    database = os.path.join(workdir, "load.sqlite3")
+    clone(seeded_template(size, 42, DEFAULT_DATA_DIR), database)
+    port = free_port()
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{database}",
+        "APP_CONFIG": os.environ.get("APP_CONFIG", "production"),
+        "CATALOG_CACHE_PATH": os.environ.get("CATALOG_CACHE_PATH", os.path.join(workdir, "catalog_cache.sqlite3")),
+        "BIND": f"127.0.0.1:{port}",
+        "WEB_CONCURRENCY": str(workers),
+        "GUNICORN_THREADS": str(threads),
+        "GUNICORN_MAX_REQUESTS": "0",
+    }
+    log_path = os.path.join(workdir, "gunicorn.log")
+    with open(log_path, "w") as log:
+        server = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "--access-logfile", os.devnull, "--control-socket", os.path.join(workdir, "ctl")],
+            cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT,
+        )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while True:
+        try:
+            requests.get(url + "/auth/login", timeout=2)
+            break
+        except requests.RequestException:  # refused, or accepted before a worker is up
+            if server.poll() is not None or time.monotonic() > deadline:
+                server.kill()
+                with open(log_path) as log:
+                    raise SystemExit(f"gunicorn did not start:\n{log.read()}")
+            time.sleep(0.2)
+
+    def stop() -> None:
+        server.terminate()
+        server.wait(timeout=30)
+
+    return url, stop
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="target an already running server instead of starting one")
+    parser.add_argument("--steps", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32], help="concurrent users per step")
+    parser.add_argument("--step-seconds", type=float, default=15.0)
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX, help="persona weights")
+    parser.add_argument("--think", type=float, default=0.0, help="mean think time between requests, seconds")
+    parser.add_argument("--size", default="small", help="seeded dataset for the local server (see hot_paths.py)")
+    parser.add_argument("--workers", type=int, default=4, help="gunicorn workers for the local server")
+    parser.add_argument("--threads", type=int, default=4, help="threads per gunicorn worker")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="load-test-")
+    stop = None
+    try:
+        if args.url:
+            url = args.url
+        else:
+            url, stop = start_server(args.size, args.workers, args.threads, workdir)
+            print(f"gunicorn: {args.workers} workers x {args.threads} threads, '{args.size}' dataset, {url}")
+        print(f"mix {args.mix}, {args.step_seconds:.0f}s per step, think time {args.think}s")
+        steps = []
+        for users in args.steps:
+            step = run_step(url, users, args.step_seconds, args.mix, args.think, args.seed)
+            print_step(step)
+            steps.append(step)
+        print_summary(steps)
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as fh:
+                json.dump({"url": url, "mix": args.mix, "steps": steps, "knee_users": find_knee(steps)}, fh, indent=2)
+    finally:
+        if stop:
+            stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,185 @@
+"""
+Concurrent read/write throughput of the SQLite profiles.
+
+Runs the same mixed workload against a fresh database file once per config
+profile: reader threads page through the shop listing and sum a cart, while
+writer threads upsert cart lines and reserve stock the way checkout does,
+each write in its own short transaction. Compare ``legacy`` (SQLite defaults:
+rollback journal, synchronous=FULL) with the WAL profiles:
+
+    python benchmarks/sqlite_profile.py --profiles legacy development --seconds 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from sqlalchemy import create_engine, text  # noqa: E402
+from sqlalchemy.exc import OperationalError  # noqa: E402
+
+PRODUCTS = 2000
+USERS = 200
+
+LISTING_SQL = text(
+    "SELECT id, name, price_cents FROM products WHERE is_active = 1 "
+    "ORDER BY created_at DESC, id DESC LIMIT 12 OFFSET :offset"
+)
+CART_SUM_SQL = text(
+    "SELECT COALESCE(SUM(c.quantity), 0), COALESCE(SUM(c.quantity * p.price_cents), 0) "
+    "FROM cart_items c JOIN products p ON p.id = c.product_id WHERE c.user_id = :user_id"
+)
+CART_UPSERT_SQL = text(
+    "INSERT INTO cart_items (user_id, product_id, quantity, created_at) VALUES (:user_id, :product_id, 1, :now) "
+    "ON CONFLICT (user_id, product_id) DO UPDATE SET quantity = quantity + 1"
+)
+RESERVE_SQL = text(
+    "UPDATE products SET quantity = quantity - 1 WHERE id = :product_id AND quantity >= 1"
+)
+
+
+def seed(engine) -> None:
+    from app import db
+
+    db.metadata.create_all(engine)
+    now = datetime.now()
+    with engine.begin() as connection:
+        connection.execute(
+            db.metadata.tables["users"].insert(),
+            [{"username": f"bench{n}", "email": f"bench{n}@example.com", "password_hash": "!"} for n in range(USERS)],
+        )
+        connection.execute(
+            db.metadata.tables["products"].insert(),
+            [
+                {
+                    "name": f"Bench Potion {n}",
+                    "slug": f"bench-potion-{n}",
+                    "sku": f"BENCH-{n}",
+                    "price_cents": 100 + n,
+                    "quantity": 1_000_000,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+                for n in range(PRODUCTS)
+            ],
+        )
+
+
+def run_profile(name: str, readers: int, writers: int, seconds: float) -> dict:
+    from app.config import config_for
+    from app.models.pragmas import current_pragmas, install_pragmas
+
+    config = config_for(name)
+    workdir = tempfile.mkdtemp(prefix=f"sqlite-{name}-")
+    engine = create_engine(
+        f"sqlite:///{os.path.join(workdir, 'bench.sqlite3')}",
+        **{**config.SQLALCHEMY_ENGINE_OPTIONS, "pool_size": readers + writers, "max_overflow": 0},
+    )
+    install_pragmas(engine, config.SQLITE_PRAGMAS)
+    seed(engine)
+    with engine.connect() as connection:
+        pragmas = current_pragmas(connection)
+
+    stop = threading.Event()
+    lock = threading.Lock()
+    latencies = {"read": [], "write": []}
+    errors = {"read": 0, "write": 0}
+
+    def record(kind: str, started: float, ok: bool) -> None:
+        with lock:
+            if ok:
+                latencies[kind].append(time.perf_counter() - started)
+            else:
+                errors[kind] += 1
+
+    def reader(seed_value: int) -> None:
+        rng = random.Random(seed_value)
+        while not stop.is_set():
+            started = time.perf_counter()
+            try:
+                with engine.connect() as connection:
+                    connection.execute(LISTING_SQL, {"offset": rng.randrange(0, PRODUCTS // 12) * 12}).all()
+                    connection.execute(CART_SUM_SQL, {"user_id": rng.randrange(1, USERS + 1)}).one()
+                record("read", started, True)
+            except OperationalError:
+                record("read", started, False)
+
+    def writer(seed_value: int) -> None:
+        rng = random.Random(seed_value)
+        while not stop.is_set():
+            started = time.perf_counter()
+            params = {"user_id": rng.randrange(1, USERS + 1), "product_id": rng.randrange(1, PRODUCTS + 1)}
+            try:
+                with engine.begin() as connection:
+                    connection.execute(CART_UPSERT_SQL, {**params, "now": datetime.now()})
+                    if rng.random() < 0.2:
+                        connection.execute(RESERVE_SQL, params)
+                record("write", started, True)
+            except OperationalError:
+                record("write", started, False)
+
+    threads = [threading.Thread(target=reader, args=(n,)) for n in range(readers)]
+    threads += [threading.Thread(target=writer, args=(1000 + n,)) for n in range(writers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+
+    result = {"profile": name, "pragmas": pragmas}
+    for kind in ("read", "write"):
+        samples = sorted(latencies[kind])
+        result[kind] = {
+            "ops_per_s": len(samples) / seconds,
+            "errors": errors[kind],
+            "p50_ms": 1000 * statistics.median(samples) if samples else None,
+            "p95_ms": 1000 * samples[int(len(samples) * 0.95) - 1] if samples else None,
+            "p99_ms": 1000 * samples[int(len(samples) * 0.99) - 1] if samples else None,
+        }
+    return result
+
+
+def _fmt(value) -> str:
+    return "-" if value is None else f"{value:8.2f}"
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profiles", nargs="+", default=["legacy", "development"])
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args(argv)
+
+    # Importing the app builds it; keep that away from the real database.
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'unused.sqlite3')}")
+
+    print(f"{args.readers} readers, {args.writers} writers, {args.seconds:.0f}s per profile\n")
+    print(f"{'profile':<12} {'kind':<6} {'ops/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for name in args.profiles:
+        result = run_profile(name, args.readers, args.writers, args.seconds)
+        for kind in ("read", "write"):
+            stats = result[kind]
+            print(
+                f"{name:<12} {kind:<6} {stats['ops_per_s']:9.1f} {_fmt(stats['p50_ms'])} "
+                f"{_fmt(stats['p95_ms'])} {_fmt(stats['p99_ms'])} {stats['errors']:7d}"
+            )
+        pragmas = result["pragmas"]
+        print(f"{'':<12} journal_mode={pragmas['journal_mode']} synchronous={pragmas['synchronous']}\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""
+Import and start-up time, with a regression budget.
+
+Each scenario runs in a fresh interpreter under ``python -X importtime``,
+several times, and the median is compared against its budget (milliseconds):
+
+``models``  ``import app.models``, what services, scripts and workers pay
+``app``     building the application, what ``flask`` commands and servers pay
+
+The report also lists the slowest top-level imports of the last ``app`` run.
+Exits non-zero when a median is over budget, so it can gate CI:
+
+    python benchmarks/startup.py --runs 7 --budget app=1500
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List, Tuple
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+SCENARIOS = {
+    "models": "import app.models",
+    "app": "from app import get_app; get_app()",
+}
+# Generous for a laptop; lower them once CI timings are known.
+DEFAULT_BUDGETS_MS = {"models": 900, "app": 1500}
+
+_IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def measure(code: str, database_url: str) -> Tuple[float, List[Tuple[int, str]]]:
+    """Run ``code`` in a new interpreter; return (total ms, [(cumulative us, top-level module)])."""
+    script = f"import time; t = time.perf_counter(); {code}; print((time.perf_counter() - t) * 1000)"
+    env = {**os.environ, "DATABASE_URL": database_url, "PYTHONDONTWRITEBYTECODE": ""}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", script],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    top_level = []
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if match and len(match.group(3)) == 1:
+            top_level.append((int(match.group(2)), match.group(4)))
+    return float(result.stdout.strip().splitlines()[-1]), top_level
+
+
+def parse_budgets(values: List[str]) -> Dict[str, float]:
+    budgets = dict(DEFAULT_BUDGETS_MS)
+    for value in values:
+        name, _, ms = value.partition("=")
+        if name not in SCENARIOS or not ms:
+            raise SystemExit(f"--budget expects one of {', '.join(SCENARIOS)} as NAME=MS, got {value!r}")
+        budgets[name] = float(ms)
+    return budgets
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget", action="append", default=[], metavar="NAME=MS")
+    parser.add_argument("--top", type=int, default=10, help="slowest top-level imports to list")
+    args = parser.parse_args(argv)
+    budgets = parse_budgets(args.budget)
+
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = f"sqlite:///{os.path.join(tmp, 'startup.sqlite3')}"
+        for name, code in SCENARIOS.items():
+            measure(code, database_url)  # warm the bytecode and OS file caches
+            timings = []
+            for _ in range(args.runs):
+                elapsed, top_level = measure(code, database_url)
+                timings.append(elapsed)
+            median = statistics.median(timings)
+            verdict = "ok" if median <= budgets[name] else "OVER BUDGET"
+            print(
+                f"{name:<8} median {median:7.1f} ms  min {min(timings):7.1f} ms  "
+                f"budget {budgets[name]:7.1f} ms  {verdict}"
+            )
+            if median > budgets[name]:
+                failures.append(name)
+
+    print(f"\nslowest top-level imports ({SCENARIOS['app']}):")
+    for cumulative_us, module in sorted(top_level, reverse=True)[: args.top]:
+        print(f"  {cumulative_us / 1000:7.1f} ms  {module}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
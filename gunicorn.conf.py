@@ -0,0 +1,74 @@
+"""
+Production server settings; ``gunicorn`` picks this file up from the
+working directory, so from the repository root just run:
+
+    gunicorn
+
+Every setting can be overridden with an environment variable (or on the
+command line, e.g. ``gunicorn --workers 2``):
+
+``BIND``                      address to listen on (``0.0.0.0:8000``)
+``WEB_CONCURRENCY``           worker processes (2 x CPUs + 1, at most 8)
+``GUNICORN_THREADS``          request threads per worker (4)
+``GUNICORN_MAX_REQUESTS``     recycle a worker after this many requests (1000, 0 = never)
+``GUNICORN_TIMEOUT``          seconds before a stuck worker is killed (30)
+``PROMETHEUS_MULTIPROC_DIR``  set it to aggregate /metrics across workers
+
+``kill -HUP <master pid>`` reloads gracefully: new workers start with the
+current code while the old ones finish their in-flight requests. The master
+never imports the application (it runs migrations in a subprocess), so a
+reload really does pick up new code.
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+
+wsgi_app = "app:app"
+bind = os.environ.get("BIND", "0.0.0.0:8000")
+
+# SQLite takes one writer at a time; more processes mostly add lock waits.
+workers = int(os.environ.get("WEB_CONCURRENCY", min(2 * (os.cpu_count() or 1) + 1, 8)))
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
+
+# Recycle workers to cap memory growth; the jitter keeps them from all
+# restarting at once.
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 1000))
+max_requests_jitter = max_requests // 10
+
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 30))
+graceful_timeout = 30
+keepalive = 5
+accesslog = "-"
+forwarded_allow_ips = os.environ.get("FORWARDED_ALLOW_IPS", "127.0.0.1")
+
+
+def _migrate(server):
+    # In a child process: the master must not import the app, or forked
+    # workers would inherit its modules (stale after a reload) and its pooled
+    # SQLite connections.
+    server.log.info("Applying schema migrations")
+    subprocess.run([sys.executable, "-m", "flask", "--app", "app", "db-upgrade"], check=True)
+
+
+def on_starting(server):
+    multiproc_dir = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if multiproc_dir:
+        # Samples left by a previous run would be added to this one's.
+        shutil.rmtree(multiproc_dir, ignore_errors=True)
+        os.makedirs(multiproc_dir)
+    _migrate(server)
+
+
+def on_reload(server):
+    # New code may bring new migrations; apply them before new workers start.
+    _migrate(server)
+
+
+def child_exit(server, worker):
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
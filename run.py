@@ -1,7 +1,15 @@
-from app import app, db
+from werkzeug.serving import is_running_from_reloader
 
-with app.app_context():
-    db.create_all()
+from app import catalog_cache, db, get_app
+from app.models.migrations import ensure_schema
+
+app = get_app()
 
 if __name__ == "__main__":
+    # The debug reloader re-runs this file in a child process; migrate (and
+    # empty the catalog cache, as ``flask db-upgrade`` does) once, in the parent.
+    if not is_running_from_reloader():
+        with app.app_context():
+            ensure_schema(db.engine)
+            catalog_cache.clear()
     app.run(debug=True)
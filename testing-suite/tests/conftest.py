@@ -0,0 +1,217 @@
+import os
+import socket
+import sqlite3
+import subprocess
+import sys
+import time
+from contextlib import closing
+from types import SimpleNamespace
+
+import pytest
+import requests
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+# Service-level tests import the Flask app directly rather than driving a browser.
+sys.path.insert(0, ROOT)
+
+# The catalog the UI tests run against, on either driver (``SeedCounts`` fields).
+UI_SEED = {"categories": 6, "products": 40, "users": 20, "carts": 5, "orders": 50, "reviews": 40}
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers",
+        'driver(name): run the test\'s ``page`` on "browser" (Playwright, the default) or "http" '
+        "(Flask test client and an HTML parser; no JavaScript)",
+    )
+
+
+@pytest.fixture(scope="session", autouse=True)
+def app_database(tmp_path_factory):
+    """
+    Point DATABASE_URL at a throwaway SQLite file before any test runs:
+    ``app.config`` reads it on first import, and under xdist a worker's first
+    test may import ``app`` without going through ``flask_app``.
+    """
+    db_path = tmp_path_factory.mktemp("db") / "app.sqlite3"
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ.setdefault("APP_CONFIG", "testing")
+    return db_path
+
+
+@pytest.fixture(scope="session")
+def flask_app(app_database):
+    """
+    The application bound to ``app_database``. ``app`` is built the first
+    time it is accessed; modules that touch the database use ``fresh_app``.
+    """
+    db_path = app_database
+    from app import app
+
+    assert str(db_path) in app.config["SQLALCHEMY_DATABASE_URI"], "app was imported with another database"
+    return app
+
+
+@pytest.fixture(scope="module")
+def fresh_app(flask_app):
+    """``flask_app`` on an empty schema, rebuilt once per module; seed on top of it as needed."""
+    from app import db
+
+    with flask_app.app_context():
+        db.drop_all()
+        db.create_all()
+    return flask_app
+
+
+@pytest.fixture(scope="session")
+def free_port():
+    """Return a callable giving a TCP port on 127.0.0.1 that nothing listens on yet."""
+
+    def pick() -> int:
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            return sock.getsockname()[1]
+
+    return pick
+
+
+def _seeded_template(shared_dir) -> str:
+    """
+    The seeded database that live servers are cloned from, built once per run:
+    xdist workers share ``shared_dir``, and whichever finishes seeding first
+    moves its copy into place (seeding is deterministic, so any copy will do).
+    """
+    template = os.path.join(shared_dir, "live-template.sqlite3")
+    if not os.path.exists(template):
+        building = f"{template}.{os.getpid()}"
+        env = {**os.environ, "DATABASE_URL": f"sqlite:///{building}", "APP_CONFIG": "testing"}
+        subprocess.run(
+            [sys.executable, "-m", "flask", "--app", "app", "seed", *(f"--{k}={v}" for k, v in UI_SEED.items())],
+            cwd=ROOT, env=env, check=True, capture_output=True,
+        )
+        with closing(sqlite3.connect(building)) as connection:
+            connection.execute("PRAGMA journal_mode=DELETE")  # fold the WAL in before the rename
+        os.replace(building, template)
+    return template
+
+
+def _clone(source: str, target: str) -> None:
+    # The backup API copies a consistent snapshot page by page, WAL included.
+    with closing(sqlite3.connect(source)) as src, closing(sqlite3.connect(target)) as dst:
+        src.backup(dst)
+
+
+@pytest.fixture(scope="session")
+def live_server(tmp_path_factory, worker_id, base_url, free_port):
+    """
+    Base URL of an app server private to this xdist worker (``pytest -n auto``):
+    its own port, and its own database cloned from a seeded template. With
+    ``--base-url`` the tests run against that server instead.
+    """
+    if base_url:
+        yield base_url.rstrip("/")
+        return
+
+    shared_dir = tmp_path_factory.getbasetemp()
+    if worker_id != "master":
+        shared_dir = shared_dir.parent
+    database = tmp_path_factory.mktemp("live") / f"{worker_id}.sqlite3"
+    _clone(_seeded_template(shared_dir), str(database))
+
+    port = free_port()
+    url = f"http://127.0.0.1:{port}"
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{database}", "APP_CONFIG": "testing"}
+    log = open(database.with_suffix(".log"), "w")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "flask", "--app", "app", "run", "--port", str(port), "--no-reload"],
+        cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT,
+    )
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                requests.get(f"{url}/auth/login", timeout=1)
+                break
+            except requests.RequestException:  # refused, or accepted before a worker is up
+                if server.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError(f"live server did not start, see {log.name}")
+                time.sleep(0.1)
+        yield url
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+        log.close()
+
+
+@pytest.fixture(scope="session")
+def browser_context_args(browser_context_args, live_server):
+    """Let Playwright resolve relative URLs (``page.goto("/shop")``) against the live server."""
+    return {**browser_context_args, "base_url": live_server}
+
+
+@pytest.fixture
+def driver(request):
+    """
+    "browser" or "http": from a ``driver`` marker on the test, class or
+    module, or per test with ``@pytest.mark.parametrize("driver", [...])``.
+    """
+    marker = request.node.get_closest_marker("driver")
+    return marker.args[0] if marker else "browser"
+
+
+@pytest.fixture(scope="module")
+def http_app(fresh_app):
+    """``fresh_app`` holding the UI catalog, for the http driver."""
+    from app import db
+    from app.services.seed import SeedCounts, seed_database
+
+    with fresh_app.app_context():
+        seed_database(db.engine, SeedCounts(**UI_SEED), log=lambda line: None)
+    return fresh_app
+
+
+@pytest.fixture
+def app_url(request, driver):
+    """Base URL for the page objects and URL assertions, on either driver."""
+    if driver == "http":
+        from pages.driver import BASE_URL
+
+        return BASE_URL
+    return request.getfixturevalue("live_server")
+
+
+@pytest.fixture
+def page(request, driver):
+    """
+    Playwright's ``page``, or with the http driver an ``HttpPage`` over the
+    test client; the browser (and live server) only start for tests that use it.
+    """
+    if driver == "http":
+        from pages.driver import HttpPage
+
+        return HttpPage(request.getfixturevalue("http_app").test_client())
+    if driver != "browser":
+        raise ValueError(f"unknown driver {driver!r}")
+    return request.getfixturevalue("context").new_page()
+
+
+@pytest.fixture
+def checkout_form():
+    """Build a stand-in for ``CheckoutForm`` with valid shipping details for ``username``."""
+
+    def build(username: str) -> SimpleNamespace:
+        fields = {
+            "email": f"{username}@example.com",
+            "full_name": username,
+            "address": "1 Cauldron Row",
+            "city": "Testville",
+            "state": "CA",
+            "zip_code": "94016",
+            "country": "US",
+            "phone": "+15550000000",
+            "shipping_method": "standard",
+        }
+        return SimpleNamespace(**{name: SimpleNamespace(data=value) for name, value in fields.items()})
+
+    return build
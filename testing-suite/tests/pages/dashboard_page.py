@@ -1,10 +1,13 @@
-from playwright.sync_api import Page, expect
+from playwright.sync_api import Page
+
+from pages.driver import HttpPage, expect
 
 class DashboardPage:
-    URL = "http://localhost:5000/account/dashboard"
+    PATH = "/account/dashboard"
 
-    def __init__(self, page: Page):
+    def __init__(self, page: Page | HttpPage, base_url: str):
         self.page = page
+        self.url = base_url + self.PATH
         self.topbar_title = page.locator("header.topbar h1")
         self.logout_link = page.locator("#logout-link")
         self.shop_button = page.locator('a.btn[href="/shop?page=1"]')
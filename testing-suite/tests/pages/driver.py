@@ -0,0 +1,326 @@
+"""
+A browserless stand-in for the slice of Playwright's ``Page`` API that the
+page objects use, driven by the Flask test client and BeautifulSoup.
+
+Locators are lazy, as in Playwright: they are re-resolved against the current
+document every time they are used, so page objects can build them up front.
+Clicking a link follows it; clicking a submit button submits its form with
+the values filled so far. Nothing runs JavaScript, and "visible" only means
+present and not hidden by markup (``hidden``, ``display: none``, ``d-none``,
+``type="hidden"``), so flows that depend on scripts stay on the browser driver.
+
+``expect`` accepts either kind of page or locator, so the same test body runs
+on both drivers.
+"""
+
+from __future__ import annotations
+
+from typing import List, Optional, Pattern, Tuple, Union
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup, Tag
+from playwright.sync_api import expect as playwright_expect
+from werkzeug.datastructures import MultiDict
+
+BASE_URL = "http://localhost"
+
+Expected = Union[str, Pattern[str]]
+
+
+class DriverError(Exception):
+    """An action the HTTP driver cannot perform the way a browser would."""
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.split())
+
+
+def _text(element: Tag) -> str:
+    if element.name == "input" and element.get("type") in ("submit", "button", "reset"):
+        return _normalize(element.get("value", ""))
+    return _normalize(element.get_text(" "))
+
+
+def _matches(expected: Expected, actual: str) -> bool:
+    if isinstance(expected, str):
+        return _normalize(expected) == actual
+    return expected.search(actual) is not None
+
+
+def _hidden(element: Tag) -> bool:
+    if element.name == "input" and element.get("type") == "hidden":
+        return True
+    for node in [element, *element.parents]:
+        if not isinstance(node, Tag) or node.name == "[document]":
+            continue
+        style = node.get("style", "").replace(" ", "")
+        if node.has_attr("hidden") or "display:none" in style or "d-none" in node.get("class", []):
+            return True
+    return False
+
+
+class HttpPage:
+    def __init__(self, client, base_url: str = BASE_URL):
+        self.client = client
+        self.base_url = base_url
+        self.url = "about:blank"
+        self.status: Optional[int] = None
+        self.document = BeautifulSoup("", "html.parser")
+
+    # -- navigation ----------------------------------------------------------
+
+    def _open(self, url: str, method: str = "GET", data: Optional[List[Tuple[str, str]]] = None) -> None:
+        url = urljoin(self.url if self.url != "about:blank" else self.base_url + "/", url)
+        if method == "GET" and data:
+            url = url.split("?", 1)[0]
+            response = self.client.get(url, query_string=MultiDict(data), follow_redirects=True)
+        else:
+            response = self.client.open(url, method=method, data=MultiDict(data or []), follow_redirects=True)
+        self.url = response.request.url
+        self.status = response.status_code
+        self.document = BeautifulSoup(response.get_data(as_text=True), "html.parser")
+
+    def goto(self, url: str) -> None:
+        self._open(url)
+
+    def submit(self, form: Tag, submitter: Optional[Tag] = None) -> None:
+        fields: List[Tuple[str, str]] = []
+        for field in form.select("input, textarea, select"):
+            name = field.get("name")
+            kind = field.get("type", "text")
+            if not name or field.has_attr("disabled"):
+                continue
+            if field.name == "textarea":
+                fields.append((name, field.get_text()))
+            elif field.name == "select":
+                chosen = field.select_one("option[selected]") or field.select_one("option")
+                if chosen is not None:
+                    fields.append((name, chosen.get("value", chosen.get_text())))
+            elif kind in ("submit", "button", "image", "reset", "file"):
+                if field is submitter:
+                    fields.append((name, field.get("value", "")))
+            elif kind in ("checkbox", "radio"):
+                if field.has_attr("checked"):
+                    fields.append((name, field.get("value", "on")))
+            else:
+                fields.append((name, field.get("value", "")))
+        if submitter is not None and submitter.name == "button" and submitter.get("name"):
+            fields.append((submitter["name"], submitter.get("value", "")))
+        self._open(form.get("action") or self.url, form.get("method", "get").upper(), fields)
+
+    # -- Playwright-style helpers -------------------------------------------
+
+    def locator(self, selector: str) -> "HttpLocator":
+        return HttpLocator(self, [("css", selector)])
+
+    def get_by_text(self, text: Expected, exact: bool = False) -> "HttpLocator":
+        return HttpLocator(self, [("text", text, exact)])
+
+    def fill(self, selector: str, value: str) -> None:
+        self.locator(selector).fill(value)
+
+    def click(self, selector: str) -> None:
+        self.locator(selector).click()
+
+    def content(self) -> str:
+        return str(self.document)
+
+    def wait_for_timeout(self, timeout: float) -> None:
+        pass  # nothing is in flight between requests
+
+
+class HttpLocator:
+    def __init__(self, page: HttpPage, steps: list):
+        self.page = page
+        self.steps = steps
+
+    def __repr__(self) -> str:
+        return f"HttpLocator({self.steps!r})"
+
+    # -- resolution ----------------------------------------------------------
+
+    def _within(self, step) -> "HttpLocator":
+        return HttpLocator(self.page, [*self.steps, step])
+
+    @staticmethod
+    def _by_text(scopes: List[Tag], needle: Expected, exact: bool) -> List[Tag]:
+        def hit(element: Tag) -> bool:
+            text = _text(element)
+            if not isinstance(needle, str):
+                return needle.search(text) is not None
+            if exact:
+                return text == _normalize(needle)
+            return _normalize(needle).lower() in text.lower()
+
+        found: List[Tag] = []
+        for scope in scopes:
+            candidates = [e for e in scope.find_all(True) if e.name not in ("script", "style", "head", "title")]
+            hits = [e for e in candidates if hit(e)]
+            # Keep the innermost matches, as Playwright does.
+            found.extend(e for e in hits if not any(any(p is e for p in other.parents) for other in hits))
+        return found
+
+    def _resolve(self) -> List[Tag]:
+        elements: List[Tag] = [self.page.document]
+        for step in self.steps:
+            if step[0] == "nth":
+                elements = elements[step[1]: step[1] + 1] if step[1] >= 0 else elements[step[1]:][:1]
+            elif step[0] == "css" and step[1].startswith("text="):
+                needle = step[1][len("text="):]
+                exact = len(needle) > 1 and needle[0] == needle[-1] == '"'
+                elements = self._by_text(elements, needle.strip('"'), exact)
+            elif step[0] == "css":
+                seen, selected = set(), []
+                for scope in elements:
+                    for element in scope.select(step[1]):
+                        if id(element) not in seen:
+                            seen.add(id(element))
+                            selected.append(element)
+                elements = selected
+            else:
+                elements = self._by_text(elements, step[1], step[2])
+        return elements
+
+    def _one(self) -> Tag:
+        elements = self._resolve()
+        if not elements:
+            raise DriverError(f"{self!r} matched nothing on {self.page.url}")
+        if len(elements) > 1:
+            # Playwright's strict mode: an action must not guess between matches.
+            raise DriverError(f"{self!r} matched {len(elements)} elements on {self.page.url}")
+        return elements[0]
+
+    # -- chaining ------------------------------------------------------------
+
+    @property
+    def first(self) -> "HttpLocator":
+        return self._within(("nth", 0))
+
+    @property
+    def last(self) -> "HttpLocator":
+        return self._within(("nth", -1))
+
+    def nth(self, index: int) -> "HttpLocator":
+        return self._within(("nth", index))
+
+    def locator(self, selector: str) -> "HttpLocator":
+        return self._within(("css", selector))
+
+    def get_by_text(self, text: Expected, exact: bool = False) -> "HttpLocator":
+        return self._within(("text", text, exact))
+
+    # -- actions and queries -------------------------------------------------
+
+    def count(self) -> int:
+        return len(self._resolve())
+
+    def is_visible(self) -> bool:
+        elements = self._resolve()
+        return bool(elements) and not _hidden(elements[0])
+
+    def text_content(self) -> str:
+        return self._one().get_text()
+
+    def inner_text(self) -> str:
+        return _text(self._one())
+
+    def input_value(self) -> str:
+        element = self._one()
+        if element.name == "textarea":
+            return element.get_text()
+        return element.get("value", "")
+
+    def fill(self, value: str) -> None:
+        element = self._one()
+        if element.name == "textarea":
+            element.string = value
+        elif element.name == "input":
+            element["value"] = value
+        else:
+            raise DriverError(f"cannot fill <{element.name}>")
+
+    def check(self) -> None:
+        self._one()["checked"] = ""
+
+    def select_option(self, value: str) -> None:
+        element = self._one()
+        for option in element.select("option"):
+            if option.get("value", option.get_text()) == value:
+                option["selected"] = ""
+            elif option.has_attr("selected"):
+                del option["selected"]
+
+    def click(self) -> None:
+        element = self._one()
+        target = element if element.name in ("a", "button", "input") else element.find_parent(["a", "button"])
+        if target is None:
+            raise DriverError(f"{self!r} is not a link or button; clicking it needs a browser")
+        if target.name == "a":
+            if not target.get("href") or target["href"].startswith(("#", "javascript:")):
+                raise DriverError(f"{self!r} is a script link; clicking it needs a browser")
+            self.page.goto(target["href"])
+            return
+        if target.get("type", "submit") != "submit":
+            raise DriverError(f"{self!r} is a script button; clicking it needs a browser")
+        form = target.find_parent("form")
+        if target.get("form"):
+            form = self.page.document.find("form", id=target["form"])
+        if form is None:
+            raise DriverError(f"{self!r} submits no form")
+        self.page.submit(form, submitter=target)
+
+
+class _PageAssertions:
+    def __init__(self, page: HttpPage):
+        self.page = page
+
+    def to_have_url(self, url: Expected) -> None:
+        ok = self.page.url == url if isinstance(url, str) else url.search(self.page.url)
+        assert ok, f"expected URL {url!r}, got {self.page.url!r}"
+
+    def not_to_have_url(self, url: Expected) -> None:
+        ok = self.page.url == url if isinstance(url, str) else url.search(self.page.url)
+        assert not ok, f"expected URL other than {url!r}"
+
+
+class _LocatorAssertions:
+    def __init__(self, locator: HttpLocator):
+        self.locator = locator
+
+    def _where(self) -> str:
+        return f"{self.locator!r} on {self.locator.page.url}"
+
+    def to_be_visible(self) -> None:
+        assert self.locator.is_visible(), f"expected {self._where()} to be visible"
+
+    def to_be_hidden(self) -> None:
+        assert not self.locator.is_visible(), f"expected {self._where()} to be hidden"
+
+    not_to_be_visible = to_be_hidden
+
+    def to_have_count(self, count: int) -> None:
+        actual = self.locator.count()
+        assert actual == count, f"expected {count} matches for {self._where()}, got {actual}"
+
+    def to_have_text(self, expected: Expected) -> None:
+        actual = self.locator.inner_text()
+        assert _matches(expected, actual), f"expected {self._where()} to have text {expected!r}, got {actual!r}"
+
+    def to_contain_text(self, expected: Expected) -> None:
+        actual = self.locator.inner_text()
+        ok = _normalize(expected) in actual if isinstance(expected, str) else expected.search(actual)
+        assert ok, f"expected {self._where()} to contain {expected!r}, got {actual!r}"
+
+    def to_have_value(self, expected: Expected) -> None:
+        actual = self.locator.input_value()
+        ok = actual == expected if isinstance(expected, str) else expected.search(actual)
+        assert ok, f"expected {self._where()} to have value {expected!r}, got {actual!r}"
+
+
+def expect(target):
+    """``playwright.sync_api.expect`` that also takes ``HttpPage`` and ``HttpLocator``."""
+    if isinstance(target, HttpPage):
+        return _PageAssertions(target)
+    if isinstance(target, HttpLocator):
+        return _LocatorAssertions(target)
+    return playwright_expect(target)
@@ -1,10 +1,13 @@
-from playwright.sync_api import Page, expect
+from playwright.sync_api import Page
+
+from pages.driver import HttpPage, expect
 
 class LoginPage:
-    URL = "http://localhost:5000/auth/login"
+    PATH = "/auth/login"
 
-    def __init__(self, page: Page):
+    def __init__(self, page: Page | HttpPage, base_url: str):
         self.page = page
+        self.url = base_url + self.PATH
         self.username_input = page.locator("#username")
         self.password_input = page.locator("#password")
         self.login_button = page.locator("#login-btn")
@@ -12,7 +15,7 @@ class LoginPage:
         self.instructions_box = page.locator("#login-instructions")
 
     def open(self):
-        self.page.goto(self.URL)
+        self.page.goto(self.url)
 
     def login(self, username: str, password: str):
         self.username_input.fill(username)
@@ -1,22 +1,28 @@
-from playwright.sync_api import Page, expect
+import pytest
+from playwright.sync_api import Page
 
+from pages.driver import expect
 
-def admin_login(page: Page):
-    page.goto("http://localhost:5000/auth/login")
+# Redirects, flashes and markup only: no browser needed (see the "driver" marker).
+pytestmark = pytest.mark.driver("http")
+
+
+def admin_login(page: Page, app_url: str):
+    page.goto("/auth/login")
     page.fill("#username", "admin")
     page.fill("#password", "adminpass")
     page.click("#login-btn")
-    expect(page).to_have_url("http://localhost:5000/admin/dashboard")
+    expect(page).to_have_url(f"{app_url}/admin/dashboard")
 
 
-def test_admin_products_page(page: Page):
-    admin_login(page)
-    page.goto("http://localhost:5000/admin/products")
+def test_admin_products_page(page: Page, app_url: str):
+    admin_login(page, app_url)
+    page.goto("/admin/products")
     expect(page.get_by_text("Products")).to_be_visible()
     expect(page.locator("table")).to_be_visible()
 
 
-def test_admin_console_renders(page: Page):
-    admin_login(page)
-    page.goto("http://localhost:5000/admin/console/")
+def test_admin_console_renders(page: Page, app_url: str):
+    admin_login(page, app_url)
+    page.goto("/admin/console/")
     expect(page.get_by_text("Admin Console")).to_be_visible()
@@ -1,5 +1,10 @@
 import pytest
-from playwright.sync_api import Page, expect
+from playwright.sync_api import Page
+
+from pages.driver import expect
+
+# Redirects, flashes and markup only: no browser needed (see the "driver" marker).
+pytestmark = pytest.mark.driver("http")
 
 
 @pytest.mark.parametrize(
@@ -9,18 +14,18 @@ from playwright.sync_api import Page, expect
         ("admin", "adminpass", "/admin/dashboard"),
     ],
 )
-def test_login_success(page: Page, username: str, password: str, redirect: str):
-    page.goto("http://localhost:5000/auth/login")
+def test_login_success(page: Page, app_url: str, username: str, password: str, redirect: str):
+    page.goto("/auth/login")
     page.fill("#username", username)
     page.fill("#password", password)
     page.click("#login-btn")
-    expect(page).to_have_url(f"http://localhost:5000{redirect}")
+    expect(page).to_have_url(f"{app_url}{redirect}")
 
 
-def test_login_failure_shows_error(page: Page):
-    page.goto("http://localhost:5000/auth/login")
+def test_login_failure_shows_error(page: Page, app_url: str):
+    page.goto("/auth/login")
     page.fill("#username", "baduser")
     page.fill("#password", "badpass")
     page.click("#login-btn")
-    expect(page).to_have_url("http://localhost:5000/auth/login")
+    expect(page).to_have_url(f"{app_url}/auth/login")
     expect(page.locator("#login-error")).to_contain_text("Invalid username or password")
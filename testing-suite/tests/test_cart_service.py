@@ -0,0 +1,321 @@
+import re
+import threading
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+
+@pytest.fixture
+def products(fresh_app):
+    from app import db
+    from app.models import CartItem, Product, User
+
+    with fresh_app.app_context():
+        CartItem.query.delete()
+        Product.query.delete()
+        User.query.delete()
+        db.session.add(User(username="badger", email="badger@example.com", password_hash="!"))
+        rows = [
+            Product(name="Badger Balm", sku="BADGE-1", price_cents=1000, quantity=10),
+            Product(name="Fizzing Whizbee", sku="BADGE-2", price_cents=250, quantity=10),
+        ]
+        db.session.add_all(rows)
+        db.session.commit()
+        ids = [row.id for row in rows]
+        db.session.remove()
+    return ids
+
+
+@contextmanager
+def count_statements(engine):
+    statements = []
+    listener = lambda conn, cursor, statement, parameters, *args: statements.append((statement, parameters))  # noqa: E731
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+
+def signed_in(app, username="badger"):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["username"] = username
+    return client
+
+
+def badge(client) -> int:
+    html = client.get("/cart/").get_data(as_text=True)
+    return int(re.search(r'id="cart-count-badge">\s*(\d+)', html).group(1))
+
+
+def test_badge_follows_changes_made_from_another_session(fresh_app, products):
+    laptop, phone = signed_in(fresh_app), signed_in(fresh_app)
+    balm, _ = products
+
+    assert badge(laptop) == 0
+    assert phone.post(f"/cart/add/{balm}", json={"quantity": 2}).json["success"]
+    assert badge(laptop) == 2
+
+
+def test_summary_total_follows_price_changes(fresh_app, products):
+    from app import db
+    from app.models import Product
+    from app.services.cart import cart_summary
+
+    client = signed_in(fresh_app)
+    balm, whizbee = products
+    client.post(f"/cart/add/{balm}", json={"quantity": 2})
+    client.post(f"/cart/add/{whizbee}", json={"quantity": 1})
+    with client:
+        client.get("/cart/")
+        assert cart_summary("badger") == (3, 2250)
+
+    with fresh_app.app_context():
+        db.session.get(Product, balm).price_cents = 1200
+        db.session.commit()
+
+    with client:
+        client.get("/cart/")
+        assert cart_summary("badger") == (3, 2650)
+
+
+def test_summary_is_queried_once_per_request(fresh_app, products):
+    from app import db
+    from app.services.cart import CartService, cart_summary
+
+    balm, _ = products
+    with fresh_app.test_request_context():
+        with count_statements(db.engine) as statements:
+            first = cart_summary("Badger")
+            assert cart_summary("badger") is first
+        assert len(statements) == 1
+
+        CartService(username="badger").add_item(balm, 1)
+        assert cart_summary("badger").count == 1
+
+
+def test_guest_cart_loads_its_products_with_one_query(fresh_app, products):
+    from flask import session
+
+    from app import db
+    from app.services.cart import CartService
+
+    balm, whizbee = products
+    with fresh_app.test_request_context():
+        session["cart"] = [
+            {"product_id": balm, "quantity": 2, "price_cents": 1000},
+            {"product_id": whizbee, "quantity": 1, "price_cents": 250},
+            {"product_id": 999999, "quantity": 1, "price_cents": 1},  # deleted since it was added
+        ]
+        service = CartService()
+        with count_statements(db.engine) as statements:
+            items = service.get_cart_items()
+
+    assert [(item["product"].name, item["quantity"]) for item in items] == [("Badger Balm", 2), ("Fizzing Whizbee", 1)]
+    [(statement, _)] = statements
+    assert " IN (" in statement
+
+
+def test_load_products_reuses_rows_already_in_the_session(fresh_app, products):
+    from app import db
+    from app.models import Product
+    from app.services.cart import load_products
+
+    balm, whizbee = products
+    with fresh_app.test_request_context():
+        loaded = db.session.get(Product, balm)
+        with count_statements(db.engine) as statements:
+            found = load_products([str(balm), whizbee, "not-an-id"])
+        assert found[balm] is loaded and found[whizbee].name == "Fizzing Whizbee"
+        [(statement, parameters)] = statements
+        assert " IN (" in statement and balm not in parameters
+
+        with count_statements(db.engine) as statements:
+            assert set(load_products([balm, whizbee])) == {balm, whizbee}
+        assert statements == []
+
+
+def cart_rows(app):
+    from app.models import CartItem
+
+    with app.app_context():
+        return sorted((row.product_id, row.quantity) for row in CartItem.query)
+
+
+def test_concurrent_adds_keep_one_line_with_every_increment(fresh_app, products):
+    from app import db
+    from app.models import Product
+
+    threads, stock = 16, 10
+    plenty, scarce = products
+    with fresh_app.app_context():
+        db.session.get(Product, scarce).quantity = stock
+        db.session.get(Product, plenty).quantity = 1000
+        db.session.commit()
+
+    from app.services.cart import CartService
+
+    barrier = threading.Barrier(threads)
+    outcomes = []
+
+    def shopper():
+        barrier.wait()
+        with fresh_app.test_request_context():
+            try:
+                service = CartService(username="badger")
+                outcomes.append((service.add_item(plenty, 2), service.add_item(scarce, 1)))
+            finally:
+                db.session.remove()
+
+    workers = [threading.Thread(target=shopper) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert outcomes == [((True, "Added to cart."), (True, "Added to cart."))] * threads
+    assert cart_rows(fresh_app) == [(plenty, 2 * threads), (scarce, stock)]
+
+
+def test_update_and_remove_never_create_a_line(fresh_app, products):
+    from app.services.cart import CartService
+
+    balm, whizbee = products
+    with fresh_app.test_request_context():
+        service = CartService(username="badger")
+        assert service.update_quantity(balm, 3) == (False, "Item not in cart.")
+        assert service.remove_item(balm) == (False, "Item not in cart.")
+        assert service.update_quantity(999999, 1) == (False, "Product not found.")
+        assert service.add_item(whizbee, 1) == (True, "Added to cart.")
+        assert service.update_quantity(whizbee, 11) == (False, "Not enough stock available.")
+    assert cart_rows(fresh_app) == [(whizbee, 1)]
+
+
+def test_login_merge_adds_guest_lines_in_one_transaction(fresh_app, products):
+    from flask import session
+
+    from app.services.cart import CartService
+
+    balm, whizbee = products
+    with fresh_app.test_request_context():
+        service = CartService(username="badger")
+        service.add_item(balm, 1)
+        session["cart"] = [
+            {"product_id": balm, "quantity": 2},
+            {"product_id": whizbee, "quantity": 50},  # more than is in stock: skipped
+            {"product_id": 999999, "quantity": 1},
+        ]
+        service.merge_session_cart(session["cart"])
+        assert "cart" not in session
+    assert cart_rows(fresh_app) == [(balm, 3)]
+
+
+def test_batch_applies_mixed_operations_and_returns_the_new_cart(fresh_app, products):
+    balm, whizbee = products
+    client = signed_in(fresh_app)
+    client.post(f"/cart/add/{balm}", json={"quantity": 1})
+    assert 'data-batch-url="/cart/batch"' in client.get("/cart/").get_data(as_text=True)  # read by cart.js
+
+    response = client.post("/cart/batch", json={"operations": [
+        {"op": "add", "product_id": whizbee, "quantity": 2},
+        {"op": "update", "product_id": balm, "quantity": 3},
+        {"op": "add", "product_id": balm, "quantity": 50},  # more than is in stock
+    ]})
+
+    data = response.json
+    assert response.status_code == 200 and data["success"] is False
+    assert [(r["op"], r["success"], r["message"]) for r in data["results"]] == [
+        ("add", True, "Added to cart."),
+        ("update", True, "Cart updated."),
+        ("add", False, "Not enough stock available."),
+    ]
+    assert sorted((i["name"], i["quantity"], i["price"], i["line_total"]) for i in data["items"]) == [
+        ("Badger Balm", 3, "10.00 GLD", "30.00 GLD"),
+        ("Fizzing Whizbee", 2, "2.50 GLD", "5.00 GLD"),
+    ]
+    assert (data["subtotal"], data["tax"], data["shipping"], data["total"]) == (
+        "35.00 GLD", "3.50 GLD", "5.00 GLD", "43.50 GLD",
+    )
+    assert data["cart_count"] == 5 and badge(client) == 5
+    assert cart_rows(fresh_app) == [(balm, 3), (whizbee, 2)]
+
+    data = client.post("/cart/batch", json={"operations": [{"op": "remove", "product_id": whizbee}]}).json
+    assert data["success"] and data["cart_count"] == 3 and data["total"] == "38.00 GLD"
+    assert cart_rows(fresh_app) == [(balm, 3)]
+
+
+@pytest.mark.parametrize("bad", [
+    {"op": "explode", "product_id": 1, "quantity": 1},
+    {"op": "add", "product_id": "abc", "quantity": 1},
+    {"op": "add", "product_id": 1, "quantity": "two"},
+    {"op": "add", "product_id": 1, "quantity": 0},
+    {"op": "update", "product_id": 1, "quantity": -1},
+    {"op": "update", "product_id": 1, "quantity": 1.5},
+    {"op": "update", "product_id": 1, "quantity": 10**30},
+    {"op": "remove", "product_id": 10**30},
+    {"op": "add", "product_id": 0, "quantity": 1},
+    "update",
+])
+def test_malformed_batch_is_rejected_without_applying_anything(fresh_app, products, bad):
+    balm, whizbee = products
+    client = signed_in(fresh_app)
+    client.post(f"/cart/add/{balm}", json={"quantity": 1})
+
+    response = client.post("/cart/batch", json={"operations": [
+        {"op": "update", "product_id": balm, "quantity": 4},
+        {"op": "add", "product_id": whizbee, "quantity": 1},
+        bad,
+    ]})
+
+    assert response.status_code == 400
+    assert response.json["success"] is False and response.json["message"].startswith("Operation 3:")
+    assert cart_rows(fresh_app) == [(balm, 1)]
+
+
+def test_out_of_range_single_item_values_are_a_bad_request(fresh_app, products):
+    balm, _ = products
+    client = signed_in(fresh_app)
+    client.post(f"/cart/add/{balm}", json={"quantity": 1})
+
+    for url, payload in [
+        (f"/cart/update/{balm}", {"quantity": 10**30}),
+        (f"/cart/add/{balm}", {"quantity": 10**30}),
+        (f"/cart/update/{10**30}", {"quantity": 1}),
+        (f"/cart/remove/{10**30}", {}),
+    ]:
+        response = client.post(url, json=payload)
+        assert response.status_code == 400 and response.json["success"] is False, url
+    assert cart_rows(fresh_app) == [(balm, 1)]
+
+
+def test_batch_needs_a_list_of_operations(fresh_app, products):
+    client = signed_in(fresh_app)
+    for payload in ({}, {"operations": {"op": "add"}}, ["add"]):
+        assert client.post("/cart/batch", json=payload).status_code == 400
+
+
+def test_guest_batch_updates_the_session_cart(fresh_app, products):
+    from flask import session
+
+    from app.services.cart import CartService, InvalidBatchError
+
+    balm, whizbee = products
+    assert fresh_app.test_client().post("/cart/batch", json={"operations": []}).status_code == 302
+
+    with fresh_app.test_request_context():
+        service = CartService()
+        results = service.apply_batch([
+            {"op": "add", "product_id": balm, "quantity": 2},
+            {"op": "add", "product_id": whizbee, "quantity": 1},
+            {"op": "update", "product_id": balm, "quantity": 5},
+            {"op": "remove", "product_id": whizbee},
+        ])
+        assert all(result["success"] for result in results)
+        assert session["cart"] == [{"product_id": balm, "quantity": 5, "price_cents": 1000}]
+
+        with pytest.raises(InvalidBatchError):
+            service.apply_batch([{"op": "remove", "product_id": balm}, {"op": "add", "product_id": balm}])
+        assert session["cart"] == [{"product_id": balm, "quantity": 5, "price_cents": 1000}]
+    assert cart_rows(fresh_app) == []
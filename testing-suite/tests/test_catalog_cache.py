@@ -0,0 +1,202 @@
+from types import SimpleNamespace
+
+import pytest
+from flask import Flask
+from sqlalchemy import event
+
+
+@pytest.fixture
+def ctx(fresh_app):
+    from app import catalog_cache, db
+    from app.models import Category, Product
+
+    with fresh_app.app_context():
+        Product.query.delete()
+        Category.query.delete()
+        db.session.commit()
+        catalog_cache.clear()
+        yield
+        db.session.remove()
+
+
+@pytest.fixture
+def potion(ctx):
+    from app import db
+    from app.models import Category, Product
+
+    herbs, brews = Category(name="Herbs"), Category(name="Brews")
+    db.session.add_all([herbs, brews])
+    db.session.flush()
+    product = Product(name="Cached Draught", slug="cached-draught", sku="CACHE-1", price_cents=1000,
+                      quantity=5, category_id=herbs.id)
+    db.session.add(product)
+    db.session.commit()
+    return product.id, herbs.id, brews.id
+
+
+def cached(key):
+    from flask import current_app
+
+    from app.services.cache import MISSING
+
+    return current_app.extensions["catalog_cache"].get(key) is not MISSING
+
+
+def fresh_read(product_id):
+    """Read through the cache from an empty identity map, as a new request would."""
+    from app import db
+    from app.services import catalog
+
+    db.session.expunge_all()
+    return catalog.get_product_by_id(product_id)
+
+
+def test_orm_update_drops_the_cached_row(potion):
+    from app import db
+    from app.services.cache import product_key
+
+    product_id, _, _ = potion
+    assert fresh_read(product_id).price_cents == 1000
+    assert cached(product_key(product_id))
+
+    fresh_read(product_id).price_cents = 1500
+    db.session.commit()
+
+    assert not cached(product_key(product_id))
+    assert fresh_read(product_id).price_cents == 1500
+
+
+def test_slug_and_category_changes_drop_old_and_new_keys(potion):
+    from app import db
+    from app.services import catalog
+    from app.services.cache import product_slug_key, related_key
+
+    product_id, herbs_id, brews_id = potion
+    product = catalog.get_product("cached-draught")
+    assert catalog.related_products(product) == []
+    assert [p.id for p in catalog.related_products(SimpleNamespace(id=0, category_id=herbs_id))] == [product_id]
+    assert catalog.related_products(SimpleNamespace(id=0, category_id=brews_id)) == []
+    assert cached(product_slug_key("cached-draught"))
+    assert cached(related_key(herbs_id)) and cached(related_key(brews_id))
+
+    product = fresh_read(product_id)
+    product.slug = "renamed-draught"
+    product.category_id = brews_id
+    db.session.commit()
+
+    assert not cached(product_slug_key("cached-draught"))
+    assert not cached(related_key(herbs_id)) and not cached(related_key(brews_id))
+    db.session.expunge_all()
+    assert catalog.get_product("cached-draught") is None
+    moved = catalog.get_product("renamed-draught")
+    assert moved.id == product_id and moved.category.name == "Brews"
+    assert [p.id for p in catalog.related_products(SimpleNamespace(id=0, category_id=brews_id))] == [product_id]
+
+
+def test_category_rename_drops_products_that_embed_it(potion):
+    from app import db
+    from app.models import Category
+    from app.services import catalog
+    from app.services.cache import CATEGORIES_KEY, product_key
+
+    product_id, herbs_id, _ = potion
+
+    assert fresh_read(product_id).category.name == "Herbs"
+    catalog.all_categories()
+
+    db.session.get(Category, herbs_id).name = "Roots"
+    db.session.commit()
+
+    assert not cached(product_key(product_id)) and not cached(CATEGORIES_KEY)
+    assert fresh_read(product_id).category.name == "Roots"
+    assert [c.name for c in catalog.all_categories()] == ["Brews", "Roots"]
+
+
+def test_rollback_drops_rows_cached_from_the_discarded_flush(potion):
+    from app import db
+    from app.services.cache import product_key
+
+    product_id, _, _ = potion
+    product = fresh_read(product_id)
+    product.price_cents = 1
+    db.session.flush()
+    # A read in the same transaction caches the uncommitted price...
+    db.session.expunge_all()
+    assert fresh_read(product_id).price_cents == 1
+    assert cached(product_key(product_id))
+
+    db.session.rollback()
+
+    # ...and the rollback must not leave it behind.
+    assert not cached(product_key(product_id))
+    assert fresh_read(product_id).price_cents == 1000
+
+
+def test_savepoint_rollback_keeps_keys_for_the_outer_commit(potion):
+    from app import db
+    from app.services.cache import product_key
+
+    product_id, _, _ = potion
+    fresh_read(product_id).price_cents = 1200
+    db.session.flush()
+    with db.session.begin_nested() as savepoint:
+        savepoint.rollback()
+    fresh_read(product_id)  # re-cached with the flushed price before the outer commit
+    db.session.commit()
+
+    assert not cached(product_key(product_id))
+
+
+def test_cached_rows_are_merged_without_queries(potion):
+    from app import db
+
+    product_id, _, _ = potion
+    fresh_read(product_id)  # populate
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(db.engine, "before_cursor_execute", listener)
+    try:
+        product = fresh_read(product_id)
+        assert (product.name, product.category.name) == ("Cached Draught", "Herbs")
+    finally:
+        event.remove(db.engine, "before_cursor_execute", listener)
+    assert statements == []
+
+    # The merged row is a clean, persistent instance: edits flush as usual.
+    assert product in db.session and not db.session.dirty
+    product.quantity = 7
+    db.session.commit()
+    assert db.session.execute(db.text("SELECT quantity FROM products WHERE id = :id"), {"id": product_id}).scalar() == 7
+
+
+def test_sqlite_backend_is_per_database_and_survives_restarts(tmp_path):
+    from app.services.cache import CatalogCache
+
+    def build(database):
+        app = Flask(__name__, instance_path=str(tmp_path))
+        app.config.update(CATALOG_CACHE_BACKEND="sqlite", SQLALCHEMY_DATABASE_URI=database)
+        CatalogCache(app)
+        return app.extensions["catalog_cache"]
+
+    first = build("sqlite:///one.sqlite3")
+    first.set("product:1", "from one")
+    assert build("sqlite:///two.sqlite3").path != first.path
+
+    # A recycled worker must not wipe what the others cached.
+    restarted = build("sqlite:///one.sqlite3")
+    assert restarted.path == first.path
+    assert restarted.get("product:1") == "from one"
+
+
+def test_db_upgrade_empties_the_cache(potion, fresh_app):
+    from app.services.cache import product_key
+
+    product_id, _, _ = potion
+    fresh_read(product_id)
+    assert cached(product_key(product_id))
+
+    result = fresh_app.test_cli_runner().invoke(args=["db-upgrade"])
+
+    assert result.exit_code == 0, result.output
+    assert not cached(product_key(product_id))
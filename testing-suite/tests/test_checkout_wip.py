@@ -1,17 +1,23 @@
-from playwright.sync_api import Page, expect
+import pytest
+from playwright.sync_api import Page
 
+from pages.driver import expect
 
-def login(page: Page, username: str = "test_user", password: str = "secret123"):
-    page.goto("http://localhost:5000/auth/login")
+# Redirects, flashes and markup only: no browser needed (see the "driver" marker).
+pytestmark = pytest.mark.driver("http")
+
+
+def login(page: Page, app_url: str, username: str = "test_user", password: str = "secret123"):
+    page.goto("/auth/login")
     page.fill("#username", username)
     page.fill("#password", password)
     page.click("#login-btn")
-    expect(page).to_have_url("http://localhost:5000/account/dashboard")
+    expect(page).to_have_url(f"{app_url}/account/dashboard")
 
 
-def test_checkout_wip_message(page: Page):
-    login(page)
-    page.goto("http://localhost:5000/checkout")
+def test_checkout_wip_message(page: Page, app_url: str):
+    login(page, app_url)
+    page.goto("/checkout")
     expect(page.get_by_text("work in progress")).to_be_visible()
     page.click("text=Proceed")
     expect(page.get_by_text("work in progress")).to_be_visible()
@@ -0,0 +1,24 @@
+import pytest
+
+
+def test_sqlite_connections_get_the_profile_pragmas(flask_app):
+    from app import db
+    from app.models.pragmas import current_pragmas
+
+    expected = flask_app.config["SQLITE_PRAGMAS"]
+    with flask_app.app_context(), db.engine.connect() as connection:
+        pragmas = current_pragmas(connection)
+    assert pragmas["journal_mode"] == "wal"
+    assert pragmas["busy_timeout"] == expected["busy_timeout"]
+    assert pragmas["cache_size"] == expected["cache_size"]
+    assert pragmas["temp_store"] == 2  # MEMORY
+
+
+def test_profiles_are_selected_by_name_or_environment(monkeypatch):
+    from app.config import LegacyConfig, ProductionConfig, config_for
+
+    monkeypatch.setenv("APP_CONFIG", "production")
+    assert config_for() is ProductionConfig
+    assert config_for("legacy") is LegacyConfig
+    with pytest.raises(ValueError, match="Unknown APP_CONFIG"):
+        config_for("staging")
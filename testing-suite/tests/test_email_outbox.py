@@ -0,0 +1,186 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+aiosmtpd_controller = pytest.importorskip("aiosmtpd.controller")
+
+
+class RecordingHandler:
+    def __init__(self):
+        self.messages = []
+        self.connections = 0
+        self.refuse_rcpt = set()
+        self.refuse_data = set()
+        self.close_on_data = set()
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        self.connections += 1
+        session.host_name = hostname
+        return responses
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address in self.refuse_rcpt:
+            return "550 5.1.1 No such mailbox"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        if set(envelope.rcpt_tos) & self.close_on_data:
+            return "421 4.3.2 Service shutting down"
+        if set(envelope.rcpt_tos) & self.refuse_data:
+            return "554 5.6.0 Message rejected"
+        self.messages.append((envelope.rcpt_tos, envelope.content.decode("utf8", "replace")))
+        return "250 Message accepted for delivery"
+
+
+@pytest.fixture
+def smtp_server(free_port):
+    handler = RecordingHandler()
+    controller = aiosmtpd_controller.Controller(handler, hostname="127.0.0.1", port=free_port())
+    controller.start()
+    yield controller
+    controller.stop()
+
+
+@pytest.fixture
+def mail_to(fresh_app, monkeypatch):
+    """Point Flask-Mail at a host/port and turn delivery on for one test."""
+    state = fresh_app.extensions["mail"]
+
+    def configure(port: int):
+        monkeypatch.setattr(state, "server", "127.0.0.1")
+        monkeypatch.setattr(state, "port", port)
+        monkeypatch.setattr(state, "suppress", False)
+
+    return configure
+
+
+@pytest.fixture
+def ctx(fresh_app):
+    from app import db
+    from app.models import EmailOutbox
+
+    with fresh_app.app_context():
+        EmailOutbox.query.delete()
+        db.session.commit()
+        yield
+        db.session.remove()
+
+
+def enqueue(count: int):
+    from app import db
+    from app.services import outbox
+
+    for n in range(count):
+        outbox.enqueue(f"Order {n}", [f"buyer{n}@example.com"], f"Thanks for order {n}")
+    db.session.commit()
+
+
+def test_batch_is_sent_over_one_connection(ctx, smtp_server, mail_to):
+    from app.models import EmailOutbox
+    from app.services.outbox import deliver_pending
+
+    mail_to(smtp_server.port)
+    enqueue(3)
+
+    stats = deliver_pending()
+
+    assert stats == {"sent": 3, "retried": 0, "failed": 0, "released": 0}
+    assert smtp_server.handler.connections == 1
+    assert sorted(rcpt for rcpt, _ in smtp_server.handler.messages) == [
+        [f"buyer{n}@example.com"] for n in range(3)
+    ]
+    assert "Subject: Order 0" in smtp_server.handler.messages[0][1]
+    assert {e.status for e in EmailOutbox.query} == {"sent"}
+    assert deliver_pending() == {"sent": 0, "retried": 0, "failed": 0, "released": 0}
+
+
+def test_refused_message_does_not_stop_the_batch(ctx, smtp_server, mail_to):
+    from app.models import EmailOutbox
+    from app.services.outbox import deliver_pending
+
+    mail_to(smtp_server.port)
+    smtp_server.handler.refuse_rcpt = {"buyer1@example.com"}
+    smtp_server.handler.refuse_data = {"buyer2@example.com"}
+    enqueue(4)
+
+    stats = deliver_pending()
+
+    assert stats == {"sent": 2, "retried": 2, "failed": 0, "released": 0}
+    assert smtp_server.handler.connections == 1
+    assert sorted(rcpt for rcpt, _ in smtp_server.handler.messages) == [
+        ["buyer0@example.com"],
+        ["buyer3@example.com"],
+    ]
+    entries = EmailOutbox.query.order_by(EmailOutbox.id).all()
+    assert [e.status for e in entries] == ["sent", "pending", "pending", "sent"]
+    assert "SMTPRecipientsRefused" in entries[1].last_error
+    assert "SMTPDataError" in entries[2].last_error
+    assert entries[1].attempts == entries[2].attempts == 1
+
+
+def test_unreachable_server_releases_the_batch_without_charging_attempts(ctx, fresh_app, mail_to, free_port, monkeypatch):
+    from app import db
+    from app.models import EmailOutbox
+    from app.services.outbox import deliver_pending
+
+    mail_to(free_port())  # nothing listens here
+    monkeypatch.setitem(fresh_app.config, "OUTBOX_MAX_ATTEMPTS", 2)
+    enqueue(2)
+
+    stats = deliver_pending()
+    assert stats == {"sent": 0, "retried": 0, "failed": 0, "released": 2}
+    entries = EmailOutbox.query.order_by(EmailOutbox.id).all()
+    assert [(e.attempts, e.claim_token, e.last_error) for e in entries] == [(0, None, None)] * 2
+    assert all(e.next_attempt_at > datetime.now() for e in entries)
+
+    # Nothing is due until the backoff expires.
+    assert deliver_pending()["released"] == 0
+
+    # However often the server is down, no message is given up on.
+    for _ in range(3):
+        EmailOutbox.query.update({"next_attempt_at": datetime.now() - timedelta(seconds=1)})
+        db.session.commit()
+        assert deliver_pending()["released"] == 2
+    db.session.expire_all()
+    assert {(e.status, e.attempts) for e in EmailOutbox.query} == {("pending", 0)}
+
+
+def test_session_dropped_mid_batch_charges_only_the_message_being_sent(ctx, smtp_server, mail_to):
+    from app.models import EmailOutbox
+    from app.services.outbox import deliver_pending
+
+    mail_to(smtp_server.port)
+    smtp_server.handler.close_on_data = {"buyer1@example.com"}
+    enqueue(3)
+
+    stats = deliver_pending()
+
+    assert stats == {"sent": 1, "retried": 1, "failed": 0, "released": 1}
+    entries = EmailOutbox.query.order_by(EmailOutbox.id).all()
+    assert [(e.status, e.attempts) for e in entries] == [("sent", 1), ("pending", 1), ("pending", 0)]
+    assert entries[1].last_error and entries[2].last_error is None
+
+
+def test_order_confirmation_is_queued_with_the_order(ctx, fresh_app, checkout_form):
+    from app import db
+    from app.models import CartItem, EmailOutbox, Order, Product, User
+    from app.services.cart import CartService
+    from app.services.order import OrderService
+
+    user = User(username="outboxer", email="outboxer@example.com", password_hash="!")
+    product = Product(name="Mailable Tonic", price_cents=1000, sku="MAIL-1", quantity=5)
+    db.session.add_all([user, product])
+    db.session.flush()
+    db.session.add(CartItem(user_id=user.id, product_id=product.id, quantity=2))
+    db.session.commit()
+
+    with fresh_app.test_request_context():
+        service = OrderService(CartService(username="outboxer"), "outboxer@example.com", username="outboxer")
+        order = service.create_order(checkout_form("outboxer"))
+
+    queued = EmailOutbox.query.filter_by(order_id=order.id).one()
+    assert queued.status == "pending"
+    assert queued.recipients == ["outboxer@example.com"]
+    assert order.order_number in queued.subject
+    assert db.session.get(Order, order.id) is not None
@@ -0,0 +1,69 @@
+import re
+
+import pytest
+
+
+@pytest.fixture(scope="module")
+def cards_app(fresh_app):
+    from app import db
+    from app.models import Product
+
+    with fresh_app.app_context():
+        db.session.add_all(
+            [Product(name=f"Cached Draught {n}", sku=f"FRAG-{n}", price_cents=100 * n, quantity=5) for n in range(1, 4)]
+        )
+        db.session.commit()
+    return fresh_app
+
+
+def signed_in(app, username):
+    from app.blueprints.auth.constants import USERS
+
+    client = app.test_client()
+    client.post("/auth/login", data={"username": username, "password": USERS[username]["password"]})
+    return client
+
+
+def card_tokens(html):
+    return set(re.findall(r'name="csrf_token" type="hidden" value="([^"]+)"', html))
+
+
+def without_tokens(html):
+    cards = html[html.index('class="card h-100 product-card"'): html.index("</section>")]
+    return re.sub(r'name="csrf_token" type="hidden" value="[^"]+"', "", cards)
+
+
+def test_cached_cards_carry_each_requests_csrf_token(cards_app, monkeypatch):
+    from app.services.fragment_cache import fragment_cache
+
+    alice, bob = signed_in(cards_app, "test_user"), signed_in(cards_app, "admin")
+    monkeypatch.setitem(cards_app.config, "WTF_CSRF_ENABLED", True)
+    with cards_app.app_context():
+        fragment_cache.clear()
+    hits, misses = fragment_cache.hits, fragment_cache.misses
+
+    first = alice.get("/shop/").get_data(as_text=True)
+    second = bob.get("/shop/").get_data(as_text=True)
+
+    assert (fragment_cache.misses - misses, fragment_cache.hits - hits) == (3, 3)
+    assert len(card_tokens(first)) == 1 and len(card_tokens(second)) == 1
+    assert card_tokens(first) != card_tokens(second)
+    assert "\x00" not in second
+    assert without_tokens(first) == without_tokens(second)
+
+
+def test_updating_a_product_renders_a_fresh_card(cards_app):
+    from app import db
+    from app.models import Product
+    from app.services.metrics import FRAGMENT_CACHE_REQUESTS
+
+    client = signed_in(cards_app, "test_user")
+    client.get("/shop/")
+    misses = FRAGMENT_CACHE_REQUESTS.labels("product_card", "miss")._value.get()
+    with cards_app.app_context():
+        db.session.get(Product, 2).price_cents = 4242
+        db.session.commit()
+
+    html = client.get("/shop/").get_data(as_text=True)
+    assert "42.42 GLD" in html
+    assert FRAGMENT_CACHE_REQUESTS.labels("product_card", "miss")._value.get() == misses + 1
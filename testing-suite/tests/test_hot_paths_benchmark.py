@@ -0,0 +1,36 @@
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+SCRIPT = os.path.join(ROOT, "benchmarks", "hot_paths.py")
+
+
+def run_suite(tmp_path, *extra):
+    return subprocess.run(
+        [
+            sys.executable, SCRIPT, "--sizes", "tiny", "--iterations", "5", "--warmup", "1",
+            "--baseline", str(tmp_path / "baseline.json"), "--data-dir", str(tmp_path / "data"), *extra,
+        ],
+        capture_output=True, text=True, timeout=300,
+    )
+
+
+def test_suite_records_baseline_and_flags_query_regressions(tmp_path):
+    first = run_suite(tmp_path, "--update-baseline")
+    assert first.returncode == 0, first.stderr
+    baseline = json.loads((tmp_path / "baseline.json").read_text())
+    paths = baseline["tiny"]
+    assert set(paths) == {
+        "shop.index", "shop.product", "cart.view_cart", "auth.login",
+        "cart.add_item", "cart.get_cart_items", "order.create_order",
+    }
+    assert all(stats["iterations"] == 5 and stats["queries"] >= 1 for stats in paths.values())
+
+    paths["order.create_order"]["queries"] -= 1
+    (tmp_path / "baseline.json").write_text(json.dumps(baseline))
+    second = run_suite(tmp_path, "--tolerance", "100")
+    assert second.returncode == 1
+    assert "tiny order.create_order:" in second.stdout
+    assert "queries (baseline" in second.stdout
@@ -0,0 +1,34 @@
+import pytest
+
+from pages.driver import DriverError, expect
+
+pytestmark = pytest.mark.driver("http")
+
+
+def test_locators_are_lazy_and_strict(page):
+    username = page.locator("#username")
+    page.goto("/auth/login")
+    username.fill("test_user")
+    page.fill("#password", "secret123")
+    page.click("#login-btn")
+    expect(page).to_have_url("http://localhost/account/dashboard")
+
+    page.goto("/shop")
+    with pytest.raises(DriverError, match="matched .* elements"):
+        page.locator(".product-card").click()
+    with pytest.raises(AssertionError, match="to be visible"):
+        expect(page.locator("#no-such-element")).to_be_visible()
+
+
+def test_script_only_controls_are_reported_not_faked(page):
+    page.goto("/auth/login")
+    page.fill("#username", "test_user")
+    page.fill("#password", "secret123")
+    page.click("#login-btn")
+    page.goto("/shop")
+    page.locator(".product-card").first.locator("text=Add to cart").click()
+    expect(page.get_by_text("added to cart")).to_be_visible()
+
+    # The flash's close button only works with Bootstrap's JavaScript.
+    with pytest.raises(DriverError, match="needs a browser"):
+        page.locator(".alert .btn-close").first.click()
@@ -0,0 +1,10 @@
+import requests
+
+
+def test_live_server_serves_its_own_seeded_copy(live_server, worker_id, tmp_path_factory):
+    assert f"{worker_id}.sqlite3" in {path.name for path in tmp_path_factory.getbasetemp().glob("live*/*")}
+
+    http = requests.Session()
+    response = http.post(f"{live_server}/auth/login", data={"username": "test_user", "password": "secret123"})
+    assert response.url == f"{live_server}/account/dashboard"
+    assert http.get(f"{live_server}/shop/").text.count("product-card") > 0
@@ -0,0 +1,37 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+pytest.importorskip("gunicorn")
+
+
+def test_ramp_reports_every_persona_endpoint_without_errors(tmp_path):
+    report = tmp_path / "load.json"
+    result = subprocess.run(
+        [
+            sys.executable, os.path.join(ROOT, "benchmarks", "load_test.py"),
+            "--size", "tiny", "--steps", "1", "3", "--step-seconds", "3", "--workers", "2",
+            "--mix", "browser=1,buyer=1,admin=1", "--json", str(report),
+        ],
+        env={
+            **os.environ,
+            "APP_CONFIG": "production",  # not the suite's CSRF-free profile
+            "CATALOG_CACHE_PATH": str(tmp_path / "catalog_cache.sqlite3"),
+        },
+        capture_output=True, text=True, timeout=300,
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
+
+    steps = json.loads(report.read_text())["steps"]
+    assert [step["users"] for step in steps] == [1, 3]
+    endpoints = set(steps[-1]["endpoints"])
+    assert {"auth.login", "shop.index", "shop.product", "cart.add_item", "cart.update_item",
+            "admin_panel.dashboard"} <= endpoints
+    for step in steps:
+        assert step["total"]["error_rate"] == 0
+        assert step["total"]["rps"] > 0
@@ -1,68 +1,76 @@
-from playwright.sync_api import Page, expect
+import pytest
+from playwright.sync_api import Page
+
+from pages.driver import expect
 from pages.login_page import LoginPage
 from pages.dashboard_page import DashboardPage
 
+# Redirects, flashes and markup only: no browser needed (see the "driver" marker).
+pytestmark = pytest.mark.driver("http")
+
 
-def test_successful_login_redirects_to_dashboard(page: Page):
-    login = LoginPage(page)
-    dashboard = DashboardPage(page)
+@pytest.mark.parametrize("driver", ["http", "browser"])  # keep one real-browser login
+def test_successful_login_redirects_to_dashboard(page: Page, app_url: str):
+    login = LoginPage(page, app_url)
+    dashboard = DashboardPage(page, app_url)
 
     login.open()
     login.login("test_user", "secret123")
 
     #Assert URL and dashboard content
-    expect(page).to_have_url(DashboardPage.URL)
+    expect(page).to_have_url(dashboard.url)
     dashboard.assert_on_page(username="test_user")
 
 
-def test_invalid_password_shows_error(page: Page):
-    login = LoginPage(page)
+def test_invalid_password_shows_error(page: Page, app_url: str):
+    login = LoginPage(page, app_url)
 
     login.open()
     login.login("test_user", "wrongpassword")
 
     #Stays on login and shows error
-    expect(page).to_have_url(LoginPage.URL)
+    expect(page).to_have_url(login.url)
     expect(login.error_message).to_be_visible()
     expect(login.error_message).to_have_text("Invalid username or password")
 
 
-def test_unknown_user_shows_error(page: Page):
-    login = LoginPage(page)
+def test_unknown_user_shows_error(page: Page, app_url: str):
+    login = LoginPage(page, app_url)
 
     login.open()
     login.login("theghostofchristmaspast", "Ilovethegrinch9999")
 
-    expect(page).to_have_url(LoginPage.URL)
+    expect(page).to_have_url(login.url)
     expect(login.error_message).to_be_visible()
     expect(login.error_message).to_have_text("Invalid username or password")
 
 
-def test_empty_credentials_shows_error(page: Page):
-    login = LoginPage(page)
+def test_empty_credentials_shows_error(page: Page, app_url: str):
+    login = LoginPage(page, app_url)
 
     login.open()
     #Submit without filling
     login.login("", "")
 
-    expect(page).to_have_url(LoginPage.URL)
+    expect(page).to_have_url(login.url)
     expect(login.error_message).to_be_visible()
     expect(login.error_message).to_have_text("Invalid username or password")
 
 
-def test_dashboard_not_accessible_without_login(page: Page):
-    dashboard = DashboardPage(page)
+def test_dashboard_not_accessible_without_login(page: Page, app_url: str):
+    login = LoginPage(page, app_url)
+    dashboard = DashboardPage(page, app_url)
 
     #Go directly to dashboard
-    page.goto(DashboardPage.URL)
+    page.goto(dashboard.url)
 
     #Should redirect back to login
-    expect(page).to_have_url(LoginPage.URL)
+    expect(page).to_have_url(login.url)
 
 
-def test_logout_returns_to_login_and_blocks_dashboard(page: Page):
-    login = LoginPage(page)
-    dashboard = DashboardPage(page)
+def test_logout_returns_to_login_and_blocks_dashboard(page: Page, app_url: str):
+    login = LoginPage(page, app_url)
+    dashboard = DashboardPage(page, app_url)
 
     #Log in
     login.open()
@@ -73,9 +81,9 @@ def test_logout_returns_to_login_and_blocks_dashboard(page: Page):
     dashboard.logout()
 
     #Back to login
-    expect(page).to_have_url(LoginPage.URL)
+    expect(page).to_have_url(login.url)
     login.assert_on_page()
 
     #Try to access dashboard again after logout
-    page.goto(DashboardPage.URL)
-    expect(page).to_have_url(LoginPage.URL)
+    page.goto(dashboard.url)
+    expect(page).to_have_url(login.url)
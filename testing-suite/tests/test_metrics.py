@@ -0,0 +1,57 @@
+import os
+import re
+import subprocess
+import sys
+import textwrap
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+
+def sample(text: str, name: str, **labels) -> float:
+    label_re = "".join(f'(?=[^}}]*{key}="{re.escape(value)}")' for key, value in labels.items())
+    pattern = rf"^{re.escape(name)}\{{{label_re}[^}}]*\}} (\S+)$" if labels else rf"^{re.escape(name)} (\S+)$"
+    match = re.search(pattern, text, re.MULTILINE)
+    assert match, f"{name} {labels} not found"
+    return float(match.group(1))
+
+
+def test_metrics_endpoint_is_public_and_reports_endpoint_latency(fresh_app):
+    client = fresh_app.test_client()
+    client.post("/auth/login", data={"username": "test_user", "password": "secret123"})
+    client.get("/shop/")
+    client.get("/shop/")
+
+    response = fresh_app.test_client().get("/metrics")  # fresh client: not signed in
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+    text = response.get_data(as_text=True)
+    assert sample(text, "http_request_duration_seconds_count", endpoint="shop.index", method="GET") >= 2
+    assert sample(text, "http_requests_total", endpoint="shop.index", method="GET", status="200") >= 2
+    assert sample(text, "http_requests_in_progress", endpoint="shop.index") == 0
+    assert sample(text, "db_pool_checkout_wait_seconds_count") > 0
+    assert "catalog_cache_requests_total" in text
+
+
+def test_counters_add_up_across_worker_processes(fresh_app, tmp_path):
+    from app.services.metrics import generate
+
+    worker = textwrap.dedent(
+        """
+        import sys
+        sys.path.insert(0, sys.argv[1])
+        from app.services.metrics import CHECKOUT_FAILURES, ORDERS_CREATED
+        ORDERS_CREATED.inc(int(sys.argv[2]))
+        CHECKOUT_FAILURES.labels("insufficient_stock").inc()
+        """
+    )
+    env = {
+        **os.environ,
+        "PROMETHEUS_MULTIPROC_DIR": str(tmp_path),
+        "DATABASE_URL": f"sqlite:///{tmp_path / 'worker.sqlite3'}",
+    }
+    for increment in (2, 3):
+        subprocess.run([sys.executable, "-c", worker, ROOT, str(increment)], env=env, check=True, timeout=60)
+
+    text = generate(str(tmp_path)).decode()
+    assert sample(text, "orders_created_total") == 5
+    assert sample(text, "checkout_failures_total", reason="insufficient_stock") == 2
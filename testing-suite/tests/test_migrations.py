@@ -0,0 +1,82 @@
+import pytest
+from sqlalchemy import create_engine
+
+LOOKUP_INDEXES = {
+    "ix_orders_user_created",
+    "ix_order_items_order_id",
+    "ix_order_items_product_id",
+    "ix_cart_items_product_id",
+    "ix_reviews_product_created",
+    "ix_products_category_id",
+    "ix_products_active_category_created",
+    "ix_products_active_created",
+    "ix_products_active_price",
+}
+
+
+@pytest.fixture
+def engine(flask_app, tmp_path):
+    from app import db
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrate.sqlite3'}")
+    db.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+def index_names(engine):
+    with engine.connect() as connection:
+        return set(connection.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'index'").scalars())
+
+
+def test_fresh_database_is_stamped_and_upgrade_is_idempotent(engine):
+    from app.models.migrations import MIGRATIONS, applied_versions, upgrade
+
+    assert [m.version for m in upgrade(engine)] == [m.version for m in MIGRATIONS]
+    assert upgrade(engine) == []
+    assert set(applied_versions(engine)) == {m.version for m in MIGRATIONS}
+
+
+def test_upgrade_adds_indexes_to_a_legacy_database_in_place(engine):
+    from app import db
+    from app.models.migrations import upgrade
+
+    # Recreate a database from before the indexes existed, with duplicated cart lines.
+    with engine.begin() as connection:
+        for name in LOOKUP_INDEXES | {"uq_cart_items_user_product"}:
+            connection.exec_driver_sql(f"DROP INDEX {name}")
+        tables = db.metadata.tables
+        connection.execute(
+            tables["users"].insert(),
+            {"id": 1, "username": "old", "email": "old@example.com", "password_hash": "!"},
+        )
+        connection.execute(
+            tables["products"].insert(),
+            {"id": 1, "name": "Old Brew", "slug": "old-brew", "price_cents": 100, "sku": "OLD-1"},
+        )
+        connection.execute(
+            tables["cart_items"].insert(),
+            [{"user_id": 1, "product_id": 1, "quantity": quantity} for quantity in (1, 2)],
+        )
+        products_root = connection.exec_driver_sql(
+            "SELECT rootpage FROM sqlite_master WHERE name = 'products'"
+        ).scalar()
+    assert not LOOKUP_INDEXES & index_names(engine)
+
+    upgrade(engine)
+
+    assert LOOKUP_INDEXES | {"uq_cart_items_user_product"} <= index_names(engine)
+    with engine.connect() as connection:
+        assert connection.exec_driver_sql("SELECT quantity FROM cart_items").scalars().all() == [3]
+        # The table itself was not rebuilt.
+        assert connection.exec_driver_sql(
+            "SELECT rootpage FROM sqlite_master WHERE name = 'products'"
+        ).scalar() == products_root
+        plan = " ".join(
+            row[-1]
+            for row in connection.exec_driver_sql(
+                "EXPLAIN QUERY PLAN SELECT id FROM products WHERE is_active = 1 AND category_id = 1 "
+                "ORDER BY created_at DESC LIMIT 12"
+            )
+        )
+    assert "ix_products_active_category_created" in plan
@@ -0,0 +1,153 @@
+import re
+from datetime import datetime, timedelta
+
+import pytest
+
+PRODUCTS = 25
+PER_PAGE = 4
+
+
+@pytest.fixture(scope="module")
+def paged_app(fresh_app):
+    from app import db
+    from app.models import Product
+
+    with fresh_app.app_context():
+        launch = datetime(2024, 1, 1)
+        db.session.add_all(
+            [
+                # Few distinct prices, names and timestamps: every sort column has ties.
+                Product(
+                    name=f"Twin Draught {n % 3}",
+                    sku=f"PAGE-{n}",
+                    slug=f"page-{n}",
+                    price_cents=500 + 200 * (n % 4),
+                    quantity=1,
+                    created_at=launch + timedelta(days=n // 5),
+                    description="Bubbles." if n % 5 == 0 else "Fizzes.",
+                )
+                for n in range(PRODUCTS)
+            ]
+        )
+        db.session.commit()
+    return fresh_app
+
+
+def expected_ids(order_by):
+    from app.models import Product
+
+    rows = Product.query.all()
+    descending = order_by[0][1]
+    return [row.id for row in sorted(rows, key=lambda row: [getattr(row, c.key) for c, _ in order_by], reverse=descending)]
+
+
+def walk(order_by, scope):
+    """Follow next cursors to the end, then prev cursors back to the start."""
+    from app.models import Product
+    from app.services.pagination import keyset_paginate
+
+    forward, cursor = [], None
+    while True:
+        page = keyset_paginate(Product.query, order_by, PER_PAGE, scope, after=cursor)
+        forward.append([row.id for row in page.items])
+        if not page.has_next:
+            break
+        cursor = page.next_cursor
+
+    backward = [forward[-1]]
+    while page.has_prev:
+        page = keyset_paginate(Product.query, order_by, PER_PAGE, scope, before=page.prev_cursor)
+        backward.insert(0, [row.id for row in page.items])
+    return forward, backward, page
+
+
+@pytest.mark.parametrize("sort", ["newest", "price_asc", "price_desc", "name"])
+def test_cursors_walk_every_sort_mode_both_ways(paged_app, sort):
+    from app.blueprints.shop.routes import SORT_KEYS
+
+    with paged_app.test_request_context():
+        order_by = SORT_KEYS[sort]
+        forward, backward, first = walk(order_by, sort)
+        ids = expected_ids(order_by)
+
+    assert [row for page in forward for row in page] == ids  # ties broken by id: nothing skipped or repeated
+    assert all(len(page) == PER_PAGE for page in forward[:-1])
+    assert backward == forward
+    assert first.total == PRODUCTS and not first.has_prev
+
+
+def test_total_is_counted_once_then_carried_in_the_cursor(paged_app):
+    from sqlalchemy import event
+
+    from app import db
+    from app.blueprints.shop.routes import SORT_KEYS
+    from app.models import Product
+    from app.services.pagination import keyset_paginate
+
+    statements = []
+    with paged_app.test_request_context():
+        first = keyset_paginate(Product.query, SORT_KEYS["name"], PER_PAGE, "name")
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)  # noqa: E731
+        event.listen(db.engine, "before_cursor_execute", listener)
+        try:
+            second = keyset_paginate(Product.query, SORT_KEYS["name"], PER_PAGE, "name", after=first.next_cursor)
+        finally:
+            event.remove(db.engine, "before_cursor_execute", listener)
+    assert second.total == PRODUCTS and second.pages == 7
+    assert len(statements) == 1 and "count(" not in statements[0].lower()
+
+
+def forged(secret, scope, key):
+    from itsdangerous import URLSafeSerializer
+
+    return URLSafeSerializer(secret, salt=f"keyset:{scope}").dumps({"k": key, "t": 1})
+
+
+def shop_client(app):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["username"] = "test_user"
+    return client
+
+
+def listed(client, **args):
+    response = client.get("/shop/", query_string=args)
+    assert response.status_code == 200
+    return re.findall(r'href="/shop/product/([\w-]+)"', response.get_data(as_text=True))
+
+
+BAD_CURSORS = {
+    "tampered": lambda app, good: ("price_asc", good[:-3] + "abc"),
+    "foreign key": lambda app, good: ("price_asc", forged("someone-else", "price_asc||", [500, 0])),
+    "other listing": lambda app, good: ("price_asc", forged(app.secret_key, "name||", ["A", 0])),
+    "bad timestamp": lambda app, good: ("newest", forged(app.secret_key, "newest||", ["not a date", 1])),
+    "not a list": lambda app, good: ("price_asc", forged(app.secret_key, "price_asc||", 5)),
+    "short key": lambda app, good: ("price_asc", forged(app.secret_key, "price_asc||", [500])),
+    "garbage": lambda app, good: ("price_asc", "garbage"),
+}
+
+
+@pytest.mark.parametrize("make_cursor", BAD_CURSORS.values(), ids=BAD_CURSORS.keys())
+def test_bad_cursors_fall_back_to_the_first_page(paged_app, make_cursor):
+    client = shop_client(paged_app)
+    html = client.get("/shop/", query_string={"sort": "price_asc"}).get_data(as_text=True)
+    good = re.search(r'after=([^"&]+)', html).group(1)
+
+    sort, cursor = make_cursor(paged_app, good)
+    first = listed(client, sort=sort)
+    assert len(first) == 12
+    assert listed(client, sort=sort, after=cursor) == first
+    assert listed(client, sort=sort, before=cursor) == first
+
+
+def test_relevance_search_stays_offset_based(paged_app):
+    client = shop_client(paged_app)
+
+    html = client.get("/shop/", query_string={"q": "fizz"}).get_data(as_text=True)
+    assert "page=2" in html and "after=" not in html
+
+    first, second = listed(client, q="fizz"), listed(client, q="fizz", page=2)
+    assert (len(first), len(second)) == (12, 8) and not set(first) & set(second)
+
+    html = client.get("/shop/", query_string={"q": "fizz", "sort": "price_asc"}).get_data(as_text=True)
+    assert "after=" in html and "page=2" not in html
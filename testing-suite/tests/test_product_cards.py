@@ -0,0 +1,78 @@
+import pytest
+from sqlalchemy import event
+
+IMAGE = {
+    "hash": "abc",
+    "width": 960,
+    "height": 720,
+    "variants": {
+        "thumb": {"width": 160, "height": 120, "jpeg": "/static/images/abc-thumb.jpg", "webp": "/static/images/abc-thumb.webp"},
+        "card": {"width": 480, "height": 360, "jpeg": "/static/images/abc-card.jpg", "webp": "/static/images/abc-card.webp"},
+    },
+}
+
+
+@pytest.fixture(scope="module")
+def cards_app(fresh_app):
+    from app import db
+    from app.models import Product
+
+    with fresh_app.app_context():
+        db.session.add_all(
+            [
+                Product(name="Verbose Elixir", sku="CARD-1", price_cents=1999, compare_price_cents=2500,
+                        quantity=3, description="Bubbling, " * 400, images=[IMAGE]),
+                Product(name="Plain Tonic", sku="CARD-2", price_cents=500, quantity=0, image_url="/static/tonic.png"),
+            ]
+        )
+        db.session.commit()
+    return fresh_app
+
+
+def test_cards_render_like_products(cards_app):
+    from flask import render_template_string
+
+    from app.blueprints.cart.forms import CartAddForm
+    from app.models import Product
+    from app.services import catalog
+    from app.services.fragment_cache import fragment_cache
+
+    macro = '{% import "macros/product.html" as m %}{{ m.product_card(product, form) }}'
+    with cards_app.test_request_context():
+        form = CartAddForm()
+        rows = catalog.card_query(Product.query.order_by(Product.id)).all()
+        for card, product in zip(catalog.product_cards(rows), Product.query.order_by(Product.id)):
+            fragment_cache.clear()  # both share a cache key; render each for real
+            from_card = render_template_string(macro, product=card, form=form)
+            fragment_cache.clear()
+            assert from_card == render_template_string(macro, product=product, form=form)
+        verbose = catalog.product_cards(rows)[0]
+        assert (verbose.display_price, verbose.display_discount) == ("19.99 GLD", "5.01 GLD")
+        assert verbose.card_description.endswith("Bubbling…") and len(verbose.card_description) <= 161
+
+
+def test_listing_loads_only_the_card_columns(cards_app):
+    from app import db
+
+    client = cards_app.test_client()
+    client.post("/auth/login", data={"username": "test_user", "password": "secret123"})
+    with cards_app.app_context():
+        engine = db.engine
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if "FROM products" in statement and "count(" not in statement.lower():
+            statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        html = client.get("/shop/").get_data(as_text=True)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert "Verbose Elixir" in html and "-5.01 GLD" in html and "abc-card.webp" in html
+    (listing,) = statements
+    select_list = listing.split("FROM products")[0]
+    assert "substr(products.description" in select_list and "JSON_EXTRACT(products.images" in select_list
+    rest = select_list.replace("substr(products.description", "").replace("JSON_EXTRACT(products.images", "")
+    assert "products.description" not in rest and "products.images" not in rest
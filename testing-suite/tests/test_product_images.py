@@ -0,0 +1,158 @@
+import io
+import os
+
+import pytest
+from PIL import Image
+from werkzeug.datastructures import FileStorage
+
+
+def png_upload(width: int, height: int, color=(120, 40, 200)) -> FileStorage:
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), color).save(buffer, format="PNG")
+    buffer.seek(0)
+    return FileStorage(stream=buffer, filename="potion.png", content_type="image/png")
+
+
+@pytest.fixture(scope="module")
+def images_app(fresh_app, tmp_path_factory):
+    from app.services import images
+
+    fresh_app.config["PRODUCT_IMAGE_DIR"] = str(tmp_path_factory.mktemp("images"))
+    yield fresh_app
+    images.shutdown()
+    fresh_app.config["PRODUCT_IMAGE_DIR"] = None
+
+
+@pytest.fixture
+def product_id(images_app):
+    from app import db
+    from app.models import Product
+
+    suffix = os.urandom(3).hex()
+    with images_app.app_context():
+        product = Product(name=f"Photogenic Draught {suffix}", price_cents=900, sku=f"IMG-{suffix}", quantity=3)
+        db.session.add(product)
+        db.session.commit()
+        yield product.id
+        db.session.remove()
+
+
+def test_upload_produces_content_addressed_variants(images_app, product_id):
+    from app import db
+    from app.models import Product
+    from app.services.images import FORMATS, SIZES, queue_product_image, variant_name
+
+    descriptor = queue_product_image(product_id, png_upload(1600, 1200)).result(timeout=60)
+
+    directory = images_app.config["PRODUCT_IMAGE_DIR"]
+    for size in SIZES:
+        for fmt in FORMATS:
+            assert os.path.exists(os.path.join(directory, variant_name(descriptor["hash"], size, fmt)))
+    assert descriptor["variants"]["card"]["width"] == 480
+    assert descriptor["variants"]["detail"]["height"] == 900
+    with Image.open(os.path.join(directory, variant_name(descriptor["hash"], "thumb", "webp"))) as thumb:
+        assert thumb.format == "WEBP" and thumb.size == (160, 120)
+
+    db.session.expire_all()
+    product = db.session.get(Product, product_id)
+    assert product.images == [descriptor]
+    assert product.image_url == descriptor["variants"]["detail"]["jpeg"]
+    assert product.image_srcset("webp").split(", ") == [
+        f"{descriptor['variants'][size]['webp']} {descriptor['variants'][size]['width']}w" for size in SIZES
+    ]
+
+
+def test_identical_reupload_skips_the_pool(images_app, product_id, monkeypatch):
+    from app.services import images
+
+    first = images.queue_product_image(product_id, png_upload(800, 600, (1, 2, 3))).result(timeout=60)
+
+    def no_pool(app):
+        raise AssertionError("re-upload should reuse the existing files")
+
+    monkeypatch.setattr(images, "_get_executor", no_pool)
+    second = images.queue_product_image(product_id, png_upload(800, 600, (1, 2, 3))).result(timeout=5)
+    assert second == first
+
+
+def test_small_originals_are_not_upscaled(images_app, product_id):
+    from app.services.images import queue_product_image
+
+    descriptor = queue_product_image(product_id, png_upload(300, 200)).result(timeout=60)
+    assert descriptor["variants"]["thumb"]["width"] == 160
+    assert descriptor["variants"]["card"]["width"] == 300
+    assert descriptor["variants"]["detail"]["width"] == 300
+
+
+def test_non_image_upload_is_rejected_in_the_request(images_app, product_id):
+    from PIL import UnidentifiedImageError
+
+    from app.services.images import queue_product_image
+
+    bogus = FileStorage(stream=io.BytesIO(b"not a picture"), filename="potion.png")
+    with pytest.raises(UnidentifiedImageError):
+        queue_product_image(product_id, bogus)
+
+
+def test_product_card_emits_srcset(images_app, product_id):
+    from flask import render_template_string
+
+    from app import db
+    from app.blueprints.cart.forms import CartAddForm
+    from app.models import Product
+    from app.services.images import queue_product_image
+
+    descriptor = queue_product_image(product_id, png_upload(1600, 1200, (9, 9, 9))).result(timeout=60)
+    db.session.expire_all()
+    product = db.session.get(Product, product_id)
+
+    with images_app.test_request_context():
+        html = render_template_string(
+            '{% import "macros/product.html" as m %}{{ m.product_card(product, form) }}',
+            product=product,
+            form=CartAddForm(),
+        )
+    card = descriptor["variants"]["card"]
+    assert f'src="{card["jpeg"]}"' in html
+    assert f'{descriptor["variants"]["detail"]["webp"]} 1200w' in html
+    assert 'type="image/webp"' in html
+    assert "sizes=" in html
+
+
+def test_upload_replaces_only_the_pipeline_entry_of_the_gallery(images_app, product_id):
+    from app import db
+    from app.models import Product
+    from app.services.images import queue_product_image
+
+    product = db.session.get(Product, product_id)
+    product.images = ["/static/legacy/side.jpg"]
+    db.session.commit()
+
+    first = queue_product_image(product_id, png_upload(640, 480, (10, 20, 30))).result(timeout=60)
+    db.session.expire_all()
+    assert db.session.get(Product, product_id).images == [first, "/static/legacy/side.jpg"]
+
+    second = queue_product_image(product_id, png_upload(640, 480, (30, 20, 10))).result(timeout=60)
+    db.session.expire_all()
+    assert db.session.get(Product, product_id).images == [second, "/static/legacy/side.jpg"]
+
+
+def test_each_gallery_slide_uses_its_own_srcset(images_app, product_id):
+    from app import db
+    from app.models import Product
+    from app.services.images import queue_product_image
+
+    other = queue_product_image(product_id, png_upload(900, 600, (70, 80, 90))).result(timeout=60)
+    primary = queue_product_image(product_id, png_upload(1600, 1200, (90, 80, 70))).result(timeout=60)
+    product = db.session.get(Product, product_id)
+    product.images = [primary, other]
+    db.session.commit()
+
+    client = images_app.test_client()
+    with client.session_transaction() as session:
+        session["username"] = "test_user"
+    html = client.get(f"/shop/product/{product_id}").get_data(as_text=True)
+
+    for image in (primary, other):
+        for fmt in ("jpeg", "webp"):
+            assert f'{image["variants"]["detail"][fmt]} {image["variants"]["detail"]["width"]}w' in html
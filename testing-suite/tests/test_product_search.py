@@ -0,0 +1,120 @@
+import pytest
+
+
+@pytest.fixture
+def ctx(fresh_app):
+    from app import db
+    from app.models import Product
+
+    with fresh_app.app_context():
+        Product.query.delete()
+        db.session.commit()
+        db.session.add_all(
+            [
+                Product(name="Minor Healing Potion", sku="FTS-1", price_cents=100, quantity=1,
+                        description="A gentle red draught."),
+                Product(name="Troll Sweat", sku="FTS-2", price_cents=100, quantity=1,
+                        description="Speeds healing, smells terrible."),
+                Product(name="Crème de Mandragore", sku="FTS-3", price_cents=100, quantity=1,
+                        description="Only for the brave."),
+            ]
+        )
+        db.session.commit()
+        yield
+        db.session.remove()
+
+
+def names(query):
+    return [product.name for product in query]
+
+
+def indexed(product_id):
+    from app import db
+    from app.models.search import FTS_TABLE
+
+    return db.session.execute(
+        db.text(f"SELECT name, description FROM {FTS_TABLE} WHERE rowid = :id"), {"id": product_id}
+    ).first()
+
+
+@pytest.fixture
+def without_fts(ctx):
+    """Search as on a SQLite build without FTS5: the index is absent."""
+    from app import db
+    from app.models import search
+
+    with db.engine.begin() as connection:
+        search.drop_index(connection)
+    yield
+    with db.engine.begin() as connection:
+        search.create_index(connection)
+        search.rebuild_index(connection)
+
+
+def test_index_follows_inserts_updates_and_deletes(ctx):
+    from app import db
+    from app.models import Product
+
+    product = Product(name="Dragon Tonic", sku="FTS-4", price_cents=100, quantity=1, description="Hot.")
+    db.session.add(product)
+    db.session.commit()
+    assert tuple(indexed(product.id)) == ("Dragon Tonic", "Hot.")
+
+    product.name = "Wyvern Tonic"
+    db.session.commit()
+    assert tuple(indexed(product.id)) == ("Wyvern Tonic", "Hot.")
+    assert names(Product.search("dragon")) == []
+    assert names(Product.search("wyvern")) == ["Wyvern Tonic"]
+
+    db.session.delete(product)
+    db.session.commit()
+    assert indexed(product.id) is None
+    assert names(Product.search("wyvern")) == []
+
+
+def test_name_hits_outrank_description_hits(ctx):
+    from app.models import Product
+
+    assert names(Product.search("healing")) == ["Minor Healing Potion", "Troll Sweat"]
+    assert names(Product.search("speeds healing")) == ["Troll Sweat"]
+
+
+def test_every_word_matches_as_a_prefix(ctx):
+    from app.models import Product
+
+    assert names(Product.search("he")) == ["Minor Healing Potion", "Troll Sweat"]
+    assert names(Product.search("min heal")) == ["Minor Healing Potion"]
+    assert names(Product.search("creme mandra")) == ["Crème de Mandragore"]  # diacritics folded
+    assert names(Product.search("heal zzz")) == []
+
+
+@pytest.mark.parametrize("term", ['"', 'heal"', "NEAR(heal", "heal AND", "*", "-troll", "heal OR ^"])
+def test_fts_syntax_in_the_term_is_matched_literally(ctx, term):
+    from app.models import Product
+
+    results = names(Product.search(term))  # must not raise an FTS5 syntax error
+    assert set(results) <= {"Minor Healing Potion", "Troll Sweat", "Crème de Mandragore"}
+
+
+def test_terms_without_words_fall_back_to_like(ctx):
+    from app import db
+    from app.models import Product
+
+    db.session.add(Product(name="Potion #9", sku="FTS-5", price_cents=100, quantity=1))
+    db.session.commit()
+    assert names(Product.search("#9")) == ["Potion #9"]
+    assert names(Product.search("#")) == ["Potion #9"]
+
+
+def test_like_fallback_without_an_index(without_fts):
+    from app import db
+    from app.models import Product, search
+
+    assert not search.is_enabled(db.engine)
+    assert sorted(names(Product.search("healing"))) == ["Minor Healing Potion", "Troll Sweat"]
+    assert names(Product.search("brave")) == ["Crème de Mandragore"]
+    # Writes must not touch the missing table.
+    product = db.session.get(Product, Product.query.filter_by(sku="FTS-2").one().id)
+    product.name = "Troll Sweat Deluxe"
+    db.session.commit()
+    assert names(Product.search("deluxe")) == ["Troll Sweat Deluxe"]
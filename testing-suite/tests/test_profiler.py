@@ -0,0 +1,111 @@
+import pstats
+
+import pytest
+
+
+@pytest.fixture
+def profiles(fresh_app, tmp_path, monkeypatch):
+    monkeypatch.setitem(fresh_app.config, "PROFILER_DIR", str(tmp_path))
+    return tmp_path
+
+
+def login(app, username, password):
+    client = app.test_client()
+    client.post("/auth/login", data={"username": username, "password": password})
+    return client
+
+
+def test_admin_captures_sampled_stacks_and_sees_them_listed(fresh_app, profiles):
+    admin = login(fresh_app, "admin", "adminpass")
+
+    response = admin.get("/shop/?_profile=1")
+    assert response.status_code == 200
+    capture_id = response.headers["X-Profile-Id"]
+    collapsed = (profiles / f"{capture_id}.collapsed").read_text()
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in collapsed.splitlines())
+
+    listing = admin.get("/admin/profiles").get_data(as_text=True)
+    assert "GET /shop/?_profile=1" in listing
+    download = admin.get(f"/admin/profiles/{capture_id}.collapsed")
+    assert download.get_data(as_text=True) == collapsed
+
+
+def test_cprofile_mode_writes_loadable_pstats(fresh_app, profiles):
+    admin = login(fresh_app, "admin", "adminpass")
+
+    response = admin.get("/shop/", headers={"X-Profile": "cprofile"})
+    stats = pstats.Stats(str(profiles / f"{response.headers['X-Profile-Id']}.pstats"))
+    assert any(func[2] == "index" for func in stats.stats)
+
+
+def test_flag_is_ignored_for_non_admins(fresh_app, profiles):
+    customer = login(fresh_app, "test_user", "secret123")
+
+    response = customer.get("/shop/?_profile=1")
+    assert response.status_code == 200
+    assert "X-Profile-Id" not in response.headers
+    assert list(profiles.iterdir()) == []
+    assert customer.get("/admin/profiles").status_code == 302
+
+
+@pytest.mark.parametrize("query, headers", [
+    ("?_profile=0", {}),
+    ("?_profile=", {}),
+    ("?_profile=off", {}),
+    ("?_profile=flamegraph", {}),
+    ("", {"X-Profile": "false"}),
+])
+def test_only_known_modes_and_true_flags_start_a_profile(fresh_app, profiles, query, headers):
+    admin = login(fresh_app, "admin", "adminpass")
+
+    response = admin.get(f"/shop/{query}", headers=headers)
+    assert response.status_code == 200
+    assert "X-Profile-Id" not in response.headers
+    assert list(profiles.iterdir()) == []
+    assert "X-Profile-Id" in admin.get("/shop/", headers={"X-Profile": "True"}).headers
+
+
+def test_frame_labels_are_computed_once_per_code_object(monkeypatch):
+    import sys
+
+    from app.services import profiler
+
+    frame = sys._getframe()
+    label = profiler._frame_label(frame)
+    assert label.startswith("test_frame_labels_are_computed_once_per_code_object (")
+
+    monkeypatch.setattr(sys, "path", [])  # a rescan would now give an absolute path
+    assert profiler._frame_label(frame) == label
+
+
+def test_old_captures_are_pruned(fresh_app, profiles, monkeypatch):
+    monkeypatch.setitem(fresh_app.config, "PROFILER_KEEP", 2)
+    admin = login(fresh_app, "admin", "adminpass")
+
+    ids = [admin.get("/shop/?_profile=1").headers["X-Profile-Id"] for _ in range(3)]
+    assert sorted(p.name for p in profiles.iterdir()) == sorted(
+        f"{capture_id}{suffix}" for capture_id in ids[1:] for suffix in (".collapsed", ".json")
+    )
+
+
+@pytest.mark.parametrize("mode", ["sample", "cprofile"])
+def test_profiler_stops_when_the_view_raises(fresh_app, profiles, monkeypatch, mode):
+    import json
+    import sys
+    import threading
+
+    def broken():
+        raise RuntimeError("boom")
+
+    monkeypatch.setitem(fresh_app.view_functions, "shop.index", broken)
+    admin = login(fresh_app, "admin", "adminpass")
+
+    with pytest.raises(RuntimeError):  # TESTING propagates the error: after_request never runs
+        admin.get(f"/shop/?_profile={mode}")
+
+    assert sys.getprofile() is None
+    assert not [t for t in threading.enumerate() if t.name == "request-sampler"]
+    [sidecar] = profiles.glob("*.json")
+    meta = json.loads(sidecar.read_text())
+    assert (meta["mode"], meta["status"], meta["endpoint"]) == (mode, 500, "shop.index")
+    assert (profiles / meta["file"]).exists()
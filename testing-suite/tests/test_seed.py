@@ -0,0 +1,72 @@
+import pytest
+from slugify import slugify
+from sqlalchemy import create_engine, func, select
+
+
+@pytest.fixture(scope="module")
+def seeded_app(fresh_app):
+    from app import db
+    from app.services.seed import SeedCounts, seed_database
+
+    with fresh_app.app_context():
+        counts = SeedCounts(categories=10, products=60, users=25, carts=10, orders=300, reviews=50)
+        seed_database(db.engine, counts, seed=7, batch_size=64, log=lambda line: None)
+    return fresh_app
+
+
+def dump(engine):
+    from app import db
+
+    with engine.connect() as connection:
+        return {
+            name: connection.execute(select(table).order_by(*table.primary_key.columns)).all()
+            for name, table in db.metadata.tables.items()
+        }
+
+
+def test_same_seed_produces_the_same_rows(seeded_app, tmp_path):
+    from app import db
+    from app.services.seed import SeedCounts, seed_database
+
+    counts = SeedCounts(categories=10, products=60, users=25, carts=10, orders=300, reviews=50)
+    copies = []
+    for name in ("a", "b"):
+        engine = create_engine(f"sqlite:///{tmp_path / name}.sqlite3")
+        db.metadata.create_all(engine)
+        seed_database(engine, counts, seed=7, batch_size=64, log=lambda line: None)
+        copies.append(dump(engine))
+        engine.dispose()
+    assert copies[0] == copies[1]
+    with seeded_app.app_context():
+        assert dump(db.engine) == copies[0]
+
+
+def test_rows_match_what_the_orm_listeners_would_produce(seeded_app):
+    from app import db
+    from app.models import Category, Order, OrderItem, Product
+
+    with seeded_app.app_context():
+        for model in (Product, Category):
+            assert all(row.slug == slugify(row.name) for row in model.query.all())
+        assert all(item.total_cents == item.line_total_cents for item in OrderItem.query.all())
+        for order in Order.query.all():
+            assert order.subtotal_cents == order.items_total_cents
+            assert order.total_cents == order.computed_total_cents
+        assert Order.query.count() == 300
+        assert Category.query.filter(Category.parent_id.isnot(None)).count() == 8
+        orphans = db.session.execute(
+            select(func.count()).select_from(OrderItem).outerjoin(Order).where(Order.id.is_(None))
+        ).scalar()
+        assert orphans == 0
+
+
+def test_seeded_products_are_searchable_and_shown(seeded_app):
+    from app.models import Product
+
+    with seeded_app.app_context():
+        product = Product.query.filter_by(is_active=True).first()
+        assert product in Product.search(product.name).all()
+
+    client = seeded_app.test_client()
+    client.post("/auth/login", data={"username": "test_user", "password": "secret123"})
+    assert client.get(f"/shop/product/{product.slug}").status_code == 200
@@ -0,0 +1,85 @@
+import pytest
+
+
+@pytest.fixture(scope="module")
+def stats_app(fresh_app):
+    from app import db
+    from app.models import Category, Product
+
+    with fresh_app.app_context():
+        categories = [Category(name=f"Shelf {n}") for n in range(4)]
+        db.session.add_all(categories)
+        db.session.flush()
+        for n in range(12):
+            db.session.add(
+                Product(name=f"Tincture {n}", price_cents=100 + n, sku=f"TINC-{n}", quantity=5,
+                        category=categories[n % 4])
+            )
+        db.session.commit()
+    return fresh_app
+
+
+@pytest.fixture
+def client(stats_app):
+    client = stats_app.test_client()
+    client.post("/auth/login", data={"username": "test_user", "password": "secret123"})
+    return client
+
+
+def test_fingerprint_collapses_values_and_in_lists(flask_app):
+    from app.services.sql_stats import fingerprint
+
+    assert fingerprint("SELECT *  FROM products\n WHERE id IN (?, ?, ?) AND name = 'x' LIMIT 12") == (
+        "SELECT * FROM products WHERE id IN (...) AND name = ? LIMIT ?"
+    )
+    assert fingerprint("SELECT 1 WHERE id IN (?)") == fingerprint("SELECT 2 WHERE id IN (?, ?)")
+
+
+def test_pages_report_server_timing(client):
+    response = client.get("/shop/")
+    assert response.status_code == 200
+    timings = response.headers.getlist("Server-Timing")
+    assert any(t.startswith("db;dur=") and "queries" in t for t in timings)
+    assert any(t.startswith("app;dur=") for t in timings)
+
+
+def test_strict_mode_enforces_endpoint_budgets(client, stats_app, monkeypatch):
+    from app.services.sql_stats import QueryBudgetExceeded
+
+    monkeypatch.setitem(stats_app.config, "SQL_QUERY_BUDGETS", {"shop.index": 1})
+    with pytest.raises(QueryBudgetExceeded, match=r"GET /shop/: \d+ queries \(budget 1\)"):
+        client.get("/shop/")
+
+
+def test_lazy_loads_per_row_are_reported_as_repeats(stats_app):
+    from app.models import Product
+    from app.services.sql_stats import collect_queries
+
+    with stats_app.app_context():
+        with collect_queries() as stats:
+            names = [product.category.name for product in Product.query.all()]
+    assert len(names) == 12
+    (statement, count), = stats.repeated(threshold=3)
+    assert "FROM categories" in statement
+    assert count == 4  # one lazy load per distinct category; the rest hit the identity map
+
+
+def test_failed_statements_leave_no_timing_state_on_the_connection(stats_app):
+    import copy
+
+    from sqlalchemy.exc import OperationalError
+
+    from app import db
+    from app.services.sql_stats import collect_queries
+
+    with stats_app.app_context():
+        with db.engine.connect() as connection:
+            connection.exec_driver_sql("SELECT 1")
+            info = copy.deepcopy(dict(connection.info))
+            with collect_queries() as stats:
+                for _ in range(3):
+                    with pytest.raises(OperationalError):
+                        connection.exec_driver_sql("SELECT * FROM no_such_table")
+                connection.exec_driver_sql("SELECT 1")
+            assert dict(connection.info) == info
+    assert stats.count == 1 and 0 <= stats.duration < 1
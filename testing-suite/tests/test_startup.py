@@ -0,0 +1,29 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+
+def test_importing_models_does_not_build_the_app(tmp_path):
+    code = (
+        "import sys, app, app.models, app.services.order\n"
+        "assert app._app is None\n"
+        "assert 'flask_admin.contrib.sqla' not in sys.modules\n"
+    )
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{tmp_path / 'lazy.sqlite3'}"}
+    subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, check=True, timeout=60)
+
+
+def test_console_views_scaffold_on_first_visit(fresh_app):
+    from app import admin
+
+    views = {view.endpoint: view for view in admin._views if hasattr(view, "model")}
+    product_view = views["product"]
+    assert not hasattr(product_view, "_list_columns")
+
+    client = fresh_app.test_client()
+    client.post("/auth/login", data={"username": "admin", "password": "adminpass"})
+    assert client.get("/admin/console/product/").status_code == 200
+    assert "name" in dict(product_view._list_columns)
+    assert client.get("/admin/console/product/new/").status_code == 200
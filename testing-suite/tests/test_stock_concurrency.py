@@ -0,0 +1,75 @@
+import threading
+
+import pytest
+
+THREADS = 24
+STOCK = 10
+
+
+@pytest.fixture(scope="module")
+def seeded_app(fresh_app):
+    from app import db
+    from app.models import CartItem, Product, User
+
+    app = fresh_app
+    with app.app_context():
+        product = Product(name="Last Elixir", price_cents=1500, sku="LAST-1", quantity=STOCK)
+        db.session.add(product)
+        db.session.flush()
+        for n in range(THREADS):
+            user = User(username=f"shopper{n}", email=f"shopper{n}@example.com", password_hash="!")
+            db.session.add(user)
+            db.session.flush()
+            db.session.add(CartItem(user_id=user.id, product_id=product.id, quantity=1))
+        db.session.commit()
+        product_id = product.id
+    return app, product_id
+
+
+def test_concurrent_checkouts_never_oversell(seeded_app, checkout_form):
+    from app import db
+    from app.models import Order, OrderItem, Product
+    from app.services.cart import CartService
+    from app.services.order import InsufficientStockError, OrderService
+
+    app, product_id = seeded_app
+    barrier = threading.Barrier(THREADS)
+    outcomes = []
+    lock = threading.Lock()
+
+    def shopper(n: int):
+        username = f"shopper{n}"
+        # Line up before touching the DB: waiting while holding a pooled
+        # connection would starve the pool instead of racing the checkouts.
+        barrier.wait()
+        with app.test_request_context():
+            cart = CartService(username=username)
+            service = OrderService(cart, f"{username}@example.com", username=username)
+            try:
+                service.create_order(checkout_form(username))
+                result = ("ok", None)
+            except InsufficientStockError as exc:
+                result = ("sold_out", exc.lines)
+            finally:
+                db.session.remove()
+        with lock:
+            outcomes.append(result)
+
+    threads = [threading.Thread(target=shopper, args=(n,)) for n in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    succeeded = [o for o in outcomes if o[0] == "ok"]
+    sold_out = [o for o in outcomes if o[0] == "sold_out"]
+    assert len(outcomes) == THREADS
+    assert len(succeeded) == STOCK
+    assert len(sold_out) == THREADS - STOCK
+    for _, lines in sold_out:
+        assert lines == [{"product_id": product_id, "name": "Last Elixir", "requested": 1, "available": 0}]
+
+    with app.app_context():
+        assert db.session.get(Product, product_id).quantity == 0
+        assert Order.query.count() == STOCK
+        assert db.session.query(db.func.sum(OrderItem.quantity)).scalar() == STOCK
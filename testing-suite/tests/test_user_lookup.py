@@ -0,0 +1,92 @@
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+
+@pytest.fixture(scope="module")
+def users_app(fresh_app):
+    from app import db
+    from app.models import User
+
+    with fresh_app.app_context():
+        db.session.add(User(username="Morgana", email="Morgana@Example.com", password_hash="!"))
+        db.session.commit()
+    return fresh_app
+
+
+@contextmanager
+def count_selects(engine):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def test_case_insensitive_lookups_use_expression_indexes(users_app):
+    from app import db
+    from app.models import User
+
+    with users_app.app_context():
+        for column, index in ((User.username, "ix_users_username_lower"), (User.email, "ix_users_email_lower")):
+            query = db.select(User.id).where(db.func.lower(column) == "morgana")
+            sql = str(query.compile(db.engine, compile_kwargs={"literal_binds": True}))
+            plan = " ".join(row[-1] for row in db.session.execute(db.text(f"EXPLAIN QUERY PLAN {sql}")))
+            assert index in plan, plan
+        assert User.by_email("morgana@EXAMPLE.com").username == "Morgana"
+
+
+def test_user_is_resolved_once_per_request(users_app):
+    from app import db
+    from app.services.cart import CartService
+    from app.services.users import current_user, get_user
+
+    with users_app.test_request_context():
+        from flask import session
+
+        session["username"] = "morgana"
+        with count_selects(db.engine) as selects:
+            user = current_user()
+            assert get_user("MORGANA") is user
+            assert CartService(username="Morgana").user is user
+        assert len(selects) == 1
+
+    with users_app.test_request_context():
+        with count_selects(db.engine) as selects:
+            get_user("Morgana")
+        assert len(selects) == 1, "the cache must not outlive the request"
+
+
+def test_misses_are_not_cached(users_app):
+    from app.services.users import get_user
+
+    with users_app.test_request_context():
+        assert get_user("newcomer") is None
+        created = get_user("newcomer", create=True)
+        assert created.id is not None
+        assert get_user("Newcomer") is created
+
+
+def test_create_falls_back_to_a_concurrently_created_user(users_app, monkeypatch):
+    from app.models import User
+    from app.services.users import get_user
+
+    lookup = User.by_username.__func__
+    misses = iter([None])
+
+    def stale_first_lookup(cls, username):
+        # The first lookup misses, as if another request inserted the row
+        # just after it ran.
+        return next(misses, None) or lookup(cls, username)
+
+    monkeypatch.setattr(User, "by_username", classmethod(stale_first_lookup))
+    with users_app.test_request_context():
+        user = get_user("Morgana", create=True)
+        assert user is not None and user.email == "Morgana@Example.com"